@@ -0,0 +1,189 @@
+"""
+Compares requests per second of the sync and async post read paths
+(settings.POSTS_ASYNC_VIEWS) under uvicorn.
+
+Both variants are run against the same freshly seeded SQLite database,
+with many concurrent keep-alive connections each requesting post details
+and author listings in a loop.
+
+Usage (from the directory with manage.py, requires uvicorn):
+    python benchmarks/async_views.py --connections 200 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = """
+from medev.settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+DATABASES['default']['NAME'] = {database!r}
+POSTS_ASYNC_VIEWS = {async_views!r}
+"""
+
+SEED = """
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+from blogs.models import Post
+
+User = get_user_model()
+
+authors = [
+    User.objects.create_user(
+        username=f'author{{i}}', email=f'author{{i}}@mail.com', password='x'
+    )
+    for i in range({authors})
+]
+Post.objects.bulk_create(
+    Post(
+        title=f'Post {{i}}',
+        slug=f'post-{{i}}',
+        content='lorem ipsum ' * 100,
+        author=authors[i % len(authors)]
+    )
+    for i in range({posts})
+)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_settings(directory, name, async_views):
+    (directory / f'{name}.py').write_text(SETTINGS.format(
+        database=str(directory / 'bench.sqlite3'),
+        async_views=async_views
+    ))
+
+
+def environment(directory, settings_module):
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = settings_module
+    env['PYTHONPATH'] = os.pathsep.join([str(directory), str(PROJECT_DIR)])
+    return env
+
+
+async def client(port, paths, deadline, counts):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < deadline:
+            path = random.choice(paths)
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode()
+            )
+            await writer.drain()
+
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+
+            key = 'ok' if status.split()[1:2] == [b'200'] else 'failed'
+            counts[key] += 1
+    finally:
+        writer.close()
+
+
+async def load(port, paths, connections, duration):
+    counts = {'ok': 0, 'failed': 0}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        client(port, paths, deadline, counts) for _ in range(connections)
+    ))
+    return counts
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('uvicorn did not start')
+
+
+def run_variant(directory, name, args, paths):
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'uvicorn', 'medev.asgi:application',
+            '--port', str(port), '--log-level', 'warning', '--no-access-log'
+        ],
+        env=environment(directory, name),
+        cwd=PROJECT_DIR
+    )
+    try:
+        wait_for_server(port)
+        # Warm up the caches, then measure.
+        asyncio.run(load(port, paths, args.connections, 1))
+        counts = asyncio.run(load(port, paths, args.connections, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    return counts['ok'] / args.duration, counts['failed']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--authors', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        sys.exit('uvicorn is required: pip install uvicorn')
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        write_settings(directory, 'bench_sync', False)
+        write_settings(directory, 'bench_async', True)
+
+        env = environment(directory, 'bench_sync')
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            env=env, cwd=PROJECT_DIR, check=True
+        )
+        subprocess.run(
+            [sys.executable, '-c', SEED.format(authors=args.authors, posts=args.posts)],
+            env=env, cwd=PROJECT_DIR, check=True
+        )
+
+        paths = [f'/api/posts/post-{i}/' for i in range(0, args.posts, 7)]
+        paths += [f'/api/posts/?user=author{i}' for i in range(args.authors)]
+
+        print(f'{args.connections} connections, {args.duration}s per variant')
+        for name in ('bench_sync', 'bench_async'):
+            rps, failed = run_variant(directory, name, args, paths)
+            print(f'{name[6:]:>6}: {rps:10.1f} req/s, {failed} non-200')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Measures every compression level of every available encoding (see
+core/compression.py) on a post list response: the compressed size and the
+CPU time it takes, as milliseconds per response and MB/s.
+
+The configured levels have to keep within a CPU budget, a minimum speed in
+MB/s: --budget for settings.COMPRESSION_LEVELS, which every response is
+compressed with, and the lower --feed-budget for
+settings.POSTS_FEED_COMPRESSION_LEVELS, paid once per cached feed. Exits
+with 1 when one of them doesn't, or when brotli isn't installed.
+
+The default response is a page of generated posts, pass --file to measure
+a real one instead, e.g. saved with
+    curl -o feed.json 'http://localhost:8000/api/posts/?user=<slug>'
+
+Usage (from the directory with manage.py):
+    python benchmarks/compression.py --posts 20 --words 800
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+MAX_LEVELS = {
+    'br': 11,
+    'gzip': 9,
+}
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medev.settings')
+    sys.path.insert(0, str(PROJECT_DIR))
+
+    import django
+    django.setup()
+
+
+def generate_feed(posts, words):
+    """
+    Returns a rendered page of posts, with words drawn from a skewed
+    vocabulary so they compress about like prose does.
+    """
+    from core.renderers import FastJSONRenderer
+
+    rng = random.Random(0)
+    vocabulary = [
+        ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 10)))
+        for _ in range(5000)
+    ]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    def text(count):
+        return ' '.join(rng.choices(vocabulary, weights, k=count))
+
+    results = []
+    for i in range(posts):
+        title = text(6)
+        results.append({
+            'title': title,
+            'content': text(words),
+            'slug': f'{title.replace(" ", "-")}-{i}',
+            'author': {'username': 'author', 'first_name': 'Jane', 'last_name': 'Doe'},
+        })
+    return FastJSONRenderer().render({
+        'next': 'http://localhost:8000/api/posts/?cursor=cD0yMDIxLTA2LTE0&user=author',
+        'previous': None,
+        'results': results,
+    })
+
+
+def measure(content, encoding, level, seconds):
+    from core import compression
+
+    runs, elapsed = 0, 0.0
+    while elapsed < seconds:
+        started = time.process_time()
+        compressed = compression.compress(content, encoding, level)
+        elapsed += time.process_time() - started
+        runs += 1
+    return len(compressed), elapsed / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--posts', type=int, default=20)
+    parser.add_argument('--words', type=int, default=800, help='Words per post.')
+    parser.add_argument('--file', help='A response body to measure instead.')
+    parser.add_argument(
+        '--seconds', type=float, default=0.2, help='CPU time to measure each level for.'
+    )
+    parser.add_argument(
+        '--budget', type=float, default=40,
+        help='Minimum MB/s of the levels every response is compressed with.'
+    )
+    parser.add_argument(
+        '--feed-budget', type=float, default=10,
+        help='Minimum MB/s of the levels cached feeds are compressed with.'
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    from core import compression
+
+    if args.file:
+        content = Path(args.file).read_bytes()
+    else:
+        content = generate_feed(args.posts, args.words)
+
+    configured = {
+        'live': (settings.COMPRESSION_LEVELS, args.budget),
+        'feed': (settings.POSTS_FEED_COMPRESSION_LEVELS, args.feed_budget),
+    }
+
+    print(f'{len(content)} bytes')
+    over_budget = []
+    for encoding in compression.CODECS:
+        for level in range(MAX_LEVELS[encoding] + 1):
+            if encoding == 'gzip' and level == 0:
+                # Stored, not compressed.
+                continue
+
+            size, cpu = measure(content, encoding, level, args.seconds)
+            speed = len(content) / cpu / 1e6
+            marks = []
+            for name, (levels, budget) in configured.items():
+                if levels.get(encoding) == level:
+                    within = speed >= budget
+                    marks.append(f'{name}{"" if within else " OVER BUDGET"}')
+                    if not within:
+                        over_budget.append(f'{name} {encoding} level {level}')
+
+            print(
+                f'{encoding:>4} {level:2}: {size:8} bytes ({size / len(content):6.1%}), '
+                f'{cpu * 1000:7.2f}ms, {speed:7.1f} MB/s'
+                f'{"  <- " + ", ".join(marks) if marks else ""}'
+            )
+
+    if 'br' not in compression.CODECS:
+        # A dependency, its levels are configured but were never checked.
+        print('brotli is not installed, only gzip was measured.')
+        sys.exit(1)
+
+    if over_budget:
+        print(f'Over the CPU budget: {", ".join(over_budget)}.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,459 @@
+"""
+Benchmarks every route of medev/urls.py and blogs/urls.py through the
+Django test client, against a freshly seeded SQLite database.
+
+Each endpoint is requested --iterations times for its latency percentiles
+(p50/p95/p99), then once more with its queries counted and its memory
+allocations traced. Endpoints marked cold clear the response cache before
+every request. Throttles never deny, password hashing is left as is.
+
+The results are written as JSON. Given a --baseline from an earlier run,
+endpoints whose latency or memory grew by more than --threshold, or that
+run more queries, are reported and the script exits with status 1.
+
+Usage (from the directory with manage.py):
+    python benchmarks/endpoints.py --posts 10000 --authors 100 --output after.json
+    python benchmarks/endpoints.py --baseline before.json --threshold 0.2
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = """
+from medev.settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+DATABASES['default']['NAME'] = {database!r}
+METRICS_DIR = {metrics!r}
+DATABASE_REPLICAS = []
+# Throttled, but never denied: bursts of 100000 refilling every 10µs.
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {{
+    scope: '100000/s' for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+}}
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+"""
+
+WORDS = (
+    'django python database query index cache latency request response '
+    'serializer migration template router middleware signal model view'
+).split()
+
+PASSWORD = 'oxbuint1-benchmark'
+
+# Compared against the baseline with the threshold, queries exactly.
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'memory_kb')
+
+
+def setup_django(directory):
+    (directory / 'bench_settings.py').write_text(SETTINGS.format(
+        database=str(directory / 'bench.sqlite3'),
+        metrics=str(directory / 'metrics')
+    ))
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+    sys.path[:0] = [str(directory), str(PROJECT_DIR)]
+
+    import django
+    django.setup()
+
+
+def seed(posts, authors, batch_size=10000):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+    from django.db import transaction
+
+    from blogs.models import AuthorStats, Post, Tag
+
+    User = get_user_model()
+
+    call_command('migrate', verbosity=0)
+
+    # Hashed once, the authors all share it.
+    password = make_password(PASSWORD)
+    with transaction.atomic():
+        User.objects.bulk_create(
+            User(
+                username=f'author{i}',
+                slug=f'author{i}',
+                email=f'author{i}@mail.com',
+                password=password
+            )
+            for i in range(authors)
+        )
+        author_ids = list(User.objects.values_list('pk', flat=True))
+
+        for start in range(0, posts, batch_size):
+            Post.objects.bulk_create(
+                Post(
+                    title=f'Post {i}',
+                    slug=f'post-{i}',
+                    content=' '.join(random.choices(WORDS, k=200)),
+                    author_id=author_ids[i % len(author_ids)]
+                )
+                for i in range(start, min(start + batch_size, posts))
+            )
+
+        AuthorStats.objects.reconcile()
+
+        # A few tags on the first author's latest posts.
+        latest = list(Post.objects.filter(author_id=author_ids[0]).order_by('-pk')[:100])
+        Tag.objects.assign(latest, ['python', 'django'])
+
+
+def basic_credentials(username):
+    credentials = base64.b64encode(f'{username}:{PASSWORD}'.encode()).decode()
+    return f'Basic {credentials}'
+
+
+class Endpoint:
+    """
+    A route and how to request it. prepare(client, i) runs untimed before
+    the i-th request and returns its path and data.
+    """
+    def __init__(self, name, method, prepare, status=200, user=None, cold=False,
+                 headers=None):
+        self.name = name
+        self.method = method
+        self.prepare = prepare
+        self.status = status
+        self.user = user
+        self.cold = cold
+        self.headers = headers or {}
+
+
+def get_endpoints():
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.tokens import default_token_generator
+    from django.urls import reverse
+    from django.utils.encoding import force_bytes
+    from django.utils.http import urlsafe_base64_encode
+
+    from blogs.models import Post
+
+    User = get_user_model()
+
+    author = User.objects.get(username='author0')
+    author.is_staff = author.is_superuser = True
+    author.save()
+
+    # Users whose password the endpoints change.
+    changing = User.objects.create_user(
+        username='changing', email='changing@mail.com', password=PASSWORD
+    )
+    resetting = User.objects.create_user(
+        username='resetting', email='resetting@mail.com', password=PASSWORD
+    )
+
+    post = Post.objects.filter(author=author).latest('pk')
+    detail = reverse('post-detail', kwargs={'slug': post.slug})
+    listing = f"{reverse('post-list')}?user={author.slug}"
+
+    def fixed(path, data=None):
+        return lambda client, i: (path, data)
+
+    def new_posts(count):
+        # Created untimed, as the targets of updates and deletes.
+        def create(client, i):
+            return [
+                Post.objects.create(title=f'Target {i}', content='content', author=author)
+                for _ in range(count)
+            ]
+        return create
+
+    def delete_post(client, i):
+        post, = new_posts(1)(client, i)
+        return reverse('post-detail', kwargs={'slug': post.slug}), None
+
+    def bulk_delete(client, i):
+        return reverse('post-bulk'), [post.slug for post in new_posts(10)(client, i)]
+
+    def bulk_update(client, i):
+        return reverse('post-bulk'), [
+            {'slug': post.slug, 'content': f'updated {i}'}
+            for post in new_posts(10)(client, i)
+        ]
+
+    def register(client, i):
+        return reverse('rest_register'), {
+            'username': f'registered{i}',
+            'email': f'registered{i}@mail.com',
+            'password1': PASSWORD,
+            'password2': PASSWORD
+        }
+
+    def logout(client, i):
+        client.force_login(author)
+        return reverse('rest_logout'), None
+
+    def reset_confirm(client, i):
+        resetting.refresh_from_db()
+        uid = urlsafe_base64_encode(force_bytes(resetting.pk))
+        token = default_token_generator.make_token(resetting)
+        path = reverse('password_reset_confirm', kwargs={'uidb64': uid, 'token': token})
+        return path, {
+            'uid': uid,
+            'token': token,
+            'new_password1': f'{PASSWORD}-{i}',
+            'new_password2': f'{PASSWORD}-{i}'
+        }
+
+    return [
+        Endpoint('post-list', 'get', fixed(listing)),
+        Endpoint('post-list-cold', 'get', fixed(listing), cold=True),
+        Endpoint('post-list-tags', 'get', fixed(f"{reverse('post-list')}?tags=python&tags=django")),
+        Endpoint('post-detail', 'get', fixed(detail)),
+        Endpoint('post-detail-cold', 'get', fixed(detail), cold=True),
+        Endpoint('post-search', 'get', fixed(f"{reverse('post-search')}?q=django+cache")),
+        Endpoint('post-export', 'get', fixed(f"{reverse('post-export')}?user={author.slug}")),
+        Endpoint(
+            'post-create', 'post',
+            fixed(reverse('post-list'), {'title': 'Benchmark post', 'content': 'content'}),
+            status=201, user=author
+        ),
+        Endpoint(
+            'post-update', 'patch', fixed(detail, {'content': 'updated content'}),
+            user=author
+        ),
+        Endpoint('post-delete', 'delete', delete_post, status=204, user=author),
+        Endpoint(
+            'post-tags', 'post',
+            fixed(reverse('post-tags', kwargs={'slug': post.slug}), {'tags': ['python', 'orm']}),
+            user=author
+        ),
+        Endpoint(
+            'post-bulk-create', 'post',
+            fixed(reverse('post-bulk'), [{'title': 'Bulk post', 'content': 'content'}] * 10),
+            status=201, user=author
+        ),
+        Endpoint('post-bulk-update', 'patch', bulk_update, user=author),
+        Endpoint('post-bulk-delete', 'delete', bulk_delete, status=204, user=author),
+        Endpoint('tag-list', 'get', fixed(reverse('tag-list'))),
+        Endpoint('tag-detail', 'get', fixed(reverse('tag-detail', kwargs={'name': 'python'}))),
+        Endpoint(
+            'author-stats', 'get',
+            fixed(reverse('author-stats', kwargs={'slug': author.slug}))
+        ),
+        Endpoint('rest_register', 'post', register, status=201),
+        Endpoint(
+            'rest_login', 'post',
+            fixed(reverse('rest_login'), {'username': 'author1', 'password': PASSWORD})
+        ),
+        Endpoint('rest_logout', 'post', logout),
+        Endpoint('rest_user_details', 'get', fixed(reverse('rest_user_details')), user=author),
+        Endpoint(
+            'rest_password_change', 'post',
+            fixed(reverse('rest_password_change'), {
+                'new_password1': PASSWORD, 'new_password2': PASSWORD
+            }),
+            user=changing
+        ),
+        Endpoint(
+            'rest_password_reset', 'post',
+            fixed(reverse('rest_password_reset'), {'email': 'author1@mail.com'})
+        ),
+        Endpoint('password_reset_confirm', 'post', reset_confirm),
+        Endpoint(
+            'basic_token_exchange', 'post', fixed(reverse('basic_token_exchange')),
+            headers={'HTTP_AUTHORIZATION': basic_credentials('author1')}
+        ),
+        Endpoint('admin-index', 'get', fixed(reverse('admin:index')), user=author),
+        Endpoint(
+            'admin-post-changelist', 'get',
+            fixed(reverse('admin:blogs_post_changelist')), user=author
+        ),
+    ]
+
+
+def prepare(client, endpoint, i):
+    from django.core.cache import cache
+
+    if endpoint.cold:
+        cache.clear()
+    return endpoint.prepare(client, i)
+
+
+def request(client, endpoint, path, data):
+    started = time.perf_counter()
+    response = getattr(client, endpoint.method)(
+        path, data, content_type='application/json'
+    )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    elapsed = time.perf_counter() - started
+
+    if response.status_code != endpoint.status:
+        raise RuntimeError(
+            f'{endpoint.name}: {endpoint.method.upper()} {path} returned '
+            f'{response.status_code}, expected {endpoint.status}.'
+        )
+    return elapsed
+
+
+def run_endpoint(endpoint, iterations):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(**endpoint.headers)
+    if endpoint.user is not None:
+        client.force_login(endpoint.user)
+
+    # Warm up, then measure.
+    request(client, endpoint, *prepare(client, endpoint, -1))
+    latencies = [
+        request(client, endpoint, *prepare(client, endpoint, i))
+        for i in range(iterations)
+    ]
+
+    # Set up before tracing, so only the request's own queries and
+    # allocations are counted.
+    path, data = prepare(client, endpoint, iterations)
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        request(client, endpoint, path, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'method': endpoint.method.upper(),
+        'path': path,
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'queries': len(queries),
+        'memory_kb': round(peak / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, cwd=PROJECT_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a description of every regression of results against baseline.
+    """
+    regressions = []
+    for name, result in results['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f"{name}: {result['queries']} queries, was {before['queries']}"
+            )
+        for metric in METRICS:
+            if result[metric] > before[metric] * (1 + threshold):
+                regressions.append(
+                    f'{name}: {metric} {result[metric]}, was {before[metric]} '
+                    f'(+{result[metric] / before[metric] - 1:.0%})'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Endpoints to run.')
+    parser.add_argument('--output', help='File to write the results to.')
+    parser.add_argument('--baseline', help='Results to compare against.')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Allowed relative growth of latency and memory over the baseline.'
+    )
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory))
+
+        import django
+
+        started = time.perf_counter()
+        seed(args.posts, args.authors)
+        print(
+            f'Seeded {args.posts} posts by {args.authors} authors '
+            f'in {time.perf_counter() - started:.1f}s', file=sys.stderr
+        )
+
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'posts': args.posts,
+                'authors': args.authors,
+                'iterations': args.iterations,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'endpoints': {},
+        }
+
+        print(
+            f"{'endpoint':<24} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'memory':>10}",
+            file=sys.stderr
+        )
+        for endpoint in get_endpoints():
+            if args.only and endpoint.name not in args.only:
+                continue
+
+            result = run_endpoint(endpoint, args.iterations)
+            results['endpoints'][endpoint.name] = result
+            print(
+                f"{endpoint.name:<24} {result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+                f"{result['p99_ms']:>7.2f}ms {result['queries']:>8} "
+                f"{result['memory_kb']:>8.1f}KB",
+                file=sys.stderr
+            )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        for key in ('posts', 'authors'):
+            if baseline['meta'][key] != results['meta'][key]:
+                print(
+                    f"Warning: the baseline has {baseline['meta'][key]} {key}, "
+                    f"not {results['meta'][key]}.", file=sys.stderr
+                )
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(
+            f"No regressions against {baseline['meta'].get('commit') or args.baseline}.",
+            file=sys.stderr
+        )
+
+
+if __name__ == '__main__':
+    main()
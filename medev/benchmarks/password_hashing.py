@@ -0,0 +1,82 @@
+"""
+Compares creating users one create_user() call at a time with
+MyUserManager.bulk_create_users, which hashes the passwords in parallel.
+
+Both run against the same freshly migrated SQLite database, with the
+project's password hasher.
+
+Usage (from the directory with manage.py):
+    python benchmarks/password_hashing.py --users 200 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = """
+from medev.settings import *
+
+DEBUG = False
+DATABASES['default']['NAME'] = {database!r}
+"""
+
+
+def setup(directory):
+    (directory / 'bench_settings.py').write_text(
+        SETTINGS.format(database=str(directory / 'bench.sqlite3'))
+    )
+    sys.path[:0] = [str(directory), str(PROJECT_DIR)]
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup(Path(directory))
+
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.hashers import get_hasher
+        User = get_user_model()
+
+        print(f'{args.users} users per variant, {get_hasher().algorithm}')
+
+        started = time.perf_counter()
+        for i in range(args.users):
+            User.objects.create_user(
+                email=f'loop{i}@mail.com', username=f'loop{i}', password=f'password{i}'
+            )
+        loop = time.perf_counter() - started
+
+        started = time.perf_counter()
+        User.objects.bulk_create_users(
+            [
+                User(email=f'batch{i}@mail.com', username=f'batch{i}')
+                for i in range(args.users)
+            ],
+            passwords=[f'password{i}' for i in range(args.users)],
+            workers=args.workers
+        )
+        batch = time.perf_counter() - started
+
+        for name, elapsed in (('loop', loop), ('batch', batch)):
+            print(f'{name:>6}: {elapsed:8.2f}s, {args.users / elapsed:8.1f} users/s')
+        print(f'{loop / batch:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
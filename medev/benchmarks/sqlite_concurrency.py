@@ -0,0 +1,230 @@
+"""
+Compares readers and writers hitting one SQLite database at the same time,
+with Django's defaults and with the tuned setup (settings.SQLITE_PRAGMAS
+and IMMEDIATE transactions, see core/sqlite.py).
+
+Each variant gets a freshly seeded database. Reader processes fetch post
+details and author listings in a loop, while writer processes create
+posts, each in its own transaction. Reported are the operations per
+second, the "database is locked" errors and the read latencies, which
+show readers stalling behind writes.
+
+Usage (from the directory with manage.py):
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 4 --duration 10
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = """
+from medev.settings import *
+
+DEBUG = False
+DATABASES['default']['NAME'] = {database!r}
+{overrides}
+"""
+
+VARIANTS = {
+    # Django's defaults: a rollback journal and deferred transactions.
+    'default': "DATABASES['default']['OPTIONS'] = {}\nSQLITE_PRAGMAS = {}",
+    # The project's settings.
+    'tuned': '',
+}
+
+SEED = """
+import django
+django.setup()
+
+from django.contrib.auth import get_user_model
+from blogs.models import Post
+
+User = get_user_model()
+
+authors = [
+    User.objects.create_user(
+        username=f'author{{i}}', email=f'author{{i}}@mail.com', password='x'
+    )
+    for i in range({authors})
+]
+Post.objects.bulk_create(
+    Post(
+        title=f'Post {{i}}',
+        slug=f'post-{{i}}',
+        content='lorem ipsum ' * 100,
+        author=authors[i % len(authors)]
+    )
+    for i in range({posts})
+)
+"""
+
+
+def write_settings(directory, variant):
+    (directory / 'bench_settings.py').write_text(SETTINGS.format(
+        database=str(directory / 'bench.sqlite3'),
+        overrides=VARIANTS[variant]
+    ))
+
+
+def environment(directory):
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+    env['PYTHONPATH'] = os.pathsep.join([str(directory), str(PROJECT_DIR)])
+    return env
+
+
+def setup_django(directory):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+    sys.path[:0] = [str(directory), str(PROJECT_DIR)]
+
+    import django
+    django.setup()
+
+
+def read(args, deadline, results):
+    import random
+
+    from blogs.models import Post
+
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if random.random() < 0.5:
+                Post.objects.select_related('author').get(
+                    slug=f'post-{random.randrange(args.posts)}'
+                )
+            else:
+                list(Post.objects.filter(
+                    author__username=f'author{random.randrange(args.authors)}'
+                ).order_by('-created_at')[:20])
+        except Exception as e:
+            if 'locked' not in str(e):
+                raise
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+    results.put(('read', latencies, errors))
+
+
+def write(args, deadline, results):
+    import random
+
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+
+    from blogs.models import Post
+
+    authors = list(get_user_model().objects.all())
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                Post.objects.create(
+                    title='Benchmark post',
+                    content='lorem ipsum ' * 100,
+                    author=random.choice(authors)
+                )
+        except Exception as e:
+            if 'locked' not in str(e):
+                raise
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+    results.put(('write', latencies, errors))
+
+
+def worker(role, directory, args, start, results):
+    setup_django(directory)
+    # Start together, once every worker has set up Django.
+    time.sleep(max(0, start - time.time()))
+    deadline = time.perf_counter() + args.duration
+    (read if role == 'read' else write)(args, deadline, results)
+
+
+def run_variant(variant, args):
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        write_settings(directory, variant)
+
+        env = environment(directory)
+        subprocess.run(
+            [sys.executable, 'manage.py', 'migrate', '-v', '0'],
+            env=env, cwd=PROJECT_DIR, check=True
+        )
+        subprocess.run(
+            [sys.executable, '-c', SEED.format(authors=args.authors, posts=args.posts)],
+            env=env, cwd=PROJECT_DIR, check=True
+        )
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        start = time.time() + 3
+        roles = ['read'] * args.readers + ['write'] * args.writers
+        processes = [
+            context.Process(target=worker, args=(role, directory, args, start, results))
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+
+        totals = {
+            'read': {'latencies': [], 'errors': 0},
+            'write': {'latencies': [], 'errors': 0},
+        }
+        for _ in processes:
+            role, latencies, errors = results.get()
+            totals[role]['latencies'] += latencies
+            totals[role]['errors'] += errors
+        for process in processes:
+            process.join()
+
+    return totals
+
+
+def milliseconds(latencies, quantile):
+    if not latencies:
+        return float('nan')
+    if quantile == 1:
+        return max(latencies) * 1000
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return quantiles[int(quantile * 100) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--authors', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(
+        f'{args.readers} readers, {args.writers} writers, '
+        f'{args.duration}s per variant'
+    )
+    for variant in VARIANTS:
+        totals = run_variant(variant, args)
+        for role, total in totals.items():
+            latencies = total['latencies']
+            print(
+                f'{variant:>8} {role:>5}: {len(latencies) / args.duration:8.1f} ops/s, '
+                f'{total["errors"]:5} locked, '
+                f'p50 {milliseconds(latencies, 0.5):7.2f}ms, '
+                f'p99 {milliseconds(latencies, 0.99):7.2f}ms, '
+                f'max {milliseconds(latencies, 1):8.2f}ms'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+ASGI-native read path for posts, enabled with settings.POSTS_ASYNC_VIEWS.
+
+Cached responses (and their 304s) are answered on the event loop, without
+ever handing the request to a thread, after taking a token from the
+client's 'posts' throttle bucket like PostViewSet would. The cache API of
+this Django version is sync only, so that only holds for the in-process
+LocMemCache. Lookups in any other backend (Redis, memcached, files) do I/O
+and run in a thread. Cache misses, requests with credentials (their bucket
+is per user, which takes authenticating them) and every write fall back to
+the sync PostViewSet, so both variants behave exactly the same.
+
+The Django version this runs on has no async ORM, so the fallback runs the
+whole query, serialize and render step in one sync_to_async call. It's not
+thread sensitive, so misses run in parallel rather than one at a time on
+the shared sync thread, which is what caps a sync view under ASGI.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+
+from core import compression
+from core.renderers import FastJSONRenderer
+from core.throttling import ScopedTokenBucketThrottle
+
+from .. import cache
+from . import conditional
+from .views import PostViewSet
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+sync_post_list = PostViewSet.as_view({
+    'get': 'list',
+    'post': 'create'
+})
+
+sync_post_detail = PostViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy'
+})
+
+
+def cached_response(request, entry):
+    return conditional.respond(
+        request,
+        entry['etag'],
+        lambda: HttpResponse(
+            FastJSONRenderer().render(entry['data']),
+            content_type='application/json'
+        )
+    )
+
+
+def cached_list_response(request, entry):
+    # Mirrors PostViewSet.cached_list, list entries are already rendered.
+    return conditional.respond(
+        request,
+        entry['etag'],
+        lambda: compression.encoded_response(
+            request, entry['content'], entry['encoded'], 'application/json'
+        )
+    )
+
+
+def _run_sync_view(view, request, *args, **kwargs):
+    # This thread isn't the one Django's request signals close connections
+    # in, so keep to the same connection lifecycle here.
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        # A 304 is a plain HttpResponse, anything else a DRF Response.
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+async def sync_fallback(view, request, *args, **kwargs):
+    return await sync_to_async(_run_sync_view, thread_sensitive=False)(
+        view, request, *args, **kwargs
+    )
+
+
+async def cache_call(backend, function, *args):
+    """
+    Returns function(*args), a blocking call to the backend cache, without
+    blocking the loop.
+    """
+    if isinstance(backend, LocMemCache):
+        return function(*args)
+    return await sync_to_async(function, thread_sensitive=False)(*args)
+
+
+async def cache_lookup(lookup, *args):
+    return await cache_call(cache.get_cache(), lookup, *args)
+
+
+def has_credentials(request):
+    return (
+        'HTTP_AUTHORIZATION' in request.META or
+        settings.SESSION_COOKIE_NAME in request.COOKIES
+    )
+
+
+async def throttle(request):
+    """
+    Returns the 429 DRF would answer an anonymous request over the 'posts'
+    rate with, or None.
+    """
+    bucket = ScopedTokenBucketThrottle()
+    # Without authenticators, the request's user is anonymous.
+    allowed = await cache_call(
+        caches[settings.THROTTLE_CACHE_ALIAS],
+        bucket.allow_request, Request(request), PostViewSet
+    )
+    if allowed:
+        return None
+
+    exc = Throttled(bucket.wait())
+    response = HttpResponse(
+        FastJSONRenderer().render({'detail': str(exc.detail)}),
+        content_type='application/json',
+        status=exc.status_code
+    )
+    response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+async def from_cache(request, respond, lookup, *args):
+    """
+    Returns respond(request, entry) with the cache entry of lookup(*args),
+    or a 429 if the request is over its rate. None if the request can't be
+    answered from the cache.
+    """
+    if request.method not in SAFE_METHODS or has_credentials(request):
+        return None
+
+    entry = await cache_lookup(lookup, *args)
+    if entry is None:
+        return None
+    return await throttle(request) or respond(request, entry)
+
+
+async def post_list(request):
+    author_slug = request.GET.get('user')
+
+    # Mirrors the cached case of PostViewSet.list.
+    if author_slug and 'tags' not in request.GET:
+        response = await from_cache(
+            request, cached_list_response,
+            cache.get_list, author_slug, request.build_absolute_uri()
+        )
+        if response is not None:
+            return response
+
+    return await sync_fallback(sync_post_list, request)
+
+
+async def post_detail(request, slug):
+    response = await from_cache(request, cached_response, cache.get_detail, slug)
+    if response is not None:
+        return response
+
+    return await sync_fallback(sync_post_detail, request, slug=slug)
+
+
+# DRF handles CSRF itself. csrf_exempt() can't be used, it would wrap the
+# coroutine functions in a sync function.
+post_list.csrf_exempt = True
+post_detail.csrf_exempt = True
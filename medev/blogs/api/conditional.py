@@ -0,0 +1,37 @@
+"""
+Conditional GET support (ETag) for the post endpoints.
+
+ETags are computed from cheap metadata (timestamps, counts and cache
+versions) rather than from the rendered body, so a 304 can be returned
+before anything is serialized. That makes them weak: the same one covers
+every representation, compressed or not, JSON or browsable API.
+
+There's no Last-Modified. Neither the latest updated_at of a list nor the
+one of a post sees deletions or author edits, If-Modified-Since would get
+a 304 for content that changed.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def get_etag(*parts):
+    """
+    Returns a weak ETag, the digest of parts.
+    """
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return 'W/' + quote_etag(digest)
+
+
+def respond(request, etag, get_response):
+    """
+    Returns a 304 if the request's If-None-Match matches etag, otherwise
+    the response made by get_response(). Either way with the ETag header.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = get_response()
+
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+from ..search import search
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id).
+
+    The cursor holds the (created_at, id) pair of the last row on the page,
+    so every page is a single index range scan, no matter how deep it is.
+    `id` breaks ties between posts created in the same instant, which means
+    positions are always unique and no OFFSET is ever needed.
+    """
+    ordering = ('created_at', 'id')
+    page_size = settings.POSTS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.POSTS_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (reverse, current_position) = (False, None)
+        else:
+            (_offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by('-created_at', '-id')
+        else:
+            queryset = queryset.order_by('created_at', 'id')
+
+        if current_position is not None:
+            created_at, pk = self._parse_position(current_position)
+            lookup = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{lookup}': created_at}) |
+                Q(created_at=created_at, **{f'id__{lookup}': pk})
+            )
+
+        # Always fetch one extra row to know if there's a following page.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+
+        # An empty page links back to the cursor it was requested with.
+        self.next_position = self.previous_position = current_position
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        position = self.next_position
+        if self.page:
+            position = self._get_position_from_instance(
+                self.page[-1], self.ordering
+            )
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        position = self.previous_position
+        if self.page:
+            position = self._get_position_from_instance(
+                self.page[0], self.ordering
+            )
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            created_at, pk = instance['created_at'], instance['id']
+        else:
+            created_at, pk = instance.created_at, instance.id
+        return f'{created_at.isoformat()}|{pk}'
+
+    def _parse_position(self, position):
+        try:
+            created_at, pk = position.split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return created_at, pk
+
+
+class PostSearchPagination(PostCursorPagination):
+    """
+    Keyset pagination over the (rank, id) of full-text search hits.
+    Search results can only be paged forward.
+    """
+
+    def paginate_search(self, query, request):
+        """
+        Returns a page of SearchHits for query.
+        """
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        after = None
+        if self.cursor is not None:
+            after = self._parse_position(self.cursor.position)
+
+        hits = search(query, after=after, limit=self.page_size + 1)
+        self.page = hits[:self.page_size]
+        self.has_next = len(hits) > len(self.page)
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        rank, pk = self.page[-1].position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=f'{rank!r}|{pk}')
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def _parse_position(self, position):
+        try:
+            rank, pk = position.split('|')
+            return float(rank), int(pk)
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
@@ -1,19 +1,119 @@
 from re import I
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from ..models import Post
+from core.models import SlugCounter
+from core.profiling import ProfiledSerializerMixin
+
+from .. import cache
+from ..models import AuthorStats, Post, PostSlugRedirect, Tag
 from users.api.serializers import AuthorSerializer
 
-class PostSerializer(serializers.ModelSerializer):
+
+class PostListSerializer(serializers.ListSerializer):
+    """
+    Creates or updates many posts at once, in one transaction and
+    a constant number of queries per batch (see PostViewSet.bulk).
+    Model signals aren't sent, the cache is bumped here instead.
+    """
+
+    def create(self, validated_data):
+        author = self.context['request'].user
+        posts = [Post(author=author, **data) for data in validated_data]
+
+        with transaction.atomic():
+            slugs = SlugCounter.objects.allocate_many(
+                Post, [post.title for post in posts]
+            )
+            for post, slug in zip(posts, slugs):
+                post.slug = slug
+
+            Post.objects.bulk_create(posts)
+            AuthorStats.objects.reconcile([author.pk])
+
+        cache.bump_author(author.slug)
+        return posts
+
+    def update(self, instances, validated_data):
+        renamed = [
+            (post, data['title'])
+            for post, data in zip(instances, validated_data)
+            if 'title' in data and data['title'] != post.title
+        ]
+        now = timezone.now()
+
+        with transaction.atomic():
+            slugs = SlugCounter.objects.allocate_many(
+                Post, [title for _, title in renamed]
+            )
+
+            redirects = []
+            for (post, _), slug in zip(renamed, slugs):
+                if post.slug is not None:
+                    redirects.append(PostSlugRedirect(slug=post.slug, post=post))
+                post.slug = slug
+
+            for post, data in zip(instances, validated_data):
+                for attr, value in data.items():
+                    setattr(post, attr, value)
+                post.updated_at = now
+
+            Post.objects.bulk_update(
+                instances, ['title', 'content', 'slug', 'updated_at']
+            )
+            PostSlugRedirect.objects.bulk_create(redirects)
+
+        for post in instances:
+            cache.bump_post(post.previous_slug)
+            cache.bump_post(post.slug)
+            post._remember_slug()
+        cache.bump_author(self.context['request'].user.slug)
+
+        return instances
+
+
+class PostSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
 
+    profile_name = 'serialize-post'
+
     class Meta:
         model = Post
         fields = ('title', 'content', 'slug', 'author')
         read_only_fields = ('slug', 'author')
         lookup_fied = 'slug'
+        list_serializer_class = PostListSerializer
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
-        post = Post.objects.create(**validated_data)
+
+        with transaction.atomic():
+            post = Post.objects.create(**validated_data)
+            AuthorStats.objects.record_post(post)
+
         return post
+
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ('name', 'post_count')
+        read_only_fields = ('name', 'post_count')
+
+
+class PostTagsSerializer(serializers.Serializer):
+    tags = serializers.ListField(
+        child=serializers.SlugField(max_length=50),
+        allow_empty=False,
+        max_length=20
+    )
+
+    def validate_tags(self, value):
+        return sorted({tag.lower() for tag in value})
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuthorStats
+        fields = ('post_count', 'last_posted_at')
@@ -1,39 +1,474 @@
-from django.db.models import query
+import json
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db.models import query, Count, Max
 from django.db.models.base import Model
-from rest_framework.viewsets import ModelViewSet
+from django.db.models.deletion import Collector
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse, Http404, HttpResponsePermanentRedirect, StreamingHttpResponse
+)
+from django.shortcuts import get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.generics import RetrieveAPIView
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from core import compression, profiling
+from core.renderers import FastJSONRenderer
+from core.serializers import get_fast_representation
 
-from ..models import Post
-from .serializers import PostSerializer
+from .. import cache
+from ..models import AuthorStats, Post, PostSlugRedirect, Tag
+from . import conditional
+from .pagination import PostCursorPagination, PostSearchPagination
+from .serializers import (
+    AuthorStatsSerializer,
+    PostSerializer,
+    PostTagsSerializer,
+    TagSerializer
+)
 from .permissions import IsOwnerOrReadOnly
+from users.api.serializers import AuthorSerializer
+from users.models import UserSlugRedirect
+
+
+User = get_user_model()
 
 class PostViewSet(ModelViewSet):
-    queryset = Post.objects.all()
+    # The author's slug is needed to version the cached responses.
+    queryset = Post.objects.with_author('slug', *AuthorSerializer.Meta.fields)
     serializer_class = PostSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
+    pagination_class = PostCursorPagination
+    # Post responses hold no floats, see FastJSONRenderer.
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    throttle_scope = 'posts'
     lookup_field = 'slug'
 
     def get_queryset(self):
         """
         Filters the queryset by:
-            title - title, icontains (case insensitve, contains)\n
+            user - the author's slug.\n
             tag - tags, filters by tags, can filter by multiple tags,
             e.g. (\n
-                localhost:8000/api/articles?tags=python&tags=backend\n
-                Will return articles that has the tags 'python' and/or 'backend'.
+                localhost:8000/api/posts?tags=python&tags=backend\n
+                Will return posts that has the tags 'python' or 'backend',
+                add &match=all for posts that has both.
             )
+        Listing requires at least one of them.
         """
-        queryset = Post.objects.all()
+        queryset = self.queryset.all()
 
         user = self.request.query_params.get('user', None)
+        tags = self.request.query_params.getlist('tags')
+
+        if tags:
+            queryset = queryset.with_tags(
+                [tag.lower() for tag in tags],
+                match_all=self.request.query_params.get('match') == 'all'
+            )
 
         if user:
             queryset = queryset.filter(author__slug=user)
+
+        if user or tags:
             return queryset
 
-        if self.action in ['retrieve', 'update', 'partial_update', 'destroy']:
+        if self.action in ['retrieve', 'update', 'partial_update', 'destroy', 'tags']:
             return queryset
             
         raise ValidationError(detail={'error':'must specify a user.'})
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            AuthorStats.objects.record_delete(instance)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Cached, conditional list of a user's posts.
+
+        The ETag covers the post count, the latest updated_at and the author
+        version, so it changes on any create, update, delete or author edit.
+
+        Tag filtered lists aren't versioned, so they're neither.
+
+        The cache holds the rendered and compressed JSON, see cached_list().
+        """
+        author_slug = request.query_params.get('user', None)
+        if not author_slug or 'tags' in request.query_params:
+            return self.list_posts(request, *args, **kwargs)
+
+        url = request.build_absolute_uri()
+        entry = cache.get_list(author_slug, url)
+        if entry is not None:
+            return conditional.respond(
+                request,
+                entry['etag'],
+                lambda: self.cached_list(request, entry)
+            )
+
+        version = cache.author_version(author_slug)
+        stats = Post.objects.filter(author__slug=author_slug).aggregate(
+            count=Count('id'),
+            updated_at=Max('updated_at')
+        )
+        if not stats['count']:
+            # The author may have been renamed.
+            new_slug = UserSlugRedirect.objects.filter(
+                slug=author_slug
+            ).values_list('user__slug', flat=True).first()
+            if new_slug is not None:
+                params = request.GET.copy()
+                params['user'] = new_slug
+                return HttpResponsePermanentRedirect(
+                    f'{request.path}?{params.urlencode()}'
+                )
+
+        etag = conditional.get_etag(version, stats['count'], stats['updated_at'])
+
+        def get_response():
+            response = self.list_posts(request, *args, **kwargs)
+            entry = cache.set_list(
+                author_slug, url, version,
+                FastJSONRenderer().render(response.data), etag,
+                timeout=self.get_cache_timeout()
+            )
+            return self.cached_list(request, entry)
+
+        return conditional.respond(request, etag, get_response)
+
+    def cached_list(self, request, entry):
+        """
+        Returns the response of a list cache entry. JSON is sent as it was
+        cached, already compressed if the client accepts it, anything
+        else (the browsable API, indented JSON) is rendered from it.
+        """
+        renderer = request.accepted_renderer
+        if (
+            isinstance(renderer, JSONRenderer) and
+            not renderer.get_indent(request.accepted_media_type, {})
+        ):
+            return compression.encoded_response(
+                request, entry['content'], entry['encoded'], renderer.media_type
+            )
+        return Response(json.loads(entry['content']))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Cached, conditional post detail. The post is loaded either way
+        (unless cached), but it's only serialized if the client's copy is stale.
+        Slugs the post had before its title changed redirect to the current one.
+        """
+        slug = kwargs[self.lookup_field]
+        entry = cache.get_detail(slug)
+        if entry is not None:
+            return conditional.respond(
+                request,
+                entry['etag'],
+                lambda: Response(entry['data'])
+            )
+
+        post_version = cache.post_version(slug)
+        try:
+            instance = self.get_object()
+        except Http404:
+            new_slug = PostSlugRedirect.objects.filter(
+                slug=slug
+            ).values_list('post__slug', flat=True).first()
+            if new_slug is None:
+                raise
+            return HttpResponsePermanentRedirect(
+                reverse('post-detail', kwargs={'slug': new_slug}, request=request)
+            )
+
+        author_slug = instance.author.slug
+        versions = (post_version, cache.author_version(author_slug))
+        etag = conditional.get_etag(*versions, instance.updated_at)
+
+        def get_response():
+            data = self.represent(instance)
+            cache.set_detail(
+                slug, author_slug, versions, data, etag,
+                timeout=self.get_cache_timeout()
+            )
+            return Response(data)
+
+        return conditional.respond(request, etag, get_response)
+
+    def get_fast_representation(self):
+        """
+        Returns the FastRepresentation of read-only post responses,
+        or None to serialize them with DRF.
+        """
+        if not settings.POSTS_FAST_SERIALIZATION:
+            return None
+        return get_fast_representation(self.get_serializer_class())
+
+    def represent(self, instance):
+        """
+        Returns the read-only representation of a post.
+        """
+        fast = self.get_fast_representation()
+        if fast is None:
+            return self.get_serializer(instance).data
+
+        with profiling.timed(PostSerializer.profile_name):
+            return fast.from_instance(instance)
+
+    def list_posts(self, request, *args, **kwargs):
+        """
+        The uncached post list. On the fast path, pages are loaded as
+        .values() rows and never turned into model instances.
+        """
+        fast = self.get_fast_representation()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = self.filter_queryset(self.get_queryset()).values(
+            *fast.lookups, 'created_at', 'id'
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            rows = page
+
+        with profiling.timed(PostSerializer.profile_name):
+            data = [fast.from_row(row) for row in rows]
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def get_cache_timeout(self):
+        """
+        Responses read from a replica may predate the versions they're
+        cached under, those are only kept for as long as it may lag.
+        """
+        if router.db_for_read(Post) != DEFAULT_DB_ALIAS:
+            return settings.DATABASE_STICKY_SECONDS
+        return settings.POSTS_CACHE_TIMEOUT
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Full-text search over post titles and content, best match first.
+        e.g. localhost:8000/api/posts/search/?q=django+orm
+        Every result has the matched terms of its title and a snippet of
+        its content wrapped in <mark> tags, under 'highlights'.
+        """
+        terms = request.query_params.get('q', '')
+        if not terms.strip():
+            raise ValidationError(detail={'error': 'must specify a search query.'})
+
+        paginator = PostSearchPagination()
+        hits = paginator.paginate_search(terms, request)
+
+        posts = self.queryset.in_bulk([hit.post_id for hit in hits])
+
+        results = []
+        for hit in hits:
+            # The post may have been deleted since it was matched.
+            if hit.post_id not in posts:
+                continue
+
+            data = self.represent(posts[hit.post_id])
+            data['highlights'] = {'title': hit.title, 'content': hit.snippet}
+            results.append(data)
+
+        return paginator.get_paginated_response(results)
+
+    @action(detail=False, throttle_scope='posts_bulk')
+    def export(self, request):
+        """
+        Streams every post of a user as newline-delimited JSON, oldest first,
+        with the same fields as the other endpoints.
+        e.g. localhost:8000/api/posts/export/?user=john
+        Rows are fetched settings.POSTS_EXPORT_CHUNK_SIZE at a time (from a
+        server-side cursor where the database has them) and written out as
+        they're serialized, so memory use doesn't grow with the post count.
+
+        Under ASGI, Django iterates streamed bodies on the event loop, where
+        queries can't run. There the export is written out before it's sent,
+        to a temporary file once it's over settings.POSTS_EXPORT_SPOOL_SIZE.
+        """
+        author_slug = request.query_params.get('user', None)
+        if not author_slug:
+            raise ValidationError(detail={'error': 'must specify a user.'})
+
+        get_object_or_404(User.objects.only('pk'), slug=author_slug)
+
+        posts = self.queryset.filter(author__slug=author_slug).order_by(
+            'created_at', 'id'
+        )
+
+        fast = self.get_fast_representation()
+        if fast is None:
+            represent = self.get_serializer().to_representation
+        else:
+            posts = posts.values(*fast.lookups)
+            represent = fast.from_row
+
+        posts = posts.iterator(chunk_size=settings.POSTS_EXPORT_CHUNK_SIZE)
+        renderer = FastJSONRenderer()
+
+        def lines():
+            for post in posts:
+                yield renderer.render(represent(post)) + b'\n'
+
+        if isinstance(request._request, ASGIRequest):
+            body = tempfile.SpooledTemporaryFile(max_size=settings.POSTS_EXPORT_SPOOL_SIZE)
+            body.writelines(lines())
+            body.seek(0)
+            response = FileResponse(body, content_type='application/x-ndjson')
+        else:
+            response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{author_slug}-posts.ndjson"'
+        )
+        return response
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], throttle_scope='posts_bulk')
+    def bulk(self, request):
+        """
+        Creates, updates or deletes up to settings.POSTS_BULK_MAX_SIZE posts
+        in one transaction, e.g.\n
+            POST [{"title": ..., "content": ...}, ...]\n
+            PATCH [{"slug": ..., "title": ...}, ...]\n
+            DELETE ["slug", ...]\n
+        Nothing is written unless every item is valid (and the user's),
+        otherwise the response is a list of every item's errors,
+        empty for the valid ones.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(detail={'error': 'expected a list.'})
+        if len(items) > settings.POSTS_BULK_MAX_SIZE:
+            raise ValidationError(detail={
+                'error': f'at most {settings.POSTS_BULK_MAX_SIZE} posts at once.'
+            })
+
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=items, many=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        if request.method == 'DELETE':
+            posts, errors = self.get_bulk_posts(items)
+            if any(errors):
+                raise ValidationError(detail=errors)
+
+            self.perform_bulk_destroy(posts)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        posts, errors = self.get_bulk_posts([
+            item.get('slug') if isinstance(item, dict) else None
+            for item in items
+        ])
+        serializer = self.get_serializer(posts, data=items, many=True, partial=True)
+        if not serializer.is_valid():
+            errors = [
+                {**item_errors, **lookup_errors}
+                for item_errors, lookup_errors in zip(serializer.errors, errors)
+            ]
+        if any(errors):
+            raise ValidationError(detail=errors)
+
+        serializer.save()
+        return Response(serializer.data)
+
+    def get_bulk_posts(self, slugs):
+        """
+        Returns the posts with the given slugs, in one query per batch,
+        and the errors of every slug (empty if the user may change the post).
+        """
+        posts = self.queryset.in_bulk(
+            {slug for slug in slugs if isinstance(slug, str)},
+            field_name='slug'
+        )
+
+        found, errors, seen = [], [], set()
+        for slug in slugs:
+            post = posts.get(slug) if isinstance(slug, str) else None
+
+            if post is None:
+                errors.append({'slug': ['Not found.']})
+            elif slug in seen:
+                errors.append({'slug': ['Given more than once.']})
+            elif not all(
+                permission.has_object_permission(self.request, self, post)
+                for permission in self.get_permissions()
+            ):
+                errors.append({'slug': ['You do not have permission to change this post.']})
+            else:
+                errors.append({})
+
+            found.append(post)
+            if post is not None:
+                seen.add(slug)
+
+        return found, errors
+
+    def perform_bulk_destroy(self, posts):
+        using = router.db_for_write(Post)
+        with transaction.atomic(using=using):
+            # The same deletion Model.delete() does, for every post at once.
+            # The posts have their authors loaded, so the signals
+            # bumping the cache don't query them one by one.
+            collector = Collector(using=using)
+            collector.collect(posts)
+            collector.delete()
+            AuthorStats.objects.reconcile({post.author_id for post in posts})
+
+    @action(detail=True, methods=['post'], serializer_class=PostTagsSerializer)
+    def tags(self, request, slug=None):
+        """
+        Adds the given tags to the post, creating the missing ones.
+        e.g. {"tags": ["python", "backend"]}
+        Returns all of the post's tags.
+        """
+        post = self.get_object()
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        Tag.objects.assign([post], serializer.validated_data['tags'])
+
+        return Response(TagSerializer(post.tags.all(), many=True).data)
+
+
+class TagViewSet(ReadOnlyModelViewSet):
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+    pagination_class = PostCursorPagination
+    throttle_scope = 'posts'
+    lookup_field = 'name'
+
+
+class AuthorStatsView(RetrieveAPIView):
+    """
+    Post count and last post date of a user, for their profile page.
+    """
+    serializer_class = AuthorStatsSerializer
+    throttle_scope = 'posts'
+
+    def get_object(self):
+        stats = AuthorStats.objects.filter(author__slug=self.kwargs['slug']).first()
+        if stats is not None:
+            return stats
+
+        # Never computed, e.g. the user hasn't posted since stats were added.
+        # In a transaction, to read them back from the primary.
+        author = get_object_or_404(User.objects.only('pk'), slug=self.kwargs['slug'])
+        with transaction.atomic():
+            AuthorStats.objects.reconcile([author.pk])
+            return AuthorStats.objects.get(author=author)
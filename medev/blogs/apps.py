@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BlogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blogs'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .triggers import restore_after_migrate
+
+        post_migrate.connect(restore_after_migrate, sender=self)
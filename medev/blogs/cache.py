@@ -0,0 +1,181 @@
+"""
+Versioned response cache for the post read endpoints.
+
+Every author and every post has a version key. Cached responses remember
+the versions they were rendered at and are only served while those versions
+are still current, so invalidating is just bumping a version (see signals.py).
+Stale entries are never deleted, they're overwritten or expire on their own.
+
+A response is stored with the versions read *before* the database was
+queried, so a write racing the query leaves the entry stale from the start.
+The one exception is the author version of a detail response, the author
+isn't known until the post is loaded, so a rename racing that read can be
+served until the entry times out.
+
+Writes that bypass the model signals (QuerySet.update, bulk_create, ...)
+must call bump_author/bump_post themselves.
+
+A response rendered from a lagging read replica can be older than the
+versions it's stored under, so callers store those for no longer than
+the replication lag (see PostViewSet.get_cache_timeout).
+
+List entries hold the rendered JSON, and copies of it compressed with
+settings.POSTS_FEED_COMPRESSION_LEVELS, so hits are served as they are.
+Those levels can be higher than the ones responses are compressed with on
+the fly, the cost is paid once per entry rather than once per request.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import compression
+from core.metrics import CACHE_REQUESTS
+
+
+_list_hits = CACHE_REQUESTS.labels('post_list', 'hit')
+_list_misses = CACHE_REQUESTS.labels('post_list', 'miss')
+_detail_hits = CACHE_REQUESTS.labels('post_detail', 'hit')
+_detail_misses = CACHE_REQUESTS.labels('post_detail', 'miss')
+
+
+def get_cache():
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def author_version_key(author_slug):
+    return f'posts:version:author:{author_slug}'
+
+
+def post_version_key(post_slug):
+    return f'posts:version:post:{post_slug}'
+
+
+def list_key(author_slug, url):
+    url_hash = hashlib.md5(url.encode()).hexdigest()
+    return f'posts:list:{author_slug}:{url_hash}'
+
+
+def detail_key(post_slug):
+    return f'posts:detail:{post_slug}'
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key is missing (never set, expired or evicted). Start from a
+        # value that can't collide with a version some stale entry remembers.
+        cache.set(key, time.time_ns(), timeout=settings.POSTS_CACHE_TIMEOUT)
+
+
+def _current_version(key):
+    """
+    Returns the version stored under key, initializing it if it's missing.
+
+    Versions expire like the entries stored under them, or there'd be one
+    left behind for every slug anyone ever asked for. An entry that outlives
+    its version is just a miss, the version is recreated with a new value.
+    """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=settings.POSTS_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_author(author_slug):
+    if author_slug:
+        _bump(author_version_key(author_slug))
+
+
+def bump_post(post_slug):
+    if post_slug:
+        _bump(post_version_key(post_slug))
+
+
+def get_list(author_slug, url):
+    """
+    Returns the cached list entry, a dict of the rendered 'content', its
+    'encoded' versions (see core.compression.precompress) and the response
+    'etag' (see api/conditional.py), or None. One cache round-trip.
+    """
+    key = list_key(author_slug, url)
+    version_key = author_version_key(author_slug)
+    values = get_cache().get_many([key, version_key])
+
+    entry = values.get(key)
+    if entry is None or entry['version'] != values.get(version_key):
+        _list_misses.inc()
+        return None
+    _list_hits.inc()
+    return entry
+
+
+def set_list(author_slug, url, version, content, etag, timeout=None):
+    """
+    Caches the rendered list content and returns the entry.
+    """
+    entry = {
+        'version': version,
+        'content': content,
+        'encoded': compression.precompress(
+            content, settings.POSTS_FEED_COMPRESSION_LEVELS
+        ),
+        'etag': etag
+    }
+    get_cache().set(
+        list_key(author_slug, url),
+        entry,
+        timeout=timeout or settings.POSTS_CACHE_TIMEOUT
+    )
+    return entry
+
+
+def author_version(author_slug):
+    return _current_version(author_version_key(author_slug))
+
+
+def post_version(post_slug):
+    return _current_version(post_version_key(post_slug))
+
+
+def get_detail(post_slug):
+    """
+    Returns the cached detail entry (like get_list), or None.
+    Two cache round-trips, the entry and then both of its versions.
+    """
+    entry = get_cache().get(detail_key(post_slug))
+    if entry is None:
+        _detail_misses.inc()
+        return None
+
+    post_key = post_version_key(post_slug)
+    author_key = author_version_key(entry['author'])
+    versions = get_cache().get_many([post_key, author_key])
+
+    if (
+        entry['post_version'] != versions.get(post_key) or
+        entry['author_version'] != versions.get(author_key)
+    ):
+        _detail_misses.inc()
+        return None
+    _detail_hits.inc()
+    return entry
+
+
+def set_detail(post_slug, author_slug, versions, data, etag, timeout=None):
+    get_cache().set(
+        detail_key(post_slug),
+        {
+            'author': author_slug,
+            'post_version': versions[0],
+            'author_version': versions[1],
+            'data': data,
+            'etag': etag
+        },
+        timeout=timeout or settings.POSTS_CACHE_TIMEOUT
+    )
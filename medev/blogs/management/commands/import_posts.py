@@ -0,0 +1,225 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blogs import cache
+from blogs.models import AuthorStats, Post
+from core.models import SlugCounter
+
+
+User = get_user_model()
+
+FORMATS = {
+    'jsonl': 'jsonl',
+    'ndjson': 'jsonl',
+    'csv': 'csv',
+}
+
+
+def read_jsonl(file):
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def read_csv(file):
+    # Post contents easily outgrow the default field size limit. It's
+    # process wide, so it's put back once the file is read.
+    previous_limit = csv.field_size_limit(sys.maxsize)
+    try:
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    finally:
+        csv.field_size_limit(previous_limit)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def get_error(record):
+    """
+    Returns why the record can't be imported, or None.
+    """
+    if not isinstance(record, dict):
+        return 'not a JSON object.'
+
+    for field in ('author', 'title', 'content'):
+        if not isinstance(record.get(field), str) or not record[field].strip():
+            return f'missing {field}.'
+
+    if len(record['author']) > User._meta.get_field('username').max_length:
+        return 'author is too long.'
+    if len(record['title']) > Post._meta.get_field('title').max_length:
+        return 'title is too long.'
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports posts from a JSONL or CSV file, creating their missing authors. '
+        'Every record has an author (username), title and content, records '
+        'of new authors also need an email (first_name, last_name and password '
+        'are optional, authors without a password can\'t log in until they reset it).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The file to import.')
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Defaults to the file extension.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per INSERT.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Records per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or FORMATS.get(path.suffix.lstrip('.').lower())
+        if file_format is None:
+            raise CommandError(f"Can't tell the format of {path}, pass --format.")
+
+        self.batch_size = options['batch_size']
+        self.imported = self.users_created = self.skipped = 0
+        started = time.monotonic()
+
+        try:
+            file = path.open(newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Can't read {path}: {e}")
+
+        with file:
+            records = READERS[file_format](file)
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+
+                self.import_chunk(chunk)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{self.imported} posts imported, {self.users_created} users '
+                    f'created, {self.skipped} skipped '
+                    f'({self.imported / max(elapsed, 1e-9):.0f} posts/s)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} posts and created {self.users_created} '
+            f'users in {time.monotonic() - started:.1f}s, '
+            f'{self.skipped} records were skipped.'
+        ))
+
+    def skip(self, line_number, error):
+        self.skipped += 1
+        self.stderr.write(f'Skipped line {line_number}: {error}')
+
+    def import_chunk(self, chunk):
+        records = []
+        for line_number, record in chunk:
+            error = get_error(record)
+            if error is None:
+                records.append((line_number, record))
+            else:
+                self.skip(line_number, error)
+
+        with transaction.atomic():
+            authors = self.get_or_create_authors(records)
+
+            posts = []
+            for line_number, record in records:
+                author = authors.get(record['author'])
+                if author is None:
+                    self.skip(line_number, 'new author without a (free) email.')
+                    continue
+
+                posts.append(Post(
+                    author=author,
+                    title=record['title'],
+                    content=record['content']
+                ))
+
+            slugs = SlugCounter.objects.allocate_many(
+                Post, [post.title for post in posts]
+            )
+            for post, slug in zip(posts, slugs):
+                post.slug = slug
+
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+            AuthorStats.objects.reconcile({post.author_id for post in posts})
+
+        # bulk_create doesn't send the signals that invalidate the cache.
+        for slug in {post.author.slug for post in posts}:
+            cache.bump_author(slug)
+
+        self.imported += len(posts)
+
+    def get_or_create_authors(self, records):
+        """
+        Returns {username: user} of every author in records that exists
+        or could be created, in a constant number of queries.
+        """
+        usernames = {record['author'] for _, record in records}
+        authors = {
+            user.username: user
+            for user in User.objects.only('pk', 'username', 'slug').in_bulk(
+                usernames, field_name='username'
+            ).values()
+        }
+
+        new_users, passwords = {}, {}
+        for _, record in records:
+            username = record['author']
+            email = record.get('email')
+            if username in authors or username in new_users or not email:
+                continue
+
+            new_users[username] = User(
+                username=username,
+                email=email,
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or ''
+            )
+            passwords[username] = record.get('password') or None
+
+        # Emails are unique too, leave out the ones that are taken.
+        emails = {
+            User.objects.normalize_email(user.email): user
+            for user in new_users.values()
+        }
+        taken = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        new_users = [user for email, user in emails.items() if email not in taken]
+
+        User.objects.bulk_create_users(
+            new_users,
+            passwords=[passwords.get(user.username) for user in new_users],
+            batch_size=self.batch_size
+        )
+        self.users_created += len(new_users)
+
+        authors.update((user.username, user) for user in new_users)
+        return authors
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blogs.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized post stats of every author.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Authors to reconcile per batch.'
+        )
+
+    def handle(self, *args, **options):
+        fixed = AuthorStats.objects.reconcile(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled author stats, {fixed} were out of date.'
+        ))
@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.db import models, router
+from django.db.models.functions import Greatest
+
+
+class PostQuerySet(models.QuerySet):
+    def with_tags(self, names, match_all=False):
+        """
+        Filters to posts tagged with any (or, with match_all, every one)
+        of the given tag names. Only the (tag, post) index is read.
+        """
+        names = set(names)
+        post_ids = self.model.tags.through.objects.filter(tag__name__in=names)
+
+        if match_all:
+            post_ids = post_ids.values('post').annotate(
+                matched=models.Count('tag')
+            ).filter(matched=len(names))
+
+        return self.filter(id__in=post_ids.values('post'))
+
+    def with_author(self, *fields):
+        """
+        Joins in the author, loading only the given author fields
+        (and the primary key) next to every column of the post.
+        """
+        post_fields = [
+            field.name for field in self.model._meta.concrete_fields
+        ]
+
+        return self.select_related('author').only(
+            *post_fields,
+            *(f'author__{field}' for field in fields)
+        )
+
+
+class TagQuerySet(models.QuerySet):
+    def get_or_create_many(self, names):
+        """
+        Returns the tags with the given names, creating the missing ones.
+        Two statements, however many names there are.
+        """
+        self.bulk_create(
+            [self.model(name=name) for name in names],
+            ignore_conflicts=True
+        )
+        return list(self.filter(name__in=names))
+
+    def assign(self, posts, names):
+        """
+        Tags every post with every name in one INSERT, pairs that
+        already exist are skipped. Returns the tags.
+        """
+        tags = self.get_or_create_many(names)
+
+        through = self.model.posts.through
+        through.objects.bulk_create(
+            [through(post=post, tag=tag) for post in posts for tag in tags],
+            ignore_conflicts=True
+        )
+        return tags
+
+
+class AuthorStatsQuerySet(models.QuerySet):
+    def _latest_post(self, author_id):
+        from .models import Post
+
+        return models.Subquery(
+            Post.objects.filter(author_id=author_id)
+            .order_by('-created_at')
+            .values('created_at')[:1]
+        )
+
+    def record_post(self, post):
+        """
+        Counts a newly created post, in a single UPDATE.
+        """
+        updated = self.filter(author_id=post.author_id).update(
+            post_count=models.F('post_count') + 1,
+            last_posted_at=post.created_at
+        )
+        if not updated:
+            self.reconcile([post.author_id])
+
+    def record_delete(self, post):
+        """
+        Uncounts a deleted post, in a single UPDATE. Must be called
+        after the post is deleted, so that it's not the latest post anymore.
+        """
+        updated = self.filter(author_id=post.author_id).update(
+            post_count=Greatest(models.F('post_count') - 1, 0),
+            last_posted_at=self._latest_post(post.author_id)
+        )
+        if not updated:
+            self.reconcile([post.author_id])
+
+    def reconcile(self, author_ids=None, batch_size=1000):
+        """
+        Recomputes the stats of the given authors (default: everyone)
+        from their posts. Returns how many were out of date.
+
+        Reads from the database the stats are written to, a lagging
+        replica would make them out of date again.
+        """
+        db = router.db_for_write(self.model)
+        authors = get_user_model().objects.using(db).order_by('pk')
+        if author_ids is not None:
+            authors = authors.filter(pk__in=author_ids)
+
+        authors = authors.annotate(
+            actual_count=models.Count('posts'),
+            actual_last_posted_at=models.Max('posts__created_at')
+        ).values_list('pk', 'actual_count', 'actual_last_posted_at')
+
+        fixed = 0
+        batch = []
+
+        for row in authors.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) == batch_size:
+                fixed += self._reconcile_batch(db, batch)
+                batch = []
+
+        if batch:
+            fixed += self._reconcile_batch(db, batch)
+
+        return fixed
+
+    def _reconcile_batch(self, db, rows):
+        existing = self.using(db).in_bulk([pk for pk, _, _ in rows])
+        missing, stale = [], []
+
+        for pk, count, last_posted_at in rows:
+            stats = existing.get(pk)
+
+            if stats is None:
+                missing.append(self.model(
+                    author_id=pk,
+                    post_count=count,
+                    last_posted_at=last_posted_at
+                ))
+            elif (stats.post_count, stats.last_posted_at) != (count, last_posted_at):
+                stats.post_count = count
+                stats.last_posted_at = last_posted_at
+                stale.append(stats)
+
+        self.using(db).bulk_create(missing, ignore_conflicts=True)
+        self.using(db).bulk_update(stale, ['post_count', 'last_posted_at'])
+
+        return len(missing) + len(stale)
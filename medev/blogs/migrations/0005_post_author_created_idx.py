@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0004_remove_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='blogs_post_author_created_idx'),
+        ),
+    ]
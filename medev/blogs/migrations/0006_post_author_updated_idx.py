@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0005_post_author_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'updated_at'], name='blogs_post_author_updated_idx'),
+        ),
+    ]
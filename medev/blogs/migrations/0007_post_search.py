@@ -0,0 +1,92 @@
+from django.db import migrations
+
+
+# SQLite: an external content FTS5 table over blogs_post, kept in sync by
+# triggers. The table only stores the index, the text stays in blogs_post.
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE blogs_post_fts USING fts5(
+        title,
+        content,
+        content='blogs_post',
+        content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER blogs_post_fts_insert AFTER INSERT ON blogs_post BEGIN
+        INSERT INTO blogs_post_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER blogs_post_fts_delete AFTER DELETE ON blogs_post BEGIN
+        INSERT INTO blogs_post_fts(blogs_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER blogs_post_fts_update AFTER UPDATE OF title, content ON blogs_post BEGIN
+        INSERT INTO blogs_post_fts(blogs_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO blogs_post_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO blogs_post_fts(blogs_post_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS blogs_post_fts_update',
+    'DROP TRIGGER IF EXISTS blogs_post_fts_delete',
+    'DROP TRIGGER IF EXISTS blogs_post_fts_insert',
+    'DROP TABLE IF EXISTS blogs_post_fts',
+]
+
+# PostgreSQL: a generated, weighted tsvector column with a GIN index.
+# Being generated, the database keeps it in sync on its own (PostgreSQL 12+).
+POSTGRESQL_FORWARDS = [
+    """
+    ALTER TABLE blogs_post ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX blogs_post_search_vector_idx
+    ON blogs_post USING GIN (search_vector)
+    """,
+]
+
+POSTGRESQL_BACKWARDS = [
+    'DROP INDEX IF EXISTS blogs_post_search_vector_idx',
+    'ALTER TABLE blogs_post DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0006_post_author_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({
+                'sqlite': SQLITE_FORWARDS,
+                'postgresql': POSTGRESQL_FORWARDS
+            }),
+            run({
+                'sqlite': SQLITE_BACKWARDS,
+                'postgresql': POSTGRESQL_BACKWARDS
+            })
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Keep blogs_tag.post_count current, one indexed UPDATE per inserted or
+# deleted row, including INSERT OR IGNORE/ON CONFLICT and cascading deletes.
+SQLITE_FORWARDS = [
+    """
+    CREATE TRIGGER blogs_posttag_count_insert AFTER INSERT ON blogs_posttag BEGIN
+        UPDATE blogs_tag SET post_count = post_count + 1 WHERE id = new.tag_id;
+    END
+    """,
+    """
+    CREATE TRIGGER blogs_posttag_count_delete AFTER DELETE ON blogs_posttag BEGIN
+        UPDATE blogs_tag SET post_count = post_count - 1 WHERE id = old.tag_id;
+    END
+    """,
+]
+
+SQLITE_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS blogs_posttag_count_delete',
+    'DROP TRIGGER IF EXISTS blogs_posttag_count_insert',
+]
+
+POSTGRESQL_FORWARDS = [
+    """
+    CREATE FUNCTION blogs_posttag_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE blogs_tag SET post_count = post_count + 1 WHERE id = NEW.tag_id;
+            RETURN NEW;
+        END IF;
+        UPDATE blogs_tag SET post_count = post_count - 1 WHERE id = OLD.tag_id;
+        RETURN OLD;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER blogs_posttag_count AFTER INSERT OR DELETE ON blogs_posttag
+    FOR EACH ROW EXECUTE FUNCTION blogs_posttag_count()
+    """,
+]
+
+POSTGRESQL_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS blogs_posttag_count ON blogs_posttag',
+    'DROP FUNCTION IF EXISTS blogs_posttag_count()',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0007_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.SlugField(unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='blogs.post')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='blogs.tag')),
+            ],
+        ),
+        # The field adds no column, but on SQLite AddField would still remake
+        # blogs_post and drop the full-text search triggers from 0007.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='post',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='posts', through='blogs.PostTag', to='blogs.Tag'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['post', 'tag'], name='blogs_posttag_post_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='blogs_posttag_tag_post_uniq'),
+        ),
+        migrations.RunPython(
+            run({
+                'sqlite': SQLITE_FORWARDS,
+                'postgresql': POSTGRESQL_FORWARDS
+            }),
+            run({
+                'sqlite': SQLITE_BACKWARDS,
+                'postgresql': POSTGRESQL_BACKWARDS
+            })
+        ),
+    ]
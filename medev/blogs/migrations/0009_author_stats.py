@@ -0,0 +1,23 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_date_joined'),
+        ('blogs', '0008_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to='users.user')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_posted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
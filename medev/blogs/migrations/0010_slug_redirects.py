@@ -0,0 +1,34 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0009_author_stats'),
+    ]
+
+    operations = [
+        # The column stays the same (a unique, nullable varchar(50)), only the
+        # field class changes. Altering it would remake the table on SQLite,
+        # dropping the full-text search triggers from 0007.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='post',
+                    name='slug',
+                    field=models.SlugField(default=None, editable=False, null=True, unique=True),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostSlugRedirect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slug_redirects', to='blogs.post')),
+            ],
+        ),
+    ]
@@ -1,31 +1,127 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from autoslug import AutoSlugField
+from core.models import BaseModel, SluggedModel
 
-from core.models import BaseModel
+from .managers import AuthorStatsQuerySet, PostQuerySet, TagQuerySet
 
 
 User = get_user_model()
 
 
-class Post(BaseModel):
+class Tag(BaseModel):
+    name = models.SlugField(max_length=50, unique=True)
+
+    # Kept current by database triggers on blogs_posttag (migration 0008),
+    # so it's correct for bulk inserts and cascading deletes too.
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TagQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+
+class Post(SluggedModel, BaseModel):
     title = models.CharField(max_length=50, blank=False)
     content = models.TextField(blank=False)
 
-    slug = AutoSlugField(
+    slug = models.SlugField(
         null=True,
         default=None,
         unique=True,
-        populate_from='title',
-        always_update=True
+        editable=False
     )
 
+    slug_source = 'title'
+    slug_redirect_model = 'blogs.PostSlugRedirect'
+
     author = models.ForeignKey(
         User,
         related_name='posts',
         on_delete=models.CASCADE
     )
 
+    tags = models.ManyToManyField(
+        Tag,
+        through='PostTag',
+        related_name='posts',
+        blank=True
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of an author's posts.
+            models.Index(
+                fields=['author', 'created_at', 'id'],
+                name='blogs_post_author_created_idx'
+            ),
+            # Backs the MAX(updated_at) of an author's posts used for ETags.
+            models.Index(
+                fields=['author', 'updated_at'],
+                name='blogs_post_author_updated_idx'
+            )
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class PostTag(models.Model):
+    # Both lookup directions are covered by a composite index whose
+    # prefix is the column filtered on, so neither needs one of its own.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, db_index=False)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post'],
+                name='blogs_posttag_tag_post_uniq'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['post', 'tag'], name='blogs_posttag_post_tag_idx')
+        ]
+
+
+class AuthorStats(models.Model):
+    """
+    Denormalized post stats of an author, for profile pages.
+
+    Kept current by PostSerializer.create and PostViewSet.destroy, other
+    writes (admin, bulk imports, ...) are picked up by the
+    reconcile_author_stats command. A side table rather than User columns,
+    so saving a stale User instance can't overwrite the counters.
+    """
+    author = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='post_stats',
+        on_delete=models.CASCADE
+    )
+
+    post_count = models.PositiveIntegerField(default=0)
+    last_posted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AuthorStatsQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.author_id}: {self.post_count}'
+
+
+class PostSlugRedirect(models.Model):
+    """
+    A slug the post had before its title changed.
+    """
+    slug = models.SlugField(unique=True)
+    post = models.ForeignKey(
+        Post,
+        related_name='slug_redirects',
+        on_delete=models.CASCADE
+    )
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.slug} -> {self.post_id}'
@@ -0,0 +1,122 @@
+"""
+Ranked full-text search over post titles and content.
+
+SQLite uses the blogs_post_fts FTS5 table, kept in sync by triggers (see
+triggers.py), PostgreSQL the generated blogs_post.search_vector column
+(both created in migration 0007).
+
+Results are keyset paginated on (rank, id), the position of the last hit
+is handed back to the caller to continue from.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+
+
+# Highlighted terms are wrapped in these before the text is HTML escaped,
+# afterwards they're swapped for <mark> tags.
+START_SEL = '\x02'
+STOP_SEL = '\x03'
+
+SNIPPET_WORDS = 32
+
+WORD_RE = re.compile(r'\w+')
+
+
+class SearchHit:
+    def __init__(self, post_id, rank, title, snippet):
+        self.post_id = post_id
+        self.rank = rank
+        self.title = mark(title)
+        self.snippet = mark(snippet)
+
+    @property
+    def position(self):
+        return (self.rank, self.post_id)
+
+
+def mark(text):
+    text = escape(text)
+    return text.replace(START_SEL, '<mark>').replace(STOP_SEL, '</mark>')
+
+
+def search(query, after=None, limit=20):
+    """
+    Returns up to limit SearchHits for query, best match first,
+    starting after the (rank, id) position given in after.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return []
+
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(query, after, limit)
+    return _search_sqlite(words, after, limit)
+
+
+def _search_sqlite(words, after, limit):
+    # Every word must match, the last one may be a prefix (search-as-you-type).
+    # Quoting keeps user input from being parsed as FTS5 query syntax.
+    match = ' '.join(f'"{word}"' for word in words) + '*'
+
+    # The rank column is bm25(), which is better the lower it is.
+    # Titles weigh 10x the content.
+    sql = """
+        SELECT
+            rowid,
+            rank,
+            highlight(blogs_post_fts, 0, %s, %s),
+            snippet(blogs_post_fts, 1, %s, %s, '...', %s)
+        FROM blogs_post_fts
+        WHERE blogs_post_fts MATCH %s AND rank MATCH 'bm25(10.0, 1.0)'
+    """
+    params = [START_SEL, STOP_SEL, START_SEL, STOP_SEL, SNIPPET_WORDS, match]
+
+    if after is not None:
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [after[0], after[0], after[1]]
+
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            SearchHit(post_id, rank, title, snippet)
+            for post_id, rank, title, snippet in cursor.fetchall()
+        ]
+
+
+def _search_postgresql(query, after, limit):
+    options = (
+        f'StartSel={START_SEL}, StopSel={STOP_SEL}, '
+        f'MaxWords={SNIPPET_WORDS}, MinWords=8'
+    )
+
+    # ts_rank_cd() is better the higher it is, negate it so that both
+    # backends share the same ascending (rank, id) ordering.
+    sql = """
+        SELECT id, rank, ts_headline('english', title, q, 'HighlightAll=true, ' || %s),
+               ts_headline('english', content, q, %s)
+        FROM (
+            SELECT id, title, content, q, -ts_rank_cd(search_vector, q) AS rank
+            FROM blogs_post, websearch_to_tsquery('english', %s) q
+            WHERE search_vector @@ q
+        ) hits
+    """
+    params = [options, options, query]
+
+    if after is not None:
+        sql += ' WHERE (rank, id) > (%s, %s)'
+        params += [after[0], after[1]]
+
+    sql += ' ORDER BY rank, id LIMIT %s'
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            SearchHit(post_id, rank, title, snippet)
+            for post_id, rank, title, snippet in cursor.fetchall()
+        ]
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import Post
+
+
+User = get_user_model()
+
+# The author fields that end up in post responses.
+AUTHOR_FIELDS = {'username', 'first_name', 'last_name', 'slug'}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_versions(sender, instance, **kwargs):
+    # Slugs are regenerated on save, previous_slug is
+    # the one the instance was cached under until save() returns.
+    old_slug = getattr(instance, 'previous_slug', None)
+
+    cache.bump_post(instance.slug)
+    if old_slug and old_slug != instance.slug:
+        cache.bump_post(old_slug)
+    cache.bump_author(instance.author.slug)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_author_versions(sender, instance, update_fields=None, **kwargs):
+    # e.g. logging in saves last_login only, which no cached response shows.
+    if update_fields is not None and AUTHOR_FIELDS.isdisjoint(update_fields):
+        return
+
+    old_slug = getattr(instance, 'previous_slug', None)
+
+    cache.bump_author(instance.slug)
+    if old_slug and old_slug != instance.slug:
+        cache.bump_author(old_slug)
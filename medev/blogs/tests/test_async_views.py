@@ -0,0 +1,158 @@
+import json
+import tempfile
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.client import AsyncRequestFactory
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from core.throttling import ScopedTokenBucketThrottle
+
+from ..api import async_views
+from ..models import Post
+
+
+User = get_user_model()
+
+
+class AsyncViewTestMixin:
+    def setUp(self):
+        cache.clear()
+
+        self.factory = AsyncRequestFactory()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.post = Post.objects.create(
+            title='Test title',
+            content='test content',
+            author=self.user
+        )
+
+        self.list_url = f'{reverse("post-list")}?user={self.user.slug}'
+        self.detail_url = reverse('post-detail', kwargs={'slug': self.post.slug})
+
+
+class TestAsyncCachedReads(AsyncViewTestMixin, TestCase):
+    """ Cached reads are answered by the async views themselves. """
+
+    async def test_cached_responses_match_sync_views(self):
+        """ The async views serve the same body and ETag as the sync ones. """
+        cases = (
+            (self.list_url, async_views.post_list, {}),
+            (self.detail_url, async_views.post_detail, {'slug': self.post.slug})
+        )
+
+        for url, view, kwargs in cases:
+            sync_response = await self.async_client.get(url)
+
+            response = await view(self.factory.get(url), **kwargs)
+
+            self.assertEquals(response.status_code, 200)
+            self.assertEquals(response.content, sync_response.content)
+            self.assertEquals(response['ETag'], sync_response['ETag'])
+
+            request = self.factory.get(url, **{'If-None-Match': response['ETag']})
+            response = await view(request, **kwargs)
+
+            self.assertEquals(response.status_code, 304)
+
+    async def test_cached_lists_are_compressed(self):
+        """ Cached lists are served compressed, like the sync view does. """
+        self.post.content = 'test content ' * 200
+        await sync_to_async(self.post.save)()
+
+        sync_response = await self.async_client.get(
+            self.list_url, **{'Accept-Encoding': 'gzip'}
+        )
+
+        request = self.factory.get(self.list_url, **{'Accept-Encoding': 'gzip'})
+        response = await async_views.post_list(request)
+
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(response.content, sync_response.content)
+        self.assertEquals(response['ETag'], sync_response['ETag'])
+
+    async def test_blocking_cache_lookups_run_in_a_thread(self):
+        """ Only the in-process cache is read on the event loop. """
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': directory
+                }
+            }
+            with override_settings(CACHES=caches):
+                thread = await async_views.cache_lookup(threading.get_ident)
+
+        self.assertNotEqual(thread, threading.get_ident())
+        self.assertEquals(
+            await async_views.cache_lookup(threading.get_ident),
+            threading.get_ident()
+        )
+
+
+    async def test_cached_reads_are_throttled(self):
+        """ Cache hits take tokens from the 'posts' bucket, like the sync views. """
+        await self.async_client.get(self.detail_url)
+        # The bucket the request to cache the post took a token from.
+        caches[settings.THROTTLE_CACHE_ALIAS].delete(
+            ScopedTokenBucketThrottle.cache_format % {'scope': 'posts', 'ident': '127.0.0.1'}
+        )
+
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES'] = {
+            **rest_framework['DEFAULT_THROTTLE_RATES'], 'posts': '2/min'
+        }
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            responses = [
+                await async_views.post_detail(
+                    self.factory.get(self.detail_url), slug=self.post.slug
+                )
+                for _ in range(3)
+            ]
+
+        self.assertEquals([r.status_code for r in responses], [200, 200, 429])
+        self.assertIn('Retry-After', responses[2])
+        self.assertIn('throttled', json.loads(responses[2].content)['detail'])
+
+class TestAsyncFallback(AsyncViewTestMixin, TransactionTestCase):
+    """ Cache misses and writes fall back to the sync viewset. """
+
+    async def test_uncached_read(self):
+        """ A cache miss is served by the sync viewset. """
+        response = await async_views.post_detail(
+            self.factory.get(self.detail_url),
+            slug=self.post.slug
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(json.loads(response.content)['title'], 'Test title')
+
+    async def test_write_requires_login(self):
+        """ Writes go through the sync viewset, with its permissions. """
+        response = await async_views.post_detail(
+            self.factory.delete(self.detail_url),
+            slug=self.post.slug
+        )
+
+        self.assertEquals(response.status_code, 401)
+
+    async def test_credentials_fall_back(self):
+        """ Cache hits with credentials are authenticated and throttled by the sync view. """
+        await self.async_client.get(self.detail_url)
+
+        response = await async_views.post_detail(
+            self.factory.get(self.detail_url, **{'Authorization': 'Token invalid'}),
+            slug=self.post.slug
+        )
+
+        self.assertEquals(response.status_code, 401)
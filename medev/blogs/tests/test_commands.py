@@ -0,0 +1,145 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from ..models import AuthorStats, Post
+
+
+User = get_user_model()
+
+
+class TestReconcileAuthorStats(TestCase):
+    """ Test cases for the reconcile_author_stats command. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.post = Post.objects.create(
+            title='Test title',
+            content='test content',
+            author=self.user
+        )
+
+    def test_fixes_drift(self):
+        """ Missing and wrong stats are recomputed, correct ones left alone. """
+        AuthorStats.objects.create(author=self.user, post_count=5)
+        other_user = User.objects.create_user(
+            username='User2',
+            email='test2@mail.com',
+            password='oxbuint1'
+        )
+
+        out = StringIO()
+        call_command('reconcile_author_stats', batch_size=1, stdout=out)
+
+        self.assertIn('2 were out of date', out.getvalue())
+
+        stats = AuthorStats.objects.get(author=self.user)
+        self.assertEquals(stats.post_count, 1)
+        self.assertEquals(stats.last_posted_at, self.post.created_at)
+
+        stats = AuthorStats.objects.get(author=other_user)
+        self.assertEquals(stats.post_count, 0)
+        self.assertIsNone(stats.last_posted_at)
+
+        out = StringIO()
+        call_command('reconcile_author_stats', stdout=out)
+
+        self.assertIn('0 were out of date', out.getvalue())
+
+
+class TestImportPosts(TestCase):
+    """ Test cases for the import_posts command. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def import_posts(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_jsonl(self):
+        """ Imports posts of existing and new authors, in chunks. """
+        records = [
+            {'author': 'User', 'title': 'Hello world', 'content': 'test content'},
+            {'author': 'new', 'email': 'new@mail.com', 'title': 'Hello world', 'content': 'test'},
+            {'author': 'new', 'title': 'Second', 'content': 'test content'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(json.dumps(r) for r in records))
+
+        out, err = self.import_posts(path, chunk_size=2, batch_size=1)
+
+        self.assertIn('Imported 3 posts and created 1 users', out)
+        self.assertEquals(err, '')
+
+        new_user = User.objects.get(username='new')
+        self.assertFalse(new_user.has_usable_password())
+        self.assertEquals(new_user.slug, 'new')
+        self.assertEquals(
+            sorted(Post.objects.values_list('slug', flat=True)),
+            ['hello-world', 'hello-world-2', 'second']
+        )
+        self.assertEquals(AuthorStats.objects.get(author=new_user).post_count, 2)
+
+    def test_imports_csv(self):
+        """ Imports CSV files with a header row. """
+        path = self.write(
+            'posts.csv',
+            'author,title,content\r\nUser,Hello world,"multi\r\nline"\r\n'
+        )
+
+        limit = csv.field_size_limit()
+        out, _ = self.import_posts(path)
+
+        self.assertIn('Imported 1 posts', out)
+        self.assertEquals(Post.objects.get().content, 'multi\r\nline')
+        self.assertEquals(csv.field_size_limit(), limit)
+
+    def test_skips_invalid_records(self):
+        """ Invalid records are reported and skipped, the rest imported. """
+        path = self.write('posts.jsonl', '\n'.join([
+            'not json',
+            json.dumps({'author': 'User', 'title': '', 'content': 'test'}),
+            json.dumps({'author': 'no_email', 'title': 'title', 'content': 'test'}),
+            json.dumps({'author': 'taken', 'email': 'test@mail.com', 'title': 'title', 'content': 'test'}),
+            json.dumps({'author': 'User', 'title': 'title', 'content': 'test'}),
+        ]))
+
+        out, err = self.import_posts(path)
+
+        self.assertIn('Imported 1 posts and created 0 users', out)
+        self.assertIn('4 records were skipped', out)
+        self.assertIn('line 1', err)
+        self.assertEquals(Post.objects.get().author, self.user)
+
+    def test_unknown_format(self):
+        """ Fails on files it can't tell the format of. """
+        path = self.write('posts.txt', '')
+
+        with self.assertRaises(CommandError):
+            self.import_posts(path)
@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+
+from core.models import SlugCounter
+
+from ..models import Post, PostSlugRedirect
+
+
+User = get_user_model()
+
+
+class TestPostSlug(TestCase):
+    """ Test cases for generating post slugs. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+    def create_post(self, title):
+        return Post.objects.create(title=title, content='test content', author=self.user)
+
+    def test_slugs_are_unique(self):
+        """ Posts with the same title get numbered slugs. """
+        slugs = [self.create_post('Hello world').slug for _ in range(3)]
+
+        self.assertEquals(slugs, ['hello-world', 'hello-world-2', 'hello-world-3'])
+
+    def test_create_query_count(self):
+        """ Creating a post takes the same queries however common its title is. """
+        for _ in range(10):
+            self.create_post('Hello world')
+
+        # A savepoint, the counter update and read, the check that the
+        # slug is free, the insert.
+        with self.assertNumQueries(6):
+            common = self.create_post('Hello world')
+        with self.assertNumQueries(6):
+            self.create_post('Hello world')
+
+        self.assertEquals(common.slug, 'hello-world-11')
+
+    def test_skips_slugs_of_other_bases(self):
+        """ Slugs another title already got are skipped. """
+        self.create_post('Hello world')
+        self.create_post('Hello world 2')
+
+        self.assertEquals(self.create_post('Hello world').slug, 'hello-world-3')
+        self.assertEquals(self.create_post('Hello world 2').slug, 'hello-world-2-2')
+
+    def test_counter_seeded_from_existing_slugs(self):
+        """ Slugs given out before there was a counter aren't handed out again. """
+        Post.objects.bulk_create(
+            Post(title='Hello world', content='test', slug=slug, author=self.user)
+            for slug in ('hello-world', 'hello-world-7', 'hello-world-wide')
+        )
+
+        self.assertEquals(self.create_post('Hello world').slug, 'hello-world-8')
+        self.assertEquals(SlugCounter.objects.get(base='hello-world').last, 8)
+
+    def test_unchanged_title_keeps_slug(self):
+        """ Saving without changing the title doesn't touch the slug. """
+        self.create_post('Hello world')
+        post = Post.objects.get()
+        post.content = 'new content'
+
+        # A savepoint, the update and the author (for the cache versions).
+        with self.assertNumQueries(4):
+            post.save()
+
+        self.assertEquals(post.slug, 'hello-world')
+        self.assertFalse(PostSlugRedirect.objects.exists())
+
+    def test_changed_title_keeps_redirect(self):
+        """ Changing the title regenerates the slug and keeps the old one. """
+        post = self.create_post('Hello world')
+        post.title = 'Goodbye world'
+        post.save()
+
+        self.assertEquals(post.slug, 'goodbye-world')
+        self.assertEquals(post.previous_slug, 'goodbye-world')
+        redirect = PostSlugRedirect.objects.get()
+        self.assertEquals((redirect.slug, redirect.post), ('hello-world', post))
+
+    def test_update_fields_saves_slug(self):
+        """ Saving only the title saves its new slug too. """
+        post = self.create_post('Hello world')
+        post.title = 'Goodbye world'
+        post.save(update_fields=['title'])
+
+        self.assertEquals(Post.objects.get().slug, 'goodbye-world')
+
+    def test_allocate_many(self):
+        """ Allocates slugs in batch, continuing from the existing ones. """
+        self.create_post('Hello world')
+
+        with transaction.atomic():
+            slugs = SlugCounter.objects.allocate_many(
+                Post, ['Hello world', 'Other', 'Hello world'], batch_size=2
+            )
+
+        self.assertEquals(slugs, ['hello-world-2', 'other', 'hello-world-3'])
+        self.assertEquals(self.create_post('Hello world').slug, 'hello-world-4')
+
+    def test_allocate_many_skips_slugs_of_other_bases(self):
+        """ Slugs taken by other titles, before or in the batch, are skipped. """
+        self.create_post('Hello world')
+
+        with transaction.atomic():
+            slugs = SlugCounter.objects.allocate_many(
+                Post, ['Hello world', 'Hello world 2', 'Hello world']
+            )
+
+        self.assertEquals(slugs, ['hello-world-2', 'hello-world-2-2', 'hello-world-3'])
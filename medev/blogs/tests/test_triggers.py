@@ -0,0 +1,61 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+
+from .. import search, triggers
+from ..models import Post, Tag
+
+
+User = get_user_model()
+
+
+def existing_triggers():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        return {name for name, in cursor.fetchall()}
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The triggers are SQLite only.')
+class TestTriggers(TransactionTestCase):
+    """ Test cases for keeping the SQLite triggers after table remakes. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.addCleanup(triggers.restore, 'default')
+
+    def all_triggers(self):
+        return {
+            name
+            for migration in triggers.SQLITE_TRIGGERS
+            for name in triggers.get_triggers(migration)
+        }
+
+    def test_triggers_exist_after_migrations(self):
+        """ Every trigger is there once all migrations ran. """
+        self.assertEquals(len(self.all_triggers()), 5)
+        self.assertLessEqual(self.all_triggers(), existing_triggers())
+
+    def test_restored_after_remake(self):
+        """ Triggers a table remake dropped are recreated and caught up. """
+        post = Post.objects.create(title='Before', content='test content', author=self.user)
+        Tag.objects.assign([post], ['python'])
+
+        with connection.schema_editor() as editor:
+            editor._remake_table(Post)
+            editor._remake_table(Post.tags.through)
+        self.assertFalse(self.all_triggers() & existing_triggers())
+
+        # Unseen by the index and the tag counts.
+        remade = Post.objects.create(title='Remade', content='test content', author=self.user)
+        Tag.objects.assign([remade], ['python'])
+
+        self.assertEquals(set(triggers.restore('default')), self.all_triggers())
+        self.assertEquals([hit.post_id for hit in search.search('remade')], [remade.pk])
+        self.assertEquals(Tag.objects.get(name='python').post_count, 2)
+        self.assertEquals(triggers.restore('default'), [])
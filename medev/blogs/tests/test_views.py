@@ -1,11 +1,28 @@
+import gzip
+import json
 import os
+import tempfile
+import time
+from unittest import mock
 from django.http import response
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils.http import http_date
 from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
 
-from ..models import Post
+from core import compression
+from core.renderers import FastJSONRenderer
+from core.serializers import get_fast_representation
+
+from .. import cache as post_cache
+from ..api import views
+from ..api.serializers import PostSerializer, PostTagsSerializer
+from ..api.views import PostViewSet
+from ..models import AuthorStats, Post, PostSlugRedirect, Tag
 
 
 User = get_user_model()
@@ -131,9 +148,9 @@ class TestReadPost(TestCase):
         response = self.client.get(url)
 
         self.assertEquals(response.status_code, 200)
-        self.assertEquals(len(response.data), 2)
+        self.assertEquals(len(response.json()['results']), 2)
         self.assertEquals(
-            response.data[0],
+            response.json()['results'][0],
             {
                 'title': 'Test title',
                 'content': 'test content',
@@ -158,6 +175,618 @@ class TestReadPost(TestCase):
         )
 
 
+class TestPaginatePosts(TestCase):
+    """ Test cases for paginating a user's Posts. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.posts = [
+            Post.objects.create(
+                title=f'Test title {i}',
+                content='test content',
+                author=self.user
+            )
+            for i in range(5)
+        ]
+
+        # Give the posts identical timestamps so the id has to break ties.
+        Post.objects.update(created_at=self.posts[0].created_at)
+
+        self.url = f'{reverse("post-list")}?user={self.user.slug}&page_size=2'
+
+    def test_can_follow_next_links(self):
+        """ Walks every page, each post is returned exactly once, in order. """
+        slugs = []
+        url = self.url
+
+        while url:
+            response = self.client.get(url)
+            self.assertEquals(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), 2)
+
+            slugs += [post['slug'] for post in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEquals(slugs, [post.slug for post in self.posts])
+
+    def test_can_follow_previous_links(self):
+        """ The previous link of the second page leads back to the first. """
+        first_page = self.client.get(self.url)
+        second_page = self.client.get(first_page.json()['next'])
+
+        self.assertIsNone(first_page.json()['previous'])
+
+        response = self.client.get(second_page.json()['previous'])
+
+        self.assertEquals(response.json()['results'], first_page.json()['results'])
+
+    def test_invalid_cursor(self):
+        """ Can't paginate with a malformed cursor. """
+        response = self.client.get(f'{self.url}&cursor=garbage')
+
+        self.assertEquals(response.status_code, 404)
+
+
+class TestPostQueryCount(TestCase):
+    """ The number of queries must not grow with the number of posts. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+    def create_posts(self, amount):
+        Post.objects.bulk_create(
+            Post(
+                title=f'Test title {i}',
+                content='test content',
+                slug=f'test-title-{i}',
+                author=self.user
+            )
+            for i in range(amount)
+        )
+
+    def test_list_query_count(self):
+        """
+        Listing a user's posts is two queries regardless of the amount,
+        the ETag aggregate and the page itself.
+        """
+        url = f'{reverse("post-list")}?user={self.user.slug}'
+
+        for amount in (1, 10):
+            Post.objects.all().delete()
+            self.create_posts(amount)
+
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+
+            self.assertEquals(len(response.json()['results']), amount)
+
+    def test_retrieve_query_count(self):
+        """ Retrieving a post and its author is one query. """
+        self.create_posts(10)
+        url = reverse('post-detail', kwargs={'slug': 'test-title-0'})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEquals(response.data['author']['username'], 'User')
+
+
+class TestPostCache(TestCase):
+    """ Test cases for the cached post responses. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.post = Post.objects.create(
+            title='Test title',
+            content='test content',
+            author=self.user
+        )
+
+        self.list_url = f'{reverse("post-list")}?user={self.user.slug}'
+        self.detail_url = reverse('post-detail', kwargs={'slug': self.post.slug})
+
+    def test_cache_hits_dont_query_the_database(self):
+        """ Repeated reads are served from the cache. """
+        for url in (self.list_url, self.detail_url):
+            first = self.client.get(url)
+
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+
+            self.assertEquals(second.status_code, 200)
+            self.assertEquals(second.json(), first.json())
+
+    def test_versions_expire(self):
+        """ The versions of slugs that were asked for don't stay forever. """
+        self.client.get(reverse('post-detail', kwargs={'slug': 'unknown'}))
+        self.client.get(f'{reverse("post-list")}?user=unknown')
+        post_cache.bump_author('renamed')
+
+        keys = [
+            post_cache.post_version_key('unknown'),
+            post_cache.author_version_key('unknown'),
+            post_cache.author_version_key('renamed')
+        ]
+        self.assertEquals(len(cache.get_many(keys)), 3)
+
+        later = time.time() + settings.POSTS_CACHE_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEquals(cache.get_many(keys), {})
+
+    def test_saving_a_post_invalidates(self):
+        """ Updated posts are not served stale. """
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        self.post.content = 'new content'
+        self.post.save()
+
+        response = self.client.get(self.list_url)
+        self.assertEquals(response.json()['results'][0]['content'], 'new content')
+
+        response = self.client.get(self.detail_url)
+        self.assertEquals(response.data['content'], 'new content')
+
+    def test_creating_and_deleting_posts_invalidates(self):
+        """ The list reflects created and deleted posts. """
+        self.client.get(self.list_url)
+
+        Post.objects.create(
+            title='Test title2',
+            content='test content',
+            author=self.user
+        )
+        response = self.client.get(self.list_url)
+        self.assertEquals(len(response.json()['results']), 2)
+
+        Post.objects.all().delete()
+        response = self.client.get(self.list_url)
+        self.assertEquals(len(response.json()['results']), 0)
+
+        response = self.client.get(self.detail_url)
+        self.assertEquals(response.status_code, 404)
+
+    def test_saving_the_author_invalidates(self):
+        """ Changes to the author show up in both list and detail. """
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        self.user.first_name = 'Name'
+        self.user.save()
+
+        response = self.client.get(self.list_url)
+        self.assertEquals(response.json()['results'][0]['author']['first_name'], 'Name')
+
+        response = self.client.get(self.detail_url)
+        self.assertEquals(response.data['author']['first_name'], 'Name')
+
+    def test_cached_feeds_are_compressed_once(self):
+        """ Lists are cached compressed and served without compressing again. """
+        self.post.content = 'test content ' * 200
+        self.post.save()
+
+        first = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch.object(compression, 'compress') as compress:
+            second = self.client.get(self.list_url, HTTP_ACCEPT_ENCODING='gzip')
+            not_modified = self.client.get(
+                self.list_url,
+                HTTP_ACCEPT_ENCODING='gzip',
+                HTTP_IF_NONE_MATCH=second['ETag']
+            )
+            identity = self.client.get(self.list_url)
+
+        compress.assert_not_called()
+        self.assertEquals(second['Content-Encoding'], 'gzip')
+        self.assertTrue(second['ETag'].startswith('W/'))
+        self.assertIn('Accept-Encoding', second['Vary'])
+        self.assertEquals(second.content, first.content)
+        self.assertEquals(gzip.decompress(second.content), identity.content)
+        self.assertEquals(not_modified.status_code, 304)
+        # The same validator for every representation, and for the 304.
+        self.assertEquals(not_modified['ETag'], second['ETag'])
+        self.assertEquals(identity['ETag'], second['ETag'])
+        self.assertFalse(identity.has_header('Content-Encoding'))
+
+    def test_cached_feeds_browsable_api(self):
+        """ Cached lists can still be rendered by the browsable API. """
+        self.client.get(self.list_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_ACCEPT='text/html')
+
+        self.assertEquals(response.status_code, 200)
+        self.assertIn(self.post.title, response.content.decode())
+
+    def test_file_based_cache(self):
+        """ The cache works with the file based backend too. """
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': directory
+                }
+            }
+
+            with override_settings(CACHES=caches):
+                self.client.get(self.detail_url)
+
+                with self.assertNumQueries(0):
+                    self.client.get(self.detail_url)
+
+                self.post.content = 'new content'
+                self.post.save()
+
+                response = self.client.get(self.detail_url)
+                self.assertEquals(response.data['content'], 'new content')
+
+
+class TestConditionalGet(TestCase):
+    """ Test cases for ETags on post responses. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.post = Post.objects.create(
+            title='Test title',
+            content='test content',
+            author=self.user
+        )
+
+        self.list_url = f'{reverse("post-list")}?user={self.user.slug}'
+        self.detail_url = reverse('post-detail', kwargs={'slug': self.post.slug})
+
+    def test_sets_etag(self):
+        """ Responses carry an ETag, but no Last-Modified. """
+        for url in (self.list_url, self.detail_url):
+            response = self.client.get(url)
+
+            self.assertEquals(response.status_code, 200)
+            self.assertIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+
+    def test_not_modified(self):
+        """ A matching If-None-Match is answered with an empty 304. """
+        entry_keys = (
+            post_cache.list_key(self.user.slug, f'http://testserver{self.list_url}'),
+            post_cache.detail_key(self.post.slug)
+        )
+
+        for url, entry_key in zip((self.list_url, self.detail_url), entry_keys):
+            etag = self.client.get(url)['ETag']
+
+            # Both cached and uncached responses must honor it.
+            for cached in (True, False):
+                if not cached:
+                    cache.delete(entry_key)
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEquals(response.status_code, 304)
+                self.assertEquals(response.content, b'')
+                self.assertEquals(response['ETag'], etag)
+
+    def test_if_modified_since_ignored(self):
+        """ If-Modified-Since can't tell deletions or author edits, it's ignored. """
+        since = http_date(time.time() + 60)
+        self.user.first_name = 'Name'
+        self.user.save()
+
+        for url in (self.list_url, self.detail_url):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+
+            self.assertEquals(response.status_code, 200)
+
+    def test_changes_invalidate_etag(self):
+        """ Updates, deletions and author edits change the ETag. """
+        etags = {self.client.get(self.list_url)['ETag']}
+
+        self.post.content = 'new content'
+        self.post.save()
+        etags.add(self.client.get(self.list_url)['ETag'])
+
+        self.user.first_name = 'Name'
+        self.user.save()
+        etags.add(self.client.get(self.list_url)['ETag'])
+
+        self.post.delete()
+        etags.add(self.client.get(self.list_url)['ETag'])
+
+        self.assertEquals(len(etags), 4)
+
+
+class TestSearchPosts(TestCase):
+    """ Test cases for full-text searching Posts. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.title_match = Post.objects.create(
+            title='Django performance',
+            content='how to make it fast',
+            author=self.user
+        )
+
+        self.content_match = Post.objects.create(
+            title='Something else',
+            content='a <b>word</b> about django and its ORM',
+            author=self.user
+        )
+
+        Post.objects.create(
+            title='Unrelated',
+            content='nothing to see here',
+            author=self.user
+        )
+
+        self.url = reverse('post-search')
+
+    def test_results_are_ranked(self):
+        """ Title matches rank above content matches. """
+        response = self.client.get(self.url, {'q': 'django'})
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            [post['slug'] for post in response.data['results']],
+            [self.title_match.slug, self.content_match.slug]
+        )
+
+    def test_results_are_highlighted(self):
+        """ Matched terms are marked, the content itself is escaped. """
+        response = self.client.get(self.url, {'q': 'django'})
+        highlights = response.data['results'][1]['highlights']
+
+        self.assertEquals(highlights['title'], 'Something else')
+        self.assertEquals(
+            highlights['content'],
+            'a &lt;b&gt;word&lt;/b&gt; about <mark>django</mark> and its ORM'
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        """ Updated and deleted posts are reflected in the results. """
+        self.title_match.title = 'Flask performance'
+        self.title_match.save()
+        self.content_match.delete()
+
+        response = self.client.get(self.url, {'q': 'django'})
+        self.assertEquals(response.data['results'], [])
+
+        response = self.client.get(self.url, {'q': 'flask'})
+        self.assertEquals(len(response.data['results']), 1)
+
+    def test_can_follow_next_links(self):
+        """ Every hit is returned exactly once across pages. """
+        response = self.client.get(self.url, {'q': 'django', 'page_size': 1})
+        self.assertEquals(len(response.data['results']), 1)
+
+        response = self.client.get(response.data['next'])
+        self.assertEquals(
+            response.data['results'][0]['slug'],
+            self.content_match.slug
+        )
+        self.assertIsNone(response.data['next'])
+
+    def test_query_syntax_is_not_interpreted(self):
+        """ Search operators in the query are treated as plain words. """
+        response = self.client.get(self.url, {'q': 'django" OR "nothing'})
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['results'], [])
+
+    def test_must_provide_query(self):
+        """ Can't search without a query. """
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(
+            response.data,
+            {'error': 'must specify a search query.'}
+        )
+
+
+class TestTags(TestCase):
+    """ Test cases for tagging Posts and filtering by tags. """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@mail.com',
+            password='oxbuint1'
+        )
+
+        self.other_user = User.objects.create_user(
+            username='other_user',
+            email='other_user@mail.com',
+            password='oxbuint1'
+        )
+
+        self.python = Post.objects.create(
+            title='python',
+            content='test content',
+            author=self.owner
+        )
+
+        self.both = Post.objects.create(
+            title='both',
+            content='test content',
+            author=self.owner
+        )
+
+        self.untagged = Post.objects.create(
+            title='untagged',
+            content='test content',
+            author=self.owner
+        )
+
+        Tag.objects.assign([self.python, self.both], ['python'])
+        Tag.objects.assign([self.both], ['backend'])
+
+    def get_slugs(self, query):
+        response = self.client.get(f'{reverse("post-list")}?{query}')
+        self.assertEquals(response.status_code, 200)
+        return [post['slug'] for post in response.data['results']]
+
+    def test_filter_any_tag(self):
+        """ By default posts with any of the tags are returned. """
+        self.assertEquals(
+            self.get_slugs('tags=python&tags=backend'),
+            [self.python.slug, self.both.slug]
+        )
+
+    def test_filter_all_tags(self):
+        """ With match=all only posts with every tag are returned. """
+        self.assertEquals(
+            self.get_slugs('tags=python&tags=backend&match=all'),
+            [self.both.slug]
+        )
+
+    def test_filter_tags_and_user(self):
+        """ Tags and user filters combine. """
+        self.assertEquals(
+            self.get_slugs(f'tags=backend&user={self.other_user.slug}'),
+            []
+        )
+
+    def test_post_counts(self):
+        """ Post counts follow assignments and deletions. """
+        self.assertEquals(Tag.objects.get(name='python').post_count, 2)
+
+        # Assigning an existing pair doesn't count twice.
+        Tag.objects.assign([self.python], ['python'])
+        self.assertEquals(Tag.objects.get(name='python').post_count, 2)
+
+        self.both.delete()
+        self.assertEquals(Tag.objects.get(name='python').post_count, 1)
+        self.assertEquals(Tag.objects.get(name='backend').post_count, 0)
+
+        response = self.client.get(reverse('tag-detail', kwargs={'name': 'python'}))
+        self.assertEquals(response.data, {'name': 'python', 'post_count': 1})
+
+    def test_can_tag_own_post(self):
+        """ Tags are assigned in bulk, the missing ones created. """
+        url = reverse('post-tags', kwargs={'slug': self.untagged.slug})
+
+        self.client.force_login(self.owner)
+
+        # Session, user and post, two to get or create the tags,
+        # one to tag the post and one to list its tags.
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                url,
+                {'tags': ['Python', 'django', 'web']},
+                content_type='application/json'
+            )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            sorted(tag['name'] for tag in response.data),
+            ['django', 'python', 'web']
+        )
+        self.assertEquals(Tag.objects.get(name='python').post_count, 3)
+
+    def test_cant_tag_others_posts(self):
+        """ Can't tag someone else's post. """
+        url = reverse('post-tags', kwargs={'slug': self.untagged.slug})
+
+        self.client.force_login(self.other_user)
+        response = self.client.post(
+            url,
+            {'tags': ['python']},
+            content_type='application/json'
+        )
+
+        self.assertEquals(response.status_code, 403)
+
+
+class TestAuthorStats(TestCase):
+    """ Test cases for the denormalized author stats. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.url = reverse('author-stats', kwargs={'slug': self.user.slug})
+
+    def create_post(self, title):
+        response = self.client.post(
+            reverse('post-list'),
+            {'title': title, 'content': 'test content'}
+        )
+        return Post.objects.get(slug=response.data['slug'])
+
+    def test_stats_follow_creates_and_deletes(self):
+        """ Creating and deleting posts through the API updates the stats. """
+        self.client.force_login(self.user)
+
+        first = self.create_post('first')
+        second = self.create_post('second')
+
+        stats = AuthorStats.objects.get(author=self.user)
+        self.assertEquals(stats.post_count, 2)
+        self.assertEquals(stats.last_posted_at, second.created_at)
+
+        self.client.delete(reverse('post-detail', kwargs={'slug': second.slug}))
+
+        stats.refresh_from_db()
+        self.assertEquals(stats.post_count, 1)
+        self.assertEquals(stats.last_posted_at, first.created_at)
+
+    def test_can_get_stats(self):
+        """ Stats are computed on first access. """
+        post = Post.objects.create(
+            title='Test title',
+            content='test content',
+            author=self.user
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['post_count'], 1)
+        self.assertIsNotNone(response.data['last_posted_at'])
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_stats_of_unknown_user(self):
+        """ There are no stats for users that don't exist. """
+        response = self.client.get(
+            reverse('author-stats', kwargs={'slug': 'nobody'})
+        )
+
+        self.assertEquals(response.status_code, 404)
+
+
 class TestUpdatePost(TestCase):
     """ Test cases for updating Posts. """
     
@@ -211,6 +840,376 @@ class TestUpdatePost(TestCase):
         self.assertEquals(response.status_code, 403)
 
 
+class TestSlugRedirects(TestCase):
+    """ Test cases for the redirects of renamed posts and users. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.post = Post.objects.create(
+            title='Hello world',
+            content='test content',
+            author=self.user
+        )
+
+    def test_renamed_post_redirects(self):
+        """ A post's old slug redirects to its current one. """
+        old_url = reverse('post-detail', kwargs={'slug': 'hello-world'})
+        self.client.get(old_url)
+
+        self.post.title = 'Goodbye world'
+        self.post.save()
+
+        response = self.client.get(old_url)
+
+        self.assertEquals(response.status_code, 301)
+        self.assertEquals(
+            response['Location'],
+            'http://testserver' + reverse('post-detail', kwargs={'slug': 'goodbye-world'})
+        )
+
+    def test_unknown_post_not_found(self):
+        """ A slug no post ever had is still a 404. """
+        url = reverse('post-detail', kwargs={'slug': 'unknown'})
+
+        self.assertEquals(self.client.get(url).status_code, 404)
+
+    def test_renamed_user_redirects(self):
+        """ Listing posts by a user's old slug redirects to the current one. """
+        self.user.username = 'Renamed'
+        self.user.save()
+
+        response = self.client.get(f'{reverse("post-list")}?user=user&page_size=5')
+
+        self.assertEquals(response.status_code, 301)
+        self.assertEquals(
+            response['Location'],
+            f'{reverse("post-list")}?user=renamed&page_size=5'
+        )
+
+
+class TestBulkPosts(TestCase):
+    """ Test cases for creating, updating and deleting many Posts at once. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@mail.com',
+            password='oxbuint1'
+        )
+
+        self.other_user = User.objects.create_user(
+            username='other_user',
+            email='other_user@mail.com',
+            password='oxbuint1'
+        )
+
+        self.url = reverse('post-bulk')
+        self.client.force_login(self.owner)
+
+    def create_posts(self, author, amount):
+        return [
+            Post.objects.create(title=f'Post {i}', content='test content', author=author)
+            for i in range(amount)
+        ]
+
+    def test_can_bulk_create(self):
+        """ Creates every post, with unique slugs, and counts them. """
+        data = [{'title': 'Hello world', 'content': 'test content'}] * 3
+
+        response = self.client.post(self.url, data, content_type='application/json')
+
+        self.assertEquals(response.status_code, 201)
+        self.assertEquals(
+            [post['slug'] for post in response.data],
+            ['hello-world', 'hello-world-2', 'hello-world-3']
+        )
+        self.assertEquals(Post.objects.filter(author=self.owner).count(), 3)
+        self.assertEquals(AuthorStats.objects.get(author=self.owner).post_count, 3)
+
+    def test_bulk_create_query_count(self):
+        """ Creating posts takes the same queries however many there are. """
+        def create(amount):
+            data = [
+                {'title': f'Title {i}', 'content': 'test content'}
+                for i in range(amount)
+            ]
+            with self.assertNumQueries(14):
+                self.client.post(self.url, data, content_type='application/json')
+
+        create(2)
+        create(50)
+
+    def test_bulk_create_validates_every_item(self):
+        """ Nothing is created if any item is invalid, the errors are per item. """
+        data = [
+            {'title': 'valid', 'content': 'test content'},
+            {'title': '', 'content': 'test content'}
+        ]
+
+        response = self.client.post(self.url, data, content_type='application/json')
+
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(response.data[0], {})
+        self.assertIn('title', response.data[1])
+        self.assertFalse(Post.objects.exists())
+
+    def test_bulk_create_max_size(self):
+        """ Can't create more than POSTS_BULK_MAX_SIZE posts at once. """
+        data = [{'title': 'title', 'content': 'test content'}] * 3
+
+        with self.settings(POSTS_BULK_MAX_SIZE=2):
+            response = self.client.post(self.url, data, content_type='application/json')
+
+        self.assertEquals(response.status_code, 400)
+
+    def test_can_bulk_update(self):
+        """ Updates every post, renamed ones get new slugs and redirects. """
+        first, second = self.create_posts(self.owner, 2)
+        data = [
+            {'slug': first.slug, 'title': 'Renamed'},
+            {'slug': second.slug, 'content': 'new content'}
+        ]
+
+        response = self.client.patch(self.url, data, content_type='application/json')
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(
+            [(post['slug'], post['content']) for post in response.data],
+            [('renamed', 'test content'), ('post-1', 'new content')]
+        )
+        self.assertEquals(PostSlugRedirect.objects.get(slug='post-0').post, first)
+
+    def test_bulk_update_invalidates_cache(self):
+        """ Cached responses of the updated posts aren't served anymore. """
+        post, = self.create_posts(self.owner, 1)
+        url = reverse('post-detail', kwargs={'slug': post.slug})
+        self.client.get(url)
+
+        data = [{'slug': post.slug, 'content': 'new content'}]
+        self.client.patch(self.url, data, content_type='application/json')
+
+        self.assertEquals(self.client.get(url).data['content'], 'new content')
+
+    def test_cant_bulk_update_others_posts(self):
+        """ Nothing is updated if any of the posts isn't the user's. """
+        own, = self.create_posts(self.owner, 1)
+        other, = self.create_posts(self.other_user, 1)
+        data = [
+            {'slug': own.slug, 'content': 'new content'},
+            {'slug': other.slug, 'content': 'new content'},
+            {'slug': 'unknown', 'content': 'new content'}
+        ]
+
+        response = self.client.patch(self.url, data, content_type='application/json')
+
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(response.data[0], {})
+        self.assertIn('slug', response.data[1])
+        self.assertIn('slug', response.data[2])
+        self.assertFalse(Post.objects.filter(content='new content').exists())
+
+    def test_can_bulk_delete(self):
+        """ Deletes every post and uncounts them. """
+        posts = self.create_posts(self.owner, 3)
+
+        response = self.client.delete(
+            self.url,
+            [post.slug for post in posts[:2]],
+            content_type='application/json'
+        )
+
+        self.assertEquals(response.status_code, 204)
+        self.assertEquals(list(Post.objects.all()), posts[2:])
+        self.assertEquals(AuthorStats.objects.get(author=self.owner).post_count, 1)
+
+    def test_cant_bulk_delete_others_posts(self):
+        """ Nothing is deleted if any of the posts isn't the user's. """
+        own, = self.create_posts(self.owner, 1)
+        other, = self.create_posts(self.other_user, 1)
+
+        response = self.client.delete(
+            self.url, [own.slug, other.slug], content_type='application/json'
+        )
+
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(Post.objects.count(), 2)
+
+    def test_cant_bulk_change_unauthenticated(self):
+        """ Has to be logged in. """
+        self.client.logout()
+        data = [{'title': 'title', 'content': 'test content'}]
+
+        response = self.client.post(self.url, data, content_type='application/json')
+
+        self.assertEquals(response.status_code, 401)
+
+
+class TestExportPosts(TestCase):
+    """ Test cases for exporting a user's Posts. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        self.other_user = User.objects.create_user(
+            username='other_user',
+            email='other_user@mail.com',
+            password='oxbuint1'
+        )
+
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', content='test content', author=self.user)
+            for i in range(3)
+        ]
+        Post.objects.create(title='Other', content='test content', author=self.other_user)
+
+    def export(self, user):
+        return self.client.get(f'{reverse("post-export")}?user={user}')
+
+    def test_exports_users_posts(self):
+        """ Streams one JSON object per post, oldest first. """
+        response = self.export(self.user.slug)
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEquals(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEquals(
+            [json.loads(line)['slug'] for line in lines],
+            [post.slug for post in self.posts]
+        )
+
+    def test_export_matches_serializer(self):
+        """ Every line has the same fields as the post endpoints. """
+        response = self.export(self.user.slug)
+        line = b''.join(response.streaming_content).splitlines()[0]
+
+        detail = self.client.get(
+            reverse('post-detail', kwargs={'slug': self.posts[0].slug})
+        )
+        self.assertEquals(json.loads(line), detail.json())
+
+    def test_export_query_count(self):
+        """ The user check and one query for the posts, however many. """
+        with self.assertNumQueries(2):
+            response = self.export(self.user.slug)
+            b''.join(response.streaming_content)
+
+    async def test_export_under_asgi(self):
+        """ Under ASGI the body is read on the event loop, without queries. """
+        response = await self.async_client.get(
+            f'{reverse("post-export")}?user={self.user.slug}'
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEquals(
+            [json.loads(line)['slug'] for line in lines],
+            [post.slug for post in self.posts]
+        )
+
+    def test_export_unknown_user(self):
+        """ Exporting a user that doesn't exist is a 404. """
+        self.assertEquals(self.export('unknown').status_code, 404)
+
+    def test_export_requires_user(self):
+        """ Exporting requires a user. """
+        response = self.client.get(reverse('post-export'))
+
+        self.assertEquals(response.status_code, 400)
+
+
+class TestFastSerialization(TestCase):
+    """ Test cases for the fast read-only serialization of Posts. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='Üser',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.user.first_name = 'Zoë "Z"'
+        self.user.save()
+
+        self.posts = [
+            Post.objects.create(
+                title='Ünïcode \u2028 title 🐍',
+                content='<script>\x00\t\n"quoted" \\ \u2029 é</script>',
+                author=self.user
+            ),
+            Post.objects.create(title='django', content='', author=self.user),
+            Post.objects.create(title='plain', content='test content', author=self.user),
+        ]
+        Tag.objects.assign(self.posts[:2], ['python'])
+
+    def get(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEquals(response.status_code, 200)
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def get_both(self, url):
+        """
+        Returns the content of url with the fast path, and with DRF's
+        serializers and JSONRenderer only.
+        """
+        fast = self.get(url)
+
+        with self.settings(POSTS_FAST_SERIALIZATION=False), \
+                mock.patch.object(PostViewSet, 'renderer_classes', (JSONRenderer,)), \
+                mock.patch.object(views, 'FastJSONRenderer', JSONRenderer):
+            drf = self.get(url)
+
+        return fast, drf
+
+    def test_same_output(self):
+        """ Every read-only endpoint returns the same bytes as DRF. """
+        urls = [
+            f'{reverse("post-list")}?user={self.user.slug}',
+            f'{reverse("post-list")}?user={self.user.slug}&page_size=2',
+            f'{reverse("post-list")}?tags=python',
+            reverse('post-detail', kwargs={'slug': self.posts[0].slug}),
+            f'{reverse("post-search")}?q=django',
+            f'{reverse("post-export")}?user={self.user.slug}',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                fast, drf = self.get_both(url)
+                self.assertEquals(fast, drf)
+
+    def test_same_representation(self):
+        """ Instances and .values() rows give the serializer's data. """
+        fast = get_fast_representation(PostSerializer)
+        row = Post.objects.filter(pk=self.posts[0].pk).values(*fast.lookups).get()
+        expected = PostSerializer(self.posts[0]).data
+
+        self.assertEquals(fast.from_instance(self.posts[0]), expected)
+        self.assertEquals(fast.from_row(row), expected)
+        self.assertEquals(
+            FastJSONRenderer().render(fast.from_row(row)),
+            JSONRenderer().render(expected)
+        )
+
+    def test_unsupported_serializer(self):
+        """ Serializers the fast path can't reproduce are left to DRF. """
+        self.assertIsNone(get_fast_representation(PostTagsSerializer))
+
+
 class TestDeletePost(TestCase):
     """ Test cases for deleting Posts. """
     
@@ -0,0 +1,75 @@
+"""
+The SQLite triggers of migrations 0007 (the full-text search index) and
+0008 (tag post counts).
+
+Django drops a table's triggers whenever it remakes the table, which on
+SQLite it does for most AddField and AlterField operations. restore() runs
+after every migrate (post_migrate), recreates the triggers that went
+missing and brings what they maintain back in sync.
+"""
+import importlib
+import re
+
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+
+# {migration: statement that recomputes what its triggers maintain}
+SQLITE_TRIGGERS = {
+    '0007_post_search': "INSERT INTO blogs_post_fts(blogs_post_fts) VALUES ('rebuild')",
+    '0008_tags': """
+        UPDATE blogs_tag SET post_count = (
+            SELECT COUNT(*) FROM blogs_posttag WHERE tag_id = blogs_tag.id
+        )
+    """,
+}
+
+TRIGGER_NAME_RE = re.compile(r'CREATE TRIGGER (\w+)')
+
+
+def get_triggers(migration):
+    """
+    Returns {name: CREATE TRIGGER statement} of the migration's SQLite triggers.
+    """
+    module = importlib.import_module(f'blogs.migrations.{migration}')
+    triggers = {}
+    for statement in module.SQLITE_FORWARDS:
+        match = TRIGGER_NAME_RE.search(statement)
+        if match is not None:
+            triggers[match.group(1)] = statement
+    return triggers
+
+
+def restore(using):
+    """
+    Recreates the missing triggers of applied migrations, returns their names.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return []
+
+    applied = MigrationRecorder(connection).applied_migrations()
+    restored = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {name for name, in cursor.fetchall()}
+
+        for migration, resync in SQLITE_TRIGGERS.items():
+            if ('blogs', migration) not in applied:
+                continue
+
+            missing = {
+                name: statement for name, statement in get_triggers(migration).items()
+                if name not in existing
+            }
+            for statement in missing.values():
+                cursor.execute(statement)
+            if missing:
+                # Writes made while they were missing went unrecorded.
+                cursor.execute(resync)
+            restored += missing
+    return restored
+
+
+def restore_after_migrate(sender, using, **kwargs):
+    restore(using)
@@ -1,12 +1,37 @@
+from django.conf import settings
 from django.db.models import base
+from django.urls import path, re_path
 from rest_framework import urlpatterns
 from rest_framework.routers import SimpleRouter
 
-from .api.views import PostViewSet
+from .api import async_views
+from .api.views import AuthorStatsView, PostViewSet, TagViewSet
 
 
 router = SimpleRouter()
 
 router.register('posts', PostViewSet, basename='post')
+router.register('tags', TagViewSet, basename='tag')
 
-urlpatterns = router.urls
\ No newline at end of file
+post_urls = router.urls
+
+if settings.POSTS_ASYNC_VIEWS:
+    # Swap in the async list and detail views, in place so that
+    # e.g. posts/search/ still matches before posts/<slug>/.
+    async_views_by_name = {
+        'post-list': async_views.post_list,
+        'post-detail': async_views.post_detail
+    }
+    post_urls = [
+        re_path(url.pattern.regex.pattern, async_views_by_name[url.name], name=url.name)
+        if url.name in async_views_by_name else url
+        for url in post_urls
+    ]
+
+urlpatterns = post_urls + [
+    path(
+        'authors/<slug:slug>/stats/',
+        AuthorStatsView.as_view(),
+        name='author-stats'
+    )
+]
\ No newline at end of file
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_counter
+        from .routers import check_connections
+        from .sqlite import configure_connection
+
+        request_started.connect(check_connections)
+        connection_created.connect(configure_connection)
+        connection_created.connect(install_query_counter)
@@ -0,0 +1,40 @@
+"""
+Django's SQLite backend, with a choice of how transactions begin.
+
+By default a transaction starts out reading and only asks for the write
+lock at its first write. If another connection wrote in the meantime, the
+upgrade fails right away with "database is locked", busy_timeout or not.
+OPTIONS['transaction_mode'] = 'IMMEDIATE' takes the write lock when the
+transaction begins instead, so writers queue up one after the other
+(for up to busy_timeout) while readers carry on in WAL mode.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    transaction_mode = None
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        transaction_mode = kwargs.pop('transaction_mode', None)
+        if transaction_mode is not None:
+            transaction_mode = transaction_mode.upper()
+            if transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    f"settings.DATABASES['{self.alias}']['OPTIONS']['transaction_mode'] "
+                    f"must be one of {', '.join(TRANSACTION_MODES)}."
+                )
+        self.transaction_mode = transaction_mode
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        # Connecting first, that's what reads the transaction mode.
+        cursor = self.cursor()
+        if self.transaction_mode is None:
+            cursor.execute('BEGIN')
+        else:
+            cursor.execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,187 @@
+"""
+Response compression, negotiated from Accept-Encoding.
+
+gzip is always available, brotli with the brotli package (a dependency,
+see the Pipfile, but compression falls back to gzip only without it).
+Levels are settings.COMPRESSION_LEVELS, picked to keep within a CPU budget
+(see benchmarks/compression.py). Responses are compressed on the way out
+by middleware.CompressionMiddleware. Bodies that are cached anyway can be
+compressed once with precompress() and served with encoded_response().
+"""
+import zlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Both write the gzip format, 31 is zlib's wbits for a gzip header.
+def _gzip(content, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli(content, level):
+    return brotli.compress(content, quality=level)
+
+
+def _brotli_stream(chunks, level):
+    compressor = brotli.Compressor(quality=level)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# {encoding: (compress, compress_stream)}, ties in Accept-Encoding go to the
+# first one, brotli compresses text better than gzip at the same speed.
+CODECS = {}
+if brotli is not None:
+    CODECS['br'] = (_brotli, _brotli_stream)
+CODECS['gzip'] = (_gzip, _gzip_stream)
+
+
+def parse_accept_encoding(header):
+    """
+    Returns {coding: quality} of an Accept-Encoding header.
+    """
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def negotiate(request, encodings=CODECS):
+    """
+    Returns the one of encodings the client prefers, or None for identity.
+    """
+    qualities = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding, level=None):
+    if level is None:
+        level = settings.COMPRESSION_LEVELS[encoding]
+    return CODECS[encoding][0](content, level)
+
+
+def compress_stream(chunks, encoding, level=None):
+    if level is None:
+        level = settings.COMPRESSION_LEVELS[encoding]
+    return CODECS[encoding][1](chunks, level)
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return (
+        content_type.startswith(settings.COMPRESSION_CONTENT_TYPES) and
+        not response.has_header('Content-Encoding') and
+        'no-transform' not in response.get('Cache-Control', '')
+    )
+
+
+def precompress(content, levels=None):
+    """
+    Returns {encoding: compressed content} for every encoding that makes
+    content smaller, none for content under settings.COMPRESSION_MIN_SIZE.
+    """
+    if len(content) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+
+    encoded = {}
+    for encoding in CODECS:
+        level = levels[encoding] if levels is not None else None
+        compressed = compress(content, encoding, level)
+        if len(compressed) < len(content):
+            encoded[encoding] = compressed
+    return encoded
+
+
+def set_encoding(response, encoding):
+    response['Content-Encoding'] = encoding
+    # The compressed body is another representation, RFC 7232 section 2.1
+    # only allows them to share a weak ETag.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def encoded_response(request, content, encoded, content_type):
+    """
+    Returns a response with content, or the one of its precompress()ed
+    versions in encoded the client accepts.
+    """
+    encoding = negotiate(request, encoded)
+    if encoding is None:
+        response = HttpResponse(content, content_type=content_type)
+    else:
+        response = HttpResponse(encoded[encoding], content_type=content_type)
+        set_encoding(response, encoding)
+
+    if encoded:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def compress_response(request, response):
+    """
+    Compresses response in the encoding the client prefers, if its type is
+    compressible and it's at least settings.COMPRESSION_MIN_SIZE long.
+    """
+    if not is_compressible(response):
+        return response
+    if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+        return response
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = negotiate(request)
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        response.streaming_content = compress_stream(response.streaming_content, encoding)
+        # The compressed size isn't known until it's streamed.
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+    else:
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+
+    set_encoding(response, encoding)
+    return response
@@ -0,0 +1,165 @@
+"""
+Background email delivery. Pick one of the backends below as EMAIL_BACKEND:
+
+ThreadPoolEmailBackend - hands messages to MAIL_THREADS worker threads of
+    this process. Nothing to run next to the server, but queued messages
+    are lost if the process exits.
+DatabaseEmailBackend - stores messages in the QueuedEmail table, for
+    `manage.py run_mail_worker` to send. Inside a transaction (requests
+    aren't, ATOMIC_REQUESTS is off) they're only queued if it commits.
+
+Either way the sending request returns right away. Messages are delivered
+through MAIL_DELIVERY_BACKEND, up to MAIL_BATCH_SIZE over one connection
+(one SMTP handshake), and failed ones are retried up to MAIL_MAX_ATTEMPTS
+times, MAIL_RETRY_DELAY seconds apart, doubling every attempt.
+"""
+import copy
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts):
+    """
+    Returns how many seconds to wait before the next delivery attempt
+    of a message that failed attempts times.
+    """
+    return settings.MAIL_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def deliver(messages):
+    """
+    Sends messages over one MAIL_DELIVERY_BACKEND connection. Returns the
+    exception each message failed with, None for the sent ones.
+    """
+    connection = get_connection(settings.MAIL_DELIVERY_BACKEND)
+    try:
+        connection.open()
+    except Exception as e:
+        return [e] * len(messages)
+
+    errors = []
+    try:
+        for message in messages:
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    return errors
+
+
+def log_given_up(message, attempts, error):
+    logger.error(
+        'Giving up on email to %s after %d attempts: %s',
+        ', '.join(message.recipients()), attempts, error
+    )
+
+
+class Outbox:
+    """
+    The queue and worker threads behind ThreadPoolEmailBackend.
+    """
+
+    def __init__(self, threads):
+        self.queue = queue.SimpleQueue()
+        self.pending = 0
+        self.idle = threading.Condition()
+
+        for i in range(threads):
+            threading.Thread(
+                target=self.work, name=f'mail-worker-{i}', daemon=True
+            ).start()
+
+    def put(self, messages):
+        with self.idle:
+            self.pending += len(messages)
+        for message in messages:
+            self.queue.put((message, 1))
+
+    def join(self, timeout=None):
+        """
+        Waits until every message is sent (or given up on),
+        returns False on timeout.
+        """
+        with self.idle:
+            return self.idle.wait_for(lambda: not self.pending, timeout)
+
+    def work(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < settings.MAIL_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                errors = deliver([message for message, _ in batch])
+            except Exception as e:
+                errors = [e] * len(batch)
+
+            done = 0
+            for (message, attempts), error in zip(batch, errors):
+                if error is None:
+                    done += 1
+                elif attempts >= settings.MAIL_MAX_ATTEMPTS:
+                    log_given_up(message, attempts, error)
+                    done += 1
+                else:
+                    retry = threading.Timer(
+                        retry_delay(attempts),
+                        self.queue.put,
+                        [(message, attempts + 1)]
+                    )
+                    retry.daemon = True
+                    retry.start()
+
+            with self.idle:
+                self.pending -= done
+                self.idle.notify_all()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox(settings.MAIL_THREADS)
+        return _outbox
+
+
+class ThreadPoolEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        messages = [copy.copy(message) for message in email_messages]
+        for message in messages:
+            # The worker threads open their own connections.
+            message.connection = None
+
+        get_outbox().put(messages)
+        return len(messages)
+
+
+class DatabaseEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        from .models import QueuedEmail
+
+        QueuedEmail.objects.enqueue(email_messages)
+        return len(email_messages)
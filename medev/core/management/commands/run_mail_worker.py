@@ -0,0 +1,120 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.mail import deliver, log_given_up, retry_delay
+from core.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Sends the emails queued by core.mail.DatabaseEmailBackend, '
+        'in batches, retrying failed ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Emails per connection, defaults to MAIL_BATCH_SIZE.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no queued email is due instead of waiting for more.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.MAIL_BATCH_SIZE
+        sent = failed = 0
+
+        try:
+            while True:
+                batch_sent, batch_failed = self.send_batch(batch_size)
+                sent += batch_sent
+                failed += batch_failed
+
+                if batch_sent or batch_failed:
+                    self.stdout.write(f'{sent} emails sent, {failed} failed attempts')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {sent} emails, {failed} attempts failed.'
+        ))
+
+    def claim(self, batch_size):
+        """
+        Returns up to batch_size due emails, which aren't due again for
+        MAIL_CLAIM_TIMEOUT seconds. Emails of a worker that died while
+        sending them are retried after that.
+        """
+        with transaction.atomic():
+            due = QueuedEmail.objects.due()
+            # Several workers take turns instead of sending the same emails.
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            queued = list(due[:batch_size])
+
+            QueuedEmail.objects.filter(pk__in=[email.pk for email in queued]).update(
+                next_attempt_at=timezone.now() + timedelta(
+                    seconds=settings.MAIL_CLAIM_TIMEOUT
+                )
+            )
+        return queued
+
+    def send_batch(self, batch_size):
+        """
+        Sends up to batch_size due emails, returns how many were sent
+        and how many failed.
+
+        No transaction is held while sending, on SQLite that would lock
+        every other write out for the whole SMTP round trip.
+        """
+        queued = self.claim(batch_size)
+        if not queued:
+            return 0, 0
+
+        messages = [email.get_message() for email in queued]
+        errors = deliver(messages)
+
+        sent, failed = [], []
+        now = timezone.now()
+        for email, message, error in zip(queued, messages, errors):
+            if error is None:
+                sent.append(email.pk)
+                continue
+
+            email.attempts += 1
+            email.last_error = repr(error)
+            if email.attempts >= settings.MAIL_MAX_ATTEMPTS:
+                log_given_up(message, email.attempts, error)
+                email.next_attempt_at = None
+            else:
+                email.next_attempt_at = now + timedelta(
+                    seconds=retry_delay(email.attempts)
+                )
+            failed.append(email)
+
+        with transaction.atomic():
+            QueuedEmail.objects.filter(pk__in=sent).delete()
+            QueuedEmail.objects.bulk_update(
+                failed, ['attempts', 'last_error', 'next_attempt_at']
+            )
+
+        return len(sent), len(failed)
@@ -0,0 +1,210 @@
+import copy
+import pickle
+import re
+from collections import Counter
+
+from django.db import IntegrityError, connections, models, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+SUFFIX_RE = re.compile(r'^(.*)-(\d+)$')
+
+
+class SlugCounterQuerySet(models.QuerySet):
+    def allocate(self, model, value, field_name='slug'):
+        """
+        Returns a unique slug for value, for the given model, in a constant
+        number of queries however many objects share the same base slug.
+
+        The first object gets the plain base slug, later ones base-2, base-3...
+        Counters only go up, so a slug is never handed out twice for the
+        same base. Another base can still have taken it ("Hello world 2"
+        gets hello-world-2 before the second "Hello world" does), those are
+        skipped.
+        Must be called inside a transaction, the counter row stays locked
+        until it ends, so that concurrent allocations can't collide.
+        """
+        max_length = model._meta.get_field(field_name).max_length
+        base = slugify(value)[:max_length] or model._meta.model_name
+        scope = model._meta.label_lower
+
+        while True:
+            slug = self._format(
+                base, self._increment(model, field_name, scope, base), max_length
+            )
+            if not model._default_manager.filter(**{field_name: slug}).exists():
+                return slug
+
+    def _increment(self, model, field_name, scope, base):
+        """
+        Returns the next suffix of base, seeding its counter if needed.
+        """
+        counters = self.filter(scope=scope, base=base)
+
+        while True:
+            if counters.update(last=models.F('last') + 1):
+                last = counters.values_list('last', flat=True).get()
+                break
+
+            # The first allocation for this base, seed the counter from the
+            # slugs handed out before counters existed (one query, once).
+            last = self._highest_suffix(model, field_name, base) + 1
+            try:
+                with transaction.atomic():
+                    self.create(scope=scope, base=base, last=last)
+                break
+            except IntegrityError:
+                # Seeded concurrently, increment that counter instead.
+                continue
+
+        return last
+
+    def allocate_many(self, model, values, field_name='slug', batch_size=500):
+        """
+        Returns a unique slug for each of values, like allocate(), in a
+        constant number of queries per batch_size values.
+        Must be called inside a transaction.
+        """
+        slugs = []
+        for start in range(0, len(values), batch_size):
+            slugs += self._allocate_batch(
+                model, values[start:start + batch_size], field_name
+            )
+        return slugs
+
+    def _allocate_batch(self, model, values, field_name):
+        max_length = model._meta.get_field(field_name).max_length
+        scope = model._meta.label_lower
+        bases = [
+            slugify(value)[:max_length] or model._meta.model_name
+            for value in values
+        ]
+
+        # Like allocate(), slugs another base already took are skipped, in
+        # the database and within the batch. Those are allocated again.
+        slugs = [None] * len(bases)
+        used = set()
+        pending = range(len(bases))
+        while pending:
+            next_suffix = self._increment_many(
+                model, field_name, scope, Counter(bases[i] for i in pending)
+            )
+            candidates = {}
+            for i in pending:
+                candidates[i] = self._format(bases[i], next_suffix[bases[i]], max_length)
+                next_suffix[bases[i]] += 1
+
+            taken = set(model._default_manager.filter(
+                **{f'{field_name}__in': list(candidates.values())}
+            ).values_list(field_name, flat=True))
+
+            pending = []
+            for i, slug in candidates.items():
+                if slug in taken or slug in used:
+                    pending.append(i)
+                else:
+                    slugs[i] = slug
+                    used.add(slug)
+
+        return slugs
+
+    def _increment_many(self, model, field_name, scope, needed):
+        """
+        Moves the counter of every base in needed ({base: count}) on by its
+        count, seeding missing ones. Returns {base: first new suffix}.
+        """
+        counters = self.filter(scope=scope, base__in=needed)
+        missing = needed.keys() - set(counters.values_list('base', flat=True))
+        if missing:
+            highest = self._highest_suffixes(model, field_name, missing)
+            # Seeded concurrently (conflicts) is fine, the rows are locked
+            # and incremented below either way.
+            self.bulk_create(
+                [
+                    self.model(scope=scope, base=base, last=highest[base])
+                    for base in missing
+                ],
+                ignore_conflicts=True
+            )
+
+        next_suffix = {}
+        counters = list(counters.select_for_update())
+        for counter in counters:
+            next_suffix[counter.base] = counter.last + 1
+            counter.last += needed[counter.base]
+        self.bulk_update(counters, ['last'])
+        return next_suffix
+
+    def _format(self, base, last, max_length):
+        if last == 1:
+            return base
+
+        suffix = f'-{last}'
+        return base[:max_length - len(suffix)] + suffix
+
+    def _highest_suffix(self, model, field_name, base):
+        """
+        Returns the highest N of the existing base/base-N slugs (base counts
+        as 1), or 0 if there are none.
+        """
+        return self._highest_suffixes(model, field_name, [base])[base]
+
+    def _highest_suffixes(self, model, field_name, bases):
+        """
+        Returns {base: _highest_suffix(base)} for every one of bases,
+        in one query.
+        """
+        bases = set(bases)
+        highest = dict.fromkeys(bases, 0)
+
+        queryset = model._default_manager.all()
+        if connections[queryset.db].vendor == 'sqlite':
+            # SQLite's LIKE ignores case, so it can't use the index on the
+            # field. Ranges can: every base-N sorts from base- up to base.
+            # ('.' follows '-').
+            matches = [
+                models.Q(**{field_name: base}) |
+                models.Q(**{f'{field_name}__gte': f'{base}-', f'{field_name}__lt': f'{base}.'})
+                for base in bases
+            ]
+        else:
+            matches = [models.Q(**{f'{field_name}__startswith': base}) for base in bases]
+
+        condition = models.Q()
+        for match in matches:
+            condition |= match
+        slugs = queryset.filter(condition).values_list(field_name, flat=True)
+
+        for slug in slugs.iterator():
+            if slug in bases:
+                highest[slug] = max(highest[slug], 1)
+
+            match = SUFFIX_RE.match(slug)
+            if match and match.group(1) in bases:
+                base, suffix = match.group(1), int(match.group(2))
+                highest[base] = max(highest[base], suffix)
+
+        return highest
+
+
+class QueuedEmailQuerySet(models.QuerySet):
+    def enqueue(self, messages):
+        """
+        Stores the EmailMessages for run_mail_worker to send, in one INSERT.
+        """
+        queued = []
+        for message in messages:
+            message = copy.copy(message)
+            message.connection = None
+            queued.append(self.model(message=pickle.dumps(message)))
+
+        return self.bulk_create(queued)
+
+    def due(self):
+        """
+        Messages waiting to be (re)sent, oldest first.
+        """
+        return self.filter(
+            next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at', 'id')
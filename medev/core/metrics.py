@@ -0,0 +1,457 @@
+"""
+Prometheus metrics, shared by every worker process.
+
+Each process adds to its own memory mapped file in settings.METRICS_DIR,
+<pid>.db, so recording a value is a dict lookup and a write to memory,
+under a lock only the threads of that process contend for. The metrics
+view sums the files of every process, which is why every worker has to be
+pointed at the same directory, on the same host. So that counters never
+go backwards, the files of exited workers are folded into exited.db
+rather than deleted, whenever a process opens its own.
+
+File layout: the number of bytes used, then entries of a key length, the
+key (JSON, padded to 8 bytes) and a double. Entries are only ever appended
+and the used size is written last, so readers never see a partial entry.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+
+
+_USED = struct.Struct('Q')
+_KEY_LENGTH = struct.Struct('I')
+_VALUE = struct.Struct('d')
+
+INITIAL_SIZE = 64 * 1024
+
+# The values of exited processes, and the lock guarding their merging.
+EXITED_FILE = 'exited.db'
+LOCK_FILE = '.lock'
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10
+)
+
+REGISTRY = {}
+
+
+def _padded(length):
+    return (length + 7) // 8 * 8
+
+
+def _read_entries(buffer):
+    """
+    Yields the key and value offset of every entry in buffer.
+    """
+    used = _USED.unpack_from(buffer, 0)[0]
+    position = _USED.size
+    while position < used:
+        length = _KEY_LENGTH.unpack_from(buffer, position)[0]
+        key_start = position + _KEY_LENGTH.size
+        value_offset = _padded(key_start + length)
+        yield bytes(buffer[key_start:key_start + length]).decode(), value_offset
+        position = value_offset + _VALUE.size
+
+
+class _ProcessStore:
+    """
+    The values of this process, in a file only it writes to.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            size = INITIAL_SIZE
+            os.ftruncate(self._file.fileno(), size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        # A file left behind by an earlier process with the same pid.
+        self._used = _USED.unpack_from(self._map, 0)[0] or _USED.size
+        self._offsets = dict(_read_entries(self._map)) if self._used > _USED.size else {}
+        _USED.pack_into(self._map, 0, self._used)
+
+    def _allocate(self, key):
+        encoded = key.encode()
+        value_offset = _padded(self._used + _KEY_LENGTH.size + len(encoded))
+        end = value_offset + _VALUE.size
+
+        if end > len(self._map):
+            size = max(len(self._map) * 2, end)
+            os.ftruncate(self._file.fileno(), size)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), size)
+
+        _KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        key_start = self._used + _KEY_LENGTH.size
+        self._map[key_start:key_start + len(encoded)] = encoded
+        _VALUE.pack_into(self._map, value_offset, 0.0)
+
+        self._used = end
+        _USED.pack_into(self._map, 0, end)
+        self._offsets[key] = value_offset
+        return value_offset
+
+    def add(self, key, amount):
+        with self._lock:
+            offset = self._offsets.get(key) or self._allocate(key)
+            _VALUE.pack_into(
+                self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount
+            )
+
+    def add_many(self, amounts):
+        with self._lock:
+            for key, amount in amounts:
+                offset = self._offsets.get(key) or self._allocate(key)
+                _VALUE.pack_into(
+                    self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount
+                )
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _read_values(data):
+    if len(data) < _USED.size:
+        return []
+    return [
+        (key, _VALUE.unpack_from(data, offset)[0])
+        for key, offset in _read_entries(data)
+    ]
+
+
+@contextmanager
+def _locked(directory, operation):
+    """
+    Holds the directory's lock, shared (fcntl.LOCK_SH) or exclusive
+    (fcntl.LOCK_EX), across processes.
+    """
+    with open(directory / LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, operation)
+        yield
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user.
+        pass
+    return True
+
+
+def merge_exited(directory):
+    """
+    Adds the values in the files of processes that exited to EXITED_FILE,
+    and deletes them.
+    """
+    with _locked(directory, fcntl.LOCK_EX):
+        exited = None
+        try:
+            for path in directory.glob('*.db'):
+                if not path.stem.isdigit() or _is_running(int(path.stem)):
+                    continue
+                if exited is None:
+                    exited = _ProcessStore(directory / EXITED_FILE)
+                exited.add_many(_read_values(path.read_bytes()))
+                path.unlink()
+        finally:
+            if exited is not None:
+                exited.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+
+    store = _store
+    if store is None:
+        with _store_lock:
+            if _store is None:
+                directory = Path(settings.METRICS_DIR)
+                directory.mkdir(parents=True, exist_ok=True)
+                merge_exited(directory)
+                _store = _ProcessStore(directory / f'{os.getpid()}.db')
+            store = _store
+    return store
+
+
+def reset():
+    """
+    Forgets this process' store, the next value opens a new one.
+    """
+    global _store
+    _store = None
+
+
+# A forked worker must not write to its parent's file.
+os.register_at_fork(after_in_child=reset)
+
+
+def _key(name, suffix, label_values):
+    return json.dumps([name, suffix, label_values], separators=(',', ':'))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        REGISTRY[name] = self
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._make_child([str(v) for v in values])
+        return child
+
+
+class _CounterChild:
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def inc(self, amount=1):
+        get_store().add(self.key, amount)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _make_child(self, label_values):
+        return _CounterChild(_key(self.name, '_total', label_values))
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'bucket_keys', 'sum_key', 'count_key')
+
+    def __init__(self, upper_bounds, bucket_keys, sum_key, count_key):
+        self.upper_bounds = upper_bounds
+        self.bucket_keys = bucket_keys
+        self.sum_key = sum_key
+        self.count_key = count_key
+
+    def observe(self, value):
+        # Counts per bucket, they're only made cumulative when exposed.
+        bucket_key = self.bucket_keys[bisect_left(self.upper_bounds, value)]
+        get_store().add_many((
+            (bucket_key, 1), (self.sum_key, value), (self.count_key, 1)
+        ))
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _make_child(self, label_values):
+        return _HistogramChild(
+            self.buckets,
+            [
+                _key(self.name, '_bucket', label_values + [_format_value(bound)])
+                for bound in self.buckets + (float('inf'),)
+            ],
+            _key(self.name, '_sum', label_values),
+            _key(self.name, '_count', label_values)
+        )
+
+
+def collect():
+    """
+    Returns {key: value} summed over the files of every process.
+    """
+    directory = Path(settings.METRICS_DIR)
+    totals = defaultdict(float)
+    if not directory.is_dir():
+        return totals
+
+    # Not while exited files are merged, they'd be counted twice or not at all.
+    with _locked(directory, fcntl.LOCK_SH):
+        for path in directory.glob('*.db'):
+            for key, value in _read_values(path.read_bytes()):
+                totals[key] += value
+    return totals
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f'{{{labels}}}'
+
+
+def render():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    samples = defaultdict(list)
+    for key, value in sorted(collect().items()):
+        name, suffix, label_values = json.loads(key)
+        samples[name].append((suffix, label_values, value))
+
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.type}')
+
+        if metric.type == 'counter':
+            for _, label_values, value in samples[name]:
+                labels = _format_labels(metric.labelnames, label_values)
+                lines.append(f'{name}_total{labels} {_format_value(value)}')
+            continue
+
+        series = defaultdict(lambda: {'_bucket': {}, '_sum': 0.0, '_count': 0.0})
+        for suffix, label_values, value in samples[name]:
+            if suffix == '_bucket':
+                *label_values, bound = label_values
+                series[tuple(label_values)]['_bucket'][bound] = value
+            else:
+                series[tuple(label_values)][suffix] = value
+
+        for label_values, values in series.items():
+            cumulative = 0
+            for bound in metric.buckets + (float('inf'),):
+                bound = _format_value(bound)
+                cumulative += values['_bucket'].get(bound, 0)
+                labels = _format_labels(
+                    metric.labelnames + ('le',), label_values + (bound,)
+                )
+                lines.append(f'{name}_bucket{labels} {_format_value(cumulative)}')
+
+            labels = _format_labels(metric.labelnames, label_values)
+            lines.append(f'{name}_sum{labels} {_format_value(values["_sum"])}')
+            lines.append(f'{name}_count{labels} {_format_value(values["_count"])}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class TimedAuthenticationMixin:
+    """
+    Records how long a DRF authentication class takes in
+    AUTHENTICATION_SECONDS, whenever it was given credentials
+    (it authenticated the request or rejected it).
+    """
+
+    def authenticate(self, request):
+        started = time.perf_counter()
+        try:
+            user_auth = super().authenticate(request)
+        except APIException:
+            self._observe('failure', started)
+            raise
+
+        if user_auth is not None:
+            self._observe('success', started)
+        return user_auth
+
+    def _observe(self, result, started):
+        AUTHENTICATION_SECONDS.labels(type(self).__name__, result).observe(
+            time.perf_counter() - started
+        )
+
+
+class QueryCount:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+
+# The count of the current request. A ContextVar rather than a thread
+# local: under ASGI the request's queries run in other threads, which get a
+# copy of the context, and with it the same QueryCount.
+_query_count = ContextVar('query_count', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    count = _query_count.get()
+    if count is not None:
+        count.value += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created receiver, counts the queries of every connection.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+@contextmanager
+def counting_queries():
+    """
+    Counts the queries run in the block, and in the threads it hands work
+    to with asgiref's sync_to_async. Yields the QueryCount.
+    """
+    count = QueryCount()
+    token = _query_count.set(count)
+    try:
+        yield count
+    finally:
+        _query_count.reset(token)
+
+
+HTTP_REQUESTS = Counter(
+    'medev_http_requests',
+    'HTTP requests by view (URL name), method and status code.',
+    ('view', 'method', 'status')
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'medev_http_request_duration_seconds',
+    'Time to produce the response by view and method.',
+    ('view', 'method')
+)
+DB_QUERIES = Histogram(
+    'medev_db_queries_per_request',
+    'Database queries per request by view.',
+    ('view',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+CACHE_REQUESTS = Counter(
+    'medev_cache_requests',
+    'Cache lookups by cache and result (hit or miss).',
+    ('cache', 'result')
+)
+AUTHENTICATION_SECONDS = Histogram(
+    'medev_authentication_duration_seconds',
+    'Time taken by authentication classes that were given credentials, '
+    'by class and result.',
+    ('authenticator', 'result')
+)
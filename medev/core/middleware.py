@@ -0,0 +1,183 @@
+import asyncio
+import itertools
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import compression, metrics, profiling, routers
+
+
+class AsyncCapableMiddleware:
+    """
+    Runs in the mode of the middleware after it, like Django's
+    MiddlewareMixin, so that under ASGI Django doesn't have to adapt it,
+    which runs the rest of every request in a thread. Subclasses implement
+    both __call__ and __acall__, __call__ starting with:
+
+        if self.is_async:
+            return self.__acall__(request)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Makes the instance itself pass as a coroutine function.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class ReplicaStickinessMiddleware(AsyncCapableMiddleware):
+    """
+    Pins a client's reads to the primary database for
+    settings.DATABASE_STICKY_SECONDS after it last wrote, remembered in
+    a cookie, and those of requests that may write from the start, so
+    what they validate against isn't behind. Has to come before anything
+    that reads from the database.
+    """
+    cookie_name = 'db_primary_until'
+    safe_methods = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end_request(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.end_request(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        try:
+            primary_until = float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            primary_until = 0
+
+        return routers.start_request(
+            pinned=primary_until > time.time() or request.method not in self.safe_methods
+        )
+
+    def finish(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie_name,
+                str(time.time() + settings.DATABASE_STICKY_SECONDS),
+                max_age=settings.DATABASE_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """
+    Compresses responses with gzip or brotli, whichever the client prefers
+    (see core/compression.py). Has to come before anything that reads or
+    changes the body, but after MetricsMiddleware so it's timed.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return compression.compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compression.compress_response(request, await self.get_response(request))
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """
+    Counts requests by view, method and status and records how long they
+    took and how many queries they ran (see core/metrics.py). Put it first
+    in MIDDLEWARE to time everything after it.
+    """
+    methods = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        with metrics.counting_queries() as queries:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.record(request, response, time.perf_counter() - started, queries.value)
+        return response
+
+    async def __acall__(self, request):
+        with metrics.counting_queries() as queries:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            self.record(request, response, time.perf_counter() - started, queries.value)
+        return response
+
+    def record(self, request, response, duration, queries):
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        # Arbitrary methods would make for arbitrarily many series.
+        method = request.method if request.method in self.methods else 'other'
+
+        metrics.HTTP_REQUESTS.labels(view, method, response.status_code).inc()
+        metrics.HTTP_REQUEST_SECONDS.labels(view, method).observe(duration)
+        metrics.DB_QUERIES.labels(view).observe(queries)
+
+
+class ProfilingMiddleware:
+    """
+    Measures where each request's time goes: in total, in SQL (with the
+    number of queries and duplicates) and in the serializers mixing in
+    profiling.ProfiledSerializerMixin. Sends it back in a Server-Timing
+    header and logs it (see core/profiling.py).
+
+    Every settings.PROFILING_SAMPLE_RATE-th request is also run under
+    PROFILING_SAMPLER ('cprofile' or 'tracemalloc'), saved to a file in
+    PROFILING_SAMPLE_DIR. Samples that fail are logged, and the request
+    goes on without them.
+
+    Opt-in, put it first in MIDDLEWARE to time everything after it.
+    Queries of streamed response bodies and of other threads aren't counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.requests = itertools.count(1)
+
+    def __call__(self, request):
+        sample_rate = settings.PROFILING_SAMPLE_RATE
+        sampled = bool(sample_rate) and next(self.requests) % sample_rate == 0
+        sample = None
+
+        profile = profiling.RequestProfile()
+        token = profiling.start(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+                if sampled:
+                    sample = stack.enter_context(profiling.sample(
+                        settings.PROFILING_SAMPLER, settings.PROFILING_SAMPLE_DIR
+                    ))
+
+                response = self.get_response(request)
+        finally:
+            profiling.stop(token)
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join(filter(None, [
+            response.get('Server-Timing'), profile.server_timing(total)
+        ]))
+        profile.log(request, response, total, sample)
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100)),
+                ('base', models.CharField(max_length=100)),
+                ('last', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='slugcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'base'), name='core_slugcounter_scope_base_uniq'),
+        ),
+    ]
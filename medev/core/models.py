@@ -1,4 +1,10 @@
-from django.db import models
+import pickle
+
+from django.apps import apps
+from django.db import models, transaction
+from django.utils import timezone
+
+from .managers import QueuedEmailQuerySet, SlugCounterQuerySet
 
 
 class BaseModel(models.Model):
@@ -6,4 +12,118 @@ class BaseModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class SlugCounter(models.Model):
+    """
+    The last suffix handed out for a base slug, per model (scope).
+    """
+    scope = models.CharField(max_length=100)
+    base = models.CharField(max_length=100)
+    last = models.PositiveIntegerField(default=1)
+
+    objects = SlugCounterQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'base'],
+                name='core_slugcounter_scope_base_uniq'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.scope}: {self.base}-{self.last}'
+
+
+class SluggedModel(models.Model):
+    """
+    Keeps a unique slug field generated from slug_source.
+
+    Slugs are only (re)generated when the model has none yet or slug_source
+    changed, through SlugCounter, so saving costs a constant number of
+    queries. Replaced slugs are stored in slug_redirect_model (an
+    'app_label.Model' with a 'slug' field and a foreign key named after
+    this model), so that old URLs keep working.
+
+    previous_slug is the slug as loaded from (or last saved to) the
+    database, it stays the old value until save() returns.
+    """
+    slug_source = None
+    slug_redirect_model = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_slug()
+        return instance
+
+    def _remember_slug(self):
+        loaded = self.get_deferred_fields()
+        self.previous_slug = None if 'slug' in loaded else self.slug
+        self._previous_slug_source = (
+            None if self.slug_source in loaded
+            else getattr(self, self.slug_source)
+        )
+
+    def _slug_outdated(self):
+        if self.slug is None:
+            return True
+        # New objects with a slug have been given one deliberately
+        # (e.g. by a batch allocation), as have objects not loaded from the db.
+        if self._state.adding or not hasattr(self, '_previous_slug_source'):
+            return False
+        return getattr(self, self.slug_source) != self._previous_slug_source
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        source_saved = update_fields is None or self.slug_source in update_fields
+
+        with transaction.atomic(using=kwargs.get('using')):
+            old_slug = self.slug
+            if source_saved and self._slug_outdated():
+                self.slug = SlugCounter.objects.allocate(
+                    type(self),
+                    getattr(self, self.slug_source)
+                )
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'slug'}
+
+            super().save(*args, **kwargs)
+
+            if old_slug is not None and old_slug != self.slug:
+                redirects = apps.get_model(self.slug_redirect_model)
+                redirects._default_manager.update_or_create(
+                    slug=old_slug,
+                    defaults={self._meta.model_name: self}
+                )
+
+        self._remember_slug()
+
+
+class QueuedEmail(BaseModel):
+    """
+    An email waiting for run_mail_worker to send it (see core/mail.py).
+    Sent messages are deleted, ones that are given up on stay with
+    next_attempt_at unset and their last error.
+    """
+    message = models.BinaryField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        default=timezone.now,
+        db_index=True
+    )
+    last_error = models.TextField(blank=True)
+
+    objects = QueuedEmailQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.pk}: {self.attempts} attempts'
+
+    def get_message(self):
+        return pickle.loads(self.message)
@@ -0,0 +1,233 @@
+"""
+Per-request profiling, see middleware.ProfilingMiddleware.
+
+The profile of the current request is kept in a ContextVar. Queries on
+any connection and serializers with ProfiledSerializerMixin add to it
+while it's set, and cost next to nothing when it isn't.
+
+Profiles are logged as one JSON object per line to the 'core.profiling'
+logger.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+
+SAMPLE_EXTENSIONS = {
+    'cprofile': 'prof',
+    'tracemalloc': 'tracemalloc',
+}
+
+# Tracing is process wide, requests sampled at the same time share it: the
+# last one to finish stops it, if it was started here.
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+class RequestProfile:
+    def __init__(self):
+        # (sql, params) of every query, in order.
+        self.queries = []
+        self.sql_time = 0
+        # Seconds spent per timed section, e.g. 'serialize-post'.
+        self.timings = defaultdict(float)
+
+    @property
+    def duplicates(self):
+        """
+        Number of queries that repeat an earlier one, params and all.
+        """
+        return sum(count - 1 for count in Counter(self.queries).values())
+
+    def record_query(self, execute, sql, params, many, context):
+        """
+        A connection.execute_wrapper(), times every query.
+        """
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries.append((sql, None if many else repr(params)))
+
+    def server_timing(self, total):
+        """
+        Returns the Server-Timing header value, durations in milliseconds.
+        """
+        duplicates = self.duplicates
+        metrics = [
+            f'total;dur={total * 1000:.2f}',
+            f'sql;dur={self.sql_time * 1000:.2f};desc="{len(self.queries)} queries '
+            f'({duplicates} duplicate{"" if duplicates == 1 else "s"})"',
+        ]
+        metrics += [
+            f'{name};dur={seconds * 1000:.2f}'
+            for name, seconds in sorted(self.timings.items())
+        ]
+        return ', '.join(metrics)
+
+    def log(self, request, response, total, sample=None):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'queries': len(self.queries),
+            'duplicates': self.duplicates,
+            'timings_ms': {
+                name: round(seconds * 1000, 2)
+                for name, seconds in sorted(self.timings.items())
+            },
+        }
+        if sample is not None:
+            record['sample'] = str(sample)
+        logger.info(json.dumps(record), extra={'profile': record})
+
+
+def start(profile):
+    return _current.set(profile)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """
+    Returns the profile of the current request, or None.
+    """
+    return _current.get()
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_started
+
+    with _tracing_lock:
+        if not _tracing_users and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    """
+    Returns a snapshot of what's traced so far, and stops tracing if no
+    other sample still needs it.
+    """
+    global _tracing_users, _tracing_started
+
+    try:
+        return tracemalloc.take_snapshot()
+    finally:
+        with _tracing_lock:
+            _tracing_users -= 1
+            if not _tracing_users and _tracing_started:
+                tracemalloc.stop()
+                _tracing_started = False
+
+
+def _start_sampler(sampler, path):
+    """
+    Starts sampler, returns a function that stops it and saves to path.
+    """
+    if sampler == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def stop():
+            profiler.disable()
+            profiler.dump_stats(path)
+    else:
+        # Concurrent requests show up in the snapshot too.
+        _start_tracing()
+
+        def stop():
+            _stop_tracing().dump(str(path))
+    return stop
+
+
+@contextmanager
+def sample(sampler, directory):
+    """
+    Runs the block under sampler ('cprofile' or 'tracemalloc') and saves
+    the stats (for pstats) or the snapshot (for tracemalloc.Snapshot.load)
+    in directory. Yields the path of the file, or None if sampling failed
+    to start. Failures are logged, never raised into the block.
+    """
+    if sampler not in SAMPLE_EXTENSIONS:
+        raise ImproperlyConfigured(
+            f"settings.PROFILING_SAMPLER must be one of {', '.join(SAMPLE_EXTENSIONS)}."
+        )
+
+    directory = Path(directory)
+    path = directory / (
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{time.monotonic_ns()}'
+        f'.{SAMPLE_EXTENSIONS[sampler]}'
+    )
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        stop = _start_sampler(sampler, path)
+    except Exception:
+        logger.exception('Could not start the %s sampler.', sampler)
+        yield None
+        return
+
+    try:
+        yield path
+    finally:
+        try:
+            stop()
+        except Exception:
+            logger.exception('Could not save the %s sample to %s.', sampler, path)
+
+
+@contextmanager
+def timed(name):
+    """
+    Adds the time the block takes to the request profile, under name.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.timings[name] += time.perf_counter() - started
+
+
+class ProfiledSerializerMixin:
+    """
+    Adds the time taken serializing instances to the request profile,
+    under profile_name. Includes the time of nested serializers.
+    """
+    profile_name = None
+
+    def to_representation(self, instance):
+        profile = _current.get()
+        if profile is None:
+            return super().to_representation(instance)
+
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.timings[self.profile_name] += time.perf_counter() - started
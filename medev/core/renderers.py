@@ -0,0 +1,47 @@
+"""
+JSON rendering with orjson, a dependency (see the Pipfile). Without it,
+e.g. on a platform it has no wheels for, FastJSONRenderer is JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _unsupported(value):
+    raise TypeError
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders the same bytes as JSONRenderer, several times faster. Falls
+    back to JSONRenderer for indented or ASCII-only output and for values
+    orjson would write differently (datetimes, dataclasses, anything it
+    doesn't know). Floats aren't caught, orjson writes 1e16 where
+    JSONRenderer writes 1e+16, so only use it for views without them.
+    """
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson is not None else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or
+            data is None or
+            self.ensure_ascii or
+            not self.compact or
+            self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            rendered = orjson.dumps(data, default=_unsupported, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Like JSONRenderer, escape the two characters JavaScript doesn't
+        # allow in string literals.
+        return rendered.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,117 @@
+"""
+Read replica routing.
+
+Reads of the models in settings.DATABASE_REPLICA_MODELS (posts, tags and
+their stats) go to a random healthy replica from DATABASE_REPLICAS,
+everything else, and every write, to the primary ('default').
+
+Reads go to the primary too:
+    - inside a transaction on the primary.
+    - for the whole of a request with an unsafe method (POST, PUT, ...).
+    - for the rest of a request once it wrote anything.
+    - for DATABASE_STICKY_SECONDS after a client's last write, so that
+      clients read their own writes despite replication lag (see
+      middleware.ReplicaStickinessMiddleware).
+
+A replica that can't be connected to is skipped for
+DATABASE_REPLICA_RETRY_SECONDS.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+class RequestState:
+    def __init__(self, pinned=False):
+        # Read from the primary.
+        self.pinned = pinned
+        # Wrote to the primary.
+        self.wrote = False
+
+
+# Mutated rather than set, so that views run in another thread
+# (sync_to_async copies the context) still report their writes.
+_request_state = ContextVar('replica_request_state', default=None)
+
+_down_until = {}
+
+
+def start_request(pinned=False):
+    state = RequestState(pinned)
+    return state, _request_state.set(state)
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+def get_replicas():
+    """
+    Returns the replicas that aren't known to be down.
+    """
+    now = time.monotonic()
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if _down_until.get(alias, 0) <= now
+    ]
+
+
+def mark_down(alias):
+    _down_until[alias] = time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS
+
+
+def is_connectable(alias):
+    """
+    Connects to the alias unless it already is, marking it down on failure.
+    """
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        mark_down(alias)
+        return False
+    return True
+
+
+def check_connections(**kwargs):
+    """
+    Closes persistent connections that went bad while idle, of every
+    database with CONN_HEALTH_CHECKS set. Runs when a request starts.
+    """
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get('CONN_HEALTH_CHECKS') and
+            connection.connection is not None and
+            not connection.is_usable()
+        ):
+            connection.close()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in settings.DATABASE_REPLICA_MODELS:
+            return None
+
+        state = _request_state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        replicas = get_replicas()
+        random.shuffle(replicas)
+        for alias in replicas:
+            if is_connectable(alias):
+                return alias
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
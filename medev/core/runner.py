@@ -0,0 +1,26 @@
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import metrics
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with settings.METRICS_DIR in a temporary directory, so
+    they don't write to the one a server from the same checkout uses.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.metrics_settings = override_settings(METRICS_DIR=self.metrics_dir.name)
+        self.metrics_settings.enable()
+        metrics.reset()
+
+    def teardown_test_environment(self, **kwargs):
+        metrics.reset()
+        self.metrics_settings.disable()
+        self.metrics_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
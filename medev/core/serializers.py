@@ -0,0 +1,115 @@
+"""
+A read-only fast path for simple ModelSerializers.
+
+DRF builds every representation field by field, through each field's
+get_attribute() and to_representation(). For serializers made of plain
+character fields and nested serializers of the same, FastRepresentation
+resolves the fields once and then builds the same dicts straight from
+model instances, or from .values() rows, which skips creating the
+instances as well.
+
+get_fast_representation() returns None for serializers it can't reproduce
+exactly (other field types, dotted or callable sources, a custom
+to_representation), those have to go through DRF.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+from .profiling import ProfiledSerializerMixin
+
+
+# Fields whose to_representation() is str(value).
+STRING_FIELDS = (serializers.CharField, serializers.SlugField, serializers.EmailField)
+
+# Classes whose to_representation() doesn't change the result.
+TRANSPARENT_CLASSES = (ProfiledSerializerMixin,)
+
+
+class Unsupported(Exception):
+    pass
+
+
+class FastRepresentation:
+    def __init__(self, serializer_class, prefix=''):
+        if not issubclass(serializer_class, serializers.ModelSerializer):
+            raise Unsupported(f'{serializer_class.__name__} is not a ModelSerializer.')
+        for klass in serializer_class.__mro__:
+            if klass in (serializers.ModelSerializer, serializers.Serializer):
+                break
+            if 'to_representation' in vars(klass) and klass not in TRANSPARENT_CLASSES:
+                raise Unsupported(f'{klass.__name__} overrides to_representation().')
+
+        model = serializer_class.Meta.model
+        # (name, attribute, values() lookup, nested representation or None)
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if len(field.source_attrs) != 1:
+                raise Unsupported(f'{name} has a dotted or "*" source.')
+
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                raise Unsupported(f'{name} is not a model field.')
+            if not model_field.concrete:
+                raise Unsupported(f'{name} is not a concrete field.')
+
+            lookup = prefix + model_field.name
+            if type(field) in STRING_FIELDS and not model_field.is_relation:
+                self.fields.append((name, model_field.name, lookup, None))
+            elif isinstance(field, serializers.ModelSerializer) and model_field.many_to_one:
+                nested = FastRepresentation(type(field), prefix=f'{lookup}__')
+                self.fields.append((name, model_field.name, lookup, nested))
+            else:
+                raise Unsupported(f'{name} is a {type(field).__name__}.')
+
+    @property
+    def lookups(self):
+        """
+        The .values() lookups from_row() needs.
+        """
+        lookups = []
+        for _, _, lookup, nested in self.fields:
+            lookups.append(lookup)
+            if nested is not None:
+                lookups += nested.lookups
+        return lookups
+
+    def from_instance(self, instance):
+        data = {}
+        for name, attribute, _, nested in self.fields:
+            value = getattr(instance, attribute)
+            if value is None:
+                data[name] = None
+            elif nested is None:
+                data[name] = str(value)
+            else:
+                data[name] = nested.from_instance(value)
+        return data
+
+    def from_row(self, row):
+        data = {}
+        for name, _, lookup, nested in self.fields:
+            # For a relation, the foreign key.
+            value = row[lookup]
+            if value is None:
+                data[name] = None
+            elif nested is None:
+                data[name] = str(value)
+            else:
+                data[name] = nested.from_row(row)
+        return data
+
+
+@lru_cache(maxsize=None)
+def get_fast_representation(serializer_class):
+    """
+    Returns the FastRepresentation of serializer_class, or None.
+    """
+    try:
+        return FastRepresentation(serializer_class)
+    except Unsupported:
+        return None
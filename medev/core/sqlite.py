@@ -0,0 +1,22 @@
+"""
+SQLite tuning, applied to every new SQLite connection.
+
+In its default rollback journal mode, SQLite locks every reader out while
+a write commits. settings.SQLITE_PRAGMAS switches to WAL, where readers
+keep reading the last commit while a writer appends to the log, and
+sizes the page cache and memory map. Writers still take turns, see
+core/backends/sqlite3 for queueing them up rather than failing.
+"""
+from django.conf import settings
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    Applies settings.SQLITE_PRAGMAS to a new SQLite connection.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
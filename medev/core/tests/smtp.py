@@ -0,0 +1,82 @@
+"""
+A local SMTP server standing in for the real one in tests.
+"""
+import socketserver
+import threading
+from email import message_from_bytes
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+
+        self.reply('220 localhost test SMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+
+            command = line.decode().strip().split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.receive()
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def receive(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if line in (b'.\r\n', b''):
+                break
+            # Undo the dot-stuffing.
+            lines.append(line[1:] if line.startswith(b'.') else line)
+
+        server = self.server
+        with server.lock:
+            if server.failures:
+                server.failures -= 1
+                self.reply('451 Try again later')
+                return
+            server.messages.append(message_from_bytes(b''.join(lines)))
+        self.reply('250 Queued')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Accepts every message on a free local port, into .messages.
+    The next .failures messages are rejected with a temporary error.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.failures = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
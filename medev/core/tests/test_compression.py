@@ -0,0 +1,212 @@
+import asyncio
+import gzip
+import json
+
+import brotli
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from blogs.models import Post
+
+from .. import compression
+from ..middleware import CompressionMiddleware
+
+
+User = get_user_model()
+
+
+class TestNegotiation(SimpleTestCase):
+    """ Test cases for negotiating the encoding from Accept-Encoding. """
+
+    def negotiate(self, accept_encoding):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return compression.negotiate(request, ('br', 'gzip'))
+
+    def test_preferred_encoding(self):
+        """ The encoding with the highest quality is picked. """
+        self.assertEquals(self.negotiate('gzip'), 'gzip')
+        self.assertEquals(self.negotiate('gzip, br;q=0.5'), 'gzip')
+        self.assertEquals(self.negotiate('GZIP;q=0.5, br;q=0.8'), 'br')
+
+    def test_ties_prefer_brotli(self):
+        """ Between equally accepted encodings the first one is picked. """
+        self.assertEquals(self.negotiate('gzip, deflate, br'), 'br')
+        self.assertEquals(self.negotiate('*'), 'br')
+
+    def test_refused_encodings(self):
+        """ Encodings with a quality of 0, or not listed, aren't used. """
+        self.assertIsNone(self.negotiate(''))
+        self.assertIsNone(self.negotiate('identity, deflate'))
+        self.assertIsNone(self.negotiate('br;q=0, gzip;q=0'))
+        self.assertEquals(self.negotiate('br;q=0, *'), 'gzip')
+        self.assertIsNone(self.negotiate('gzip;q=invalid'))
+
+
+class TestCompressResponse(SimpleTestCase):
+    """ Test cases for compressing responses. """
+
+    def setUp(self):
+        self.request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.content = json.dumps([{'content': f'post {i}'} for i in range(200)]).encode()
+
+    def compress(self, response):
+        return compression.compress_response(self.request, response)
+
+    def test_compresses(self):
+        """ Large enough responses are compressed, and only ever get weak ETags. """
+        response = HttpResponse(self.content, content_type='application/json')
+        response['ETag'] = '"etag"'
+        response = self.compress(response)
+
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(response['Vary'], 'Accept-Encoding')
+        self.assertEquals(response['ETag'], 'W/"etag"')
+        self.assertEquals(int(response['Content-Length']), len(response.content))
+        self.assertEquals(gzip.decompress(response.content), self.content)
+
+    def test_compresses_with_brotli(self):
+        """ Clients that prefer brotli get it. """
+        self.request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        response = self.compress(HttpResponse(self.content, content_type='application/json'))
+
+        self.assertEquals(response['Content-Encoding'], 'br')
+        self.assertEquals(int(response['Content-Length']), len(response.content))
+        self.assertEquals(brotli.decompress(response.content), self.content)
+
+        lines = [line + b'\n' for line in self.content.split(b', ')]
+        response = self.compress(
+            StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        )
+
+        self.assertEquals(response['Content-Encoding'], 'br')
+        self.assertEquals(
+            brotli.decompress(b''.join(response.streaming_content)), b''.join(lines)
+        )
+
+    def test_compresses_streams(self):
+        """ Streaming responses are compressed as they're streamed. """
+        lines = [line + b'\n' for line in self.content.split(b', ')]
+        response = self.compress(
+            StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        )
+
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(
+            gzip.decompress(b''.join(response.streaming_content)), b''.join(lines)
+        )
+
+    def test_leaves_out_responses(self):
+        """ Short, incompressible and already encoded responses are left as they are. """
+        responses = [
+            HttpResponse(b'{}', content_type='application/json'),
+            HttpResponse(self.content, content_type='image/png'),
+            HttpResponse(self.content, content_type='application/json'),
+            # Pages with CSRF tokens, see settings.COMPRESSION_CONTENT_TYPES.
+            HttpResponse(self.content, content_type='text/html; charset=utf-8'),
+        ]
+        responses[2]['Cache-Control'] = 'no-transform'
+        encoded = HttpResponse(self.content, content_type='application/json')
+        encoded['Content-Encoding'] = 'identity'
+        responses.append(encoded)
+
+        for response in responses:
+            content = response.content
+            response = self.compress(response)
+            self.assertEquals(response.content, content)
+            self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_not_accepted(self):
+        """ Without gzip in Accept-Encoding, only Vary is set. """
+        self.request = RequestFactory().get('/')
+        response = self.compress(HttpResponse(self.content, content_type='application/json'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEquals(response['Vary'], 'Accept-Encoding')
+        self.assertEquals(response.content, self.content)
+
+    def test_precompress(self):
+        """ Content is compressed ahead of time only if it's long enough. """
+        self.assertEquals(compression.precompress(b'{}'), {})
+
+        encoded = compression.precompress(self.content, {'br': 1, 'gzip': 1})
+        self.assertEquals(gzip.decompress(encoded['gzip']), self.content)
+        self.assertEquals(brotli.decompress(encoded['br']), self.content)
+
+
+class TestCompressionMiddleware(TestCase):
+    """ Test cases for the compression of API responses. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.post = Post.objects.create(
+            title='Test title',
+            content='test content ' * 500,
+            author=self.user
+        )
+
+    def test_compresses_api_responses(self):
+        """ The post responses come back gzipped. """
+        url = reverse('post-detail', kwargs={'slug': self.post.slug})
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(
+            json.loads(gzip.decompress(response.content))['content'],
+            self.post.content
+        )
+
+    def test_cached_feeds_in_brotli(self):
+        """ Cached feeds are served in brotli to clients that prefer it. """
+        url = f'{reverse("post-list")}?user={self.user.slug}'
+        self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=1, gzip;q=0.5')
+
+        self.assertEquals(response['Content-Encoding'], 'br')
+        self.assertEquals(
+            json.loads(brotli.decompress(response.content))['results'][0]['content'],
+            self.post.content
+        )
+
+    def test_compresses_export(self):
+        """ The streamed export comes back gzipped. """
+        response = self.client.get(
+            f'{reverse("post-export")}?user={self.user.slug}',
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEquals(json.loads(lines[0])['slug'], self.post.slug)
+
+    def test_browsable_api_not_compressed(self):
+        """ HTML pages, which carry a CSRF token, are left uncompressed. """
+        url = reverse('post-detail', kwargs={'slug': self.post.slug})
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_ACCEPT='text/html')
+
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    async def test_middleware_runs_async(self):
+        """ Under ASGI the middleware doesn't need adapting. """
+        content = json.dumps({'content': self.post.content}).encode()
+
+        async def get_response(request):
+            return HttpResponse(content, content_type='application/json')
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(gzip.decompress(response.content), content)
@@ -0,0 +1,160 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..mail import get_outbox
+from ..models import QueuedEmail
+from .smtp import SMTPServer
+
+
+User = get_user_model()
+
+
+class MailTestCase(TestCase):
+    def setUp(self):
+        self.smtp = SMTPServer()
+        self.smtp.__enter__()
+        self.addCleanup(self.smtp.__exit__)
+
+        settings = override_settings(
+            MAIL_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp.port,
+            MAIL_MAX_ATTEMPTS=2,
+            MAIL_RETRY_DELAY=0
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def send(self, amount):
+        mail.send_mass_mail([
+            ('Subject', 'Body', 'from@mail.com', [f'to{i}@mail.com'])
+            for i in range(amount)
+        ])
+
+    def recipients(self):
+        return sorted(message['To'] for message in self.smtp.messages)
+
+
+@override_settings(EMAIL_BACKEND='core.mail.ThreadPoolEmailBackend')
+class TestThreadPoolEmailBackend(MailTestCase):
+    """ Test cases for sending emails from background threads. """
+
+    def test_sends_in_background(self):
+        """ Emails are handed to the worker threads and sent from there. """
+        self.send(3)
+
+        self.assertTrue(get_outbox().join(timeout=5))
+        self.assertEquals(self.recipients(), ['to0@mail.com', 'to1@mail.com', 'to2@mail.com'])
+
+    def test_retries(self):
+        """ Failed emails are retried, up to MAIL_MAX_ATTEMPTS times. """
+        self.smtp.failures = 3
+
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.send(2)
+            self.assertTrue(get_outbox().join(timeout=5))
+
+        self.assertEquals(len(self.smtp.messages), 1)
+
+    def test_password_reset(self):
+        """ Password reset emails are sent through the background threads. """
+        User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+        response = self.client.post(
+            reverse('rest_password_reset'),
+            {'email': 'test@mail.com'}
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertTrue(get_outbox().join(timeout=5))
+        self.assertEquals(self.recipients(), ['test@mail.com'])
+
+
+@override_settings(EMAIL_BACKEND='core.mail.DatabaseEmailBackend')
+class TestDatabaseEmailBackend(MailTestCase):
+    """ Test cases for queueing emails in the database for run_mail_worker. """
+
+    def run_worker(self, **options):
+        out = StringIO()
+        call_command('run_mail_worker', once=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_queues_emails(self):
+        """ Sending only stores the emails. """
+        self.send(2)
+
+        self.assertEquals(QueuedEmail.objects.count(), 2)
+        self.assertEquals(self.smtp.messages, [])
+
+    def test_worker_sends_in_batches(self):
+        """ The worker sends batch_size emails per connection and deletes them. """
+        self.send(3)
+
+        out = self.run_worker(batch_size=2)
+
+        self.assertIn('Sent 3 emails', out)
+        self.assertEquals(self.smtp.connections, 2)
+        self.assertEquals(len(self.recipients()), 3)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    @override_settings(MAIL_CLAIM_TIMEOUT=60)
+    def test_worker_claims_emails(self):
+        """ Emails being sent aren't due, until the claim times out. """
+        self.send(2)
+        due_while_sending = []
+
+        def claimed_deliver(messages):
+            due_while_sending.append(QueuedEmail.objects.due().count())
+            raise KeyboardInterrupt
+
+        with mock.patch(
+            'core.management.commands.run_mail_worker.deliver',
+            side_effect=claimed_deliver
+        ):
+            self.run_worker()
+
+        self.assertEquals(due_while_sending, [0])
+        self.assertFalse(QueuedEmail.objects.due().exists())
+
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.run_worker()
+
+        self.assertFalse(QueuedEmail.objects.exists())
+        self.assertEquals(len(self.recipients()), 2)
+
+    def test_worker_retries(self):
+        """ Failed emails are retried until they're sent. """
+        self.smtp.failures = 1
+        self.send(1)
+
+        out = self.run_worker()
+
+        self.assertIn('Sent 1 emails, 1 attempts failed', out)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_worker_gives_up(self):
+        """ Emails are kept, but not retried, after MAIL_MAX_ATTEMPTS. """
+        self.smtp.failures = 2
+        self.send(1)
+
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.run_worker()
+
+        email = QueuedEmail.objects.get()
+        self.assertEquals(email.attempts, 2)
+        self.assertIsNone(email.next_attempt_at)
+        self.assertIn('Try again later', email.last_error)
+        self.assertEquals(self.smtp.messages, [])
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from blogs.models import Post
+
+from .. import metrics
+from ..middleware import MetricsMiddleware
+
+
+User = get_user_model()
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        settings = override_settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def get_samples(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEquals(response.status_code, 200)
+
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+
+class TestMetricsView(MetricsTestCase):
+    """ Test cases for the metrics endpoint. """
+
+    def setUp(self):
+        super().setUp()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        Post.objects.create(title='Hello world', content='test content', author=self.user)
+        self.url = f'{reverse("post-list")}?user={self.user.slug}'
+
+    def test_requests(self):
+        """ Counts requests and their queries by view, method and status. """
+        self.client.get(self.url)
+        self.client.get(reverse('post-detail', kwargs={'slug': 'unknown'}))
+
+        samples = self.get_samples()
+
+        self.assertEquals(
+            samples['medev_http_requests_total{view="post-list",method="GET",status="200"}'], 1
+        )
+        self.assertEquals(
+            samples['medev_http_requests_total{view="post-detail",method="GET",status="404"}'], 1
+        )
+        self.assertEquals(
+            samples['medev_http_request_duration_seconds_count{view="post-list",method="GET"}'], 1
+        )
+        self.assertEquals(
+            samples['medev_http_request_duration_seconds_bucket{view="post-list",method="GET",le="+Inf"}'], 1
+        )
+        # The ETag aggregate and the page.
+        self.assertEquals(samples['medev_db_queries_per_request_sum{view="post-list"}'], 2)
+        self.assertEquals(
+            samples['medev_db_queries_per_request_bucket{view="post-list",le="1.0"}'], 0
+        )
+        self.assertEquals(
+            samples['medev_db_queries_per_request_bucket{view="post-list",le="2.0"}'], 1
+        )
+
+    def test_middleware_runs_async(self):
+        """ Under ASGI the middleware counts the queries run in threads. """
+        async def get_response(request):
+            await sync_to_async(User.objects.count)()
+            return HttpResponse()
+
+        middleware = MetricsMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get('/'))
+
+        samples = self.get_samples()
+
+        self.assertEquals(
+            samples['medev_http_requests_total{view="unmatched",method="GET",status="200"}'], 1
+        )
+        self.assertEquals(samples['medev_db_queries_per_request_sum{view="unmatched"}'], 1)
+
+    def test_cache_requests(self):
+        """ Counts the response cache hits and misses. """
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        samples = self.get_samples()
+
+        self.assertEquals(samples['medev_cache_requests_total{cache="post_list",result="miss"}'], 1)
+        self.assertEquals(samples['medev_cache_requests_total{cache="post_list",result="hit"}'], 1)
+
+    def test_authentication(self):
+        """ Times the authentication classes given credentials. """
+        token = Token.objects.create(user=self.user)
+        self.client.get(reverse('rest_user_details'), HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(reverse('rest_user_details'), HTTP_AUTHORIZATION='Token invalid')
+
+        samples = self.get_samples()
+
+        name = 'medev_authentication_duration_seconds_count'
+        self.assertEquals(
+            samples[f'{name}{{authenticator="CachedTokenAuthentication",result="success"}}'], 1
+        )
+        self.assertEquals(
+            samples[f'{name}{{authenticator="CachedTokenAuthentication",result="failure"}}'], 1
+        )
+        self.assertNotIn(f'{name}{{authenticator="BasicAuthentication",result="success"}}', samples)
+
+    def test_other_addresses_forbidden(self):
+        """ Only the allowed addresses can read the metrics. """
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+
+        self.assertEquals(response.status_code, 403)
+
+
+class TestMetricsStore(MetricsTestCase):
+    """ Test cases for sharing metrics between processes. """
+
+    def setUp(self):
+        super().setUp()
+        self.counter = metrics.CACHE_REQUESTS.labels('test', 'hit')
+        self.sample = 'medev_cache_requests_total{cache="test",result="hit"}'
+
+    def test_processes_are_summed(self):
+        """ The values of every process' file are added up. """
+        self.counter.inc()
+        other = metrics._ProcessStore(self.directory / '1.db')
+        other.add(self.counter.key, 2)
+
+        self.assertEquals(self.get_samples()[self.sample], 3)
+
+    def test_reopened_file(self):
+        """ A file left by an earlier process with the same pid is added to. """
+        path = self.directory / '1.db'
+        metrics._ProcessStore(path).add(self.counter.key, 2)
+        metrics._ProcessStore(path).add(self.counter.key, 1)
+
+        self.assertEquals(self.get_samples()[self.sample], 3)
+
+    def test_file_grows(self):
+        """ The file grows as keys are added. """
+        store = metrics._ProcessStore(self.directory / '1.db')
+        for i in range(2000):
+            store.add(metrics._key('medev_cache_requests', '_total', [f'test-{i}', 'hit']), i)
+
+        samples = self.get_samples()
+
+        self.assertGreater((self.directory / '1.db').stat().st_size, metrics.INITIAL_SIZE)
+        self.assertEquals(samples['medev_cache_requests_total{cache="test-1999",result="hit"}'], 1999)
+
+    def test_exited_processes_merged(self):
+        """ The files of exited processes are folded into one, values and all. """
+        for amount in (2, 3):
+            process = subprocess.Popen([sys.executable, '-c', ''])
+            process.wait()
+            metrics._ProcessStore(self.directory / f'{process.pid}.db').add(
+                self.counter.key, amount
+            )
+            metrics.reset()
+            self.counter.inc()
+
+        self.assertEquals(
+            sorted(path.name for path in self.directory.glob('*.db')),
+            sorted([metrics.EXITED_FILE, f'{os.getpid()}.db'])
+        )
+        self.assertEquals(self.get_samples()[self.sample], 7)
+
+    def test_running_processes_kept(self):
+        """ The files of processes that are still running are left alone. """
+        process = subprocess.Popen([sys.executable, '-c', 'input()'], stdin=subprocess.PIPE)
+        self.addCleanup(process.wait)
+        self.addCleanup(process.communicate, b'\n')
+        metrics._ProcessStore(self.directory / f'{process.pid}.db').add(self.counter.key, 2)
+
+        self.counter.inc()
+
+        self.assertTrue((self.directory / f'{process.pid}.db').exists())
+        self.assertFalse((self.directory / metrics.EXITED_FILE).exists())
+        self.assertEquals(self.get_samples()[self.sample], 3)
@@ -0,0 +1,194 @@
+import json
+import pstats
+import tempfile
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blogs.models import Post
+
+from .. import profiling
+from ..profiling import RequestProfile
+
+
+User = get_user_model()
+
+
+@override_settings(
+    MIDDLEWARE=['core.middleware.ProfilingMiddleware'] + settings.MIDDLEWARE,
+    POSTS_FAST_SERIALIZATION=False
+)
+class TestProfilingMiddleware(TestCase):
+    """ Test cases for profiling requests. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        Post.objects.create(title='Hello world', content='test content', author=self.user)
+        self.url = f'{reverse("post-list")}?user={self.user.slug}'
+
+    def get(self, url):
+        with self.assertLogs('core.profiling', 'INFO'):
+            return self.client.get(url)
+
+    def get_metrics(self, response):
+        return {
+            metric.split(';')[0]: metric
+            for metric in response['Server-Timing'].split(', ')
+        }
+
+    def test_server_timing(self):
+        """ Reports the total, SQL and serializer times. """
+        metrics = self.get_metrics(self.get(self.url))
+
+        self.assertEquals(
+            set(metrics), {'total', 'sql', 'serialize-post', 'serialize-author'}
+        )
+        self.assertIn('desc="2 queries (0 duplicates)"', metrics['sql'])
+
+    @override_settings(POSTS_FAST_SERIALIZATION=True)
+    def test_fast_serialization(self):
+        """ The fast path reports its time as serializing the posts. """
+        metrics = self.get_metrics(self.get(self.url))
+
+        self.assertEquals(set(metrics), {'total', 'sql', 'serialize-post'})
+
+    def test_cached_response(self):
+        """ Cache hits run no queries and serialize nothing. """
+        self.get(self.url)
+
+        metrics = self.get_metrics(self.get(self.url))
+
+        self.assertEquals(set(metrics), {'total', 'sql'})
+        self.assertIn('desc="0 queries (0 duplicates)"', metrics['sql'])
+
+    def test_log_line(self):
+        """ Logs the profile as a line of JSON. """
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            self.client.get(self.url)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEquals(
+            (record['method'], record['path'], record['status']),
+            ('GET', reverse('post-list'), 200)
+        )
+        self.assertEquals((record['queries'], record['duplicates']), (2, 0))
+        self.assertEquals(
+            set(record['timings_ms']), {'serialize-post', 'serialize-author'}
+        )
+        self.assertNotIn('sample', record)
+
+    def sample(self, sampler):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        with self.settings(
+            PROFILING_SAMPLE_RATE=2,
+            PROFILING_SAMPLER=sampler,
+            PROFILING_SAMPLE_DIR=directory.name
+        ), self.assertLogs('core.profiling', 'INFO') as logs:
+            for _ in range(4):
+                cache.clear()
+                self.client.get(self.url)
+
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        samples = sorted(Path(directory.name).iterdir())
+        self.assertEquals(
+            [record.get('sample') for record in records],
+            [None, str(samples[0]), None, str(samples[1])]
+        )
+        return samples
+
+    def test_cprofile_samples(self):
+        """ Every Nth request is profiled with cProfile. """
+        for path in self.sample('cprofile'):
+            stats = pstats.Stats(str(path))
+            self.assertTrue(any(
+                function == 'list' for _, _, function in stats.stats
+            ))
+
+    def test_tracemalloc_samples(self):
+        """ Every Nth request gets a tracemalloc snapshot. """
+        for path in self.sample('tracemalloc'):
+            self.assertTrue(tracemalloc.Snapshot.load(str(path)).traces)
+
+
+class TestSample(TestCase):
+    """ Test cases for sampling a block of code. """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_overlapping_tracemalloc_samples(self):
+        """ Tracing stops once the last of overlapping samples finishes. """
+        first = profiling.sample('tracemalloc', self.directory)
+        second = profiling.sample('tracemalloc', self.directory)
+
+        first_path = first.__enter__()
+        second_path = second.__enter__()
+        first.__exit__(None, None, None)
+        self.assertTrue(tracemalloc.is_tracing())
+        second.__exit__(None, None, None)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        for path in (first_path, second_path):
+            self.assertTrue(tracemalloc.Snapshot.load(str(path)).traces)
+
+    def test_tracing_started_elsewhere(self):
+        """ Tracing that was on before sampling is left on. """
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+
+        with profiling.sample('tracemalloc', self.directory) as path:
+            pass
+
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertTrue(path.exists())
+
+    def test_failures_are_logged(self):
+        """ Sampling failures are logged instead of raised. """
+        failure = RuntimeError('not tracing')
+        with mock.patch.object(tracemalloc, 'take_snapshot', side_effect=failure), \
+                self.assertLogs('core.profiling', 'ERROR') as logs:
+            with profiling.sample('tracemalloc', self.directory) as path:
+                pass
+
+        self.assertFalse(path.exists())
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIn('Could not save the tracemalloc sample', logs.output[0])
+
+        with mock.patch.object(tracemalloc, 'start', side_effect=failure), \
+                self.assertLogs('core.profiling', 'ERROR') as logs:
+            with profiling.sample('tracemalloc', self.directory) as path:
+                pass
+
+        self.assertIsNone(path)
+        self.assertIn('Could not start the tracemalloc sampler', logs.output[0])
+
+
+class TestRequestProfile(TestCase):
+    """ Test cases for recording queries. """
+
+    def test_duplicates(self):
+        """ Queries repeated with the same params count as duplicates. """
+        profile = RequestProfile()
+        execute = lambda sql, params, many, context: None
+
+        for params in ([1], [2], [1], [1]):
+            profile.record_query(execute, 'SELECT %s', params, False, {})
+
+        self.assertEquals(profile.duplicates, 2)
+        self.assertEquals(len(profile.queries), 4)
@@ -0,0 +1,153 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from blogs.models import AuthorStats, Post
+
+from .. import routers
+from ..middleware import ReplicaStickinessMiddleware
+
+
+User = get_user_model()
+
+
+# TransactionTestCase, TestCase would wrap every test in a transaction on
+# the primary, which pins all reads to it.
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestReplicaRouter(TransactionTestCase):
+    """ Test cases for routing reads to the replica. """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        routers._down_until.clear()
+
+        # The "replica" lags behind, it has the author but no posts yet.
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        User.objects.using('replica').bulk_create([User.objects.using('default').get()])
+        self.post = Post.objects.create(
+            title='Test title',
+            content='test content',
+            author=self.user
+        )
+
+    def get_post(self):
+        return self.client.get(reverse('post-detail', kwargs={'slug': self.post.slug}))
+
+    def test_reads_from_replica(self):
+        """ Post reads go to the replica. """
+        self.assertEquals(router.db_for_read(Post), 'replica')
+        self.assertEquals(self.get_post().status_code, 404)
+
+        Post.objects.using('replica').bulk_create([
+            Post(title='Replica', content='test', slug=self.post.slug, author_id=self.user.pk)
+        ])
+        cache.clear()
+
+        self.assertEquals(self.get_post().data['title'], 'Replica')
+
+    def test_other_models_on_primary(self):
+        """ Reads of models that aren't replicated go to the primary. """
+        self.assertEquals(router.db_for_read(Token), 'default')
+        self.assertEquals(router.db_for_write(Post), 'default')
+
+    def test_transactions_on_primary(self):
+        """ Reads inside a transaction go to the primary. """
+        with transaction.atomic():
+            self.assertEquals(router.db_for_read(Post), 'default')
+
+    def test_reads_own_writes(self):
+        """ After writing, a client reads from the primary for a while. """
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('post-list'),
+            {'title': 'New post', 'content': 'test content'}
+        )
+        self.assertEquals(response.status_code, 201)
+        self.assertIn('db_primary_until', response.cookies)
+
+        url = reverse('post-detail', kwargs={'slug': response.data['slug']})
+        self.assertEquals(self.client.get(url).status_code, 200)
+
+        # Other clients read from the lagging replica.
+        self.client.cookies.clear()
+        cache.clear()
+        self.assertEquals(self.client.get(url).status_code, 404)
+
+    def test_unsafe_requests_on_primary(self):
+        """ Requests that may write read from the primary from the start. """
+        self.client.force_login(self.user)
+        response = self.client.patch(
+            reverse('post-detail', kwargs={'slug': self.post.slug}),
+            {'title': 'New title'},
+            content_type='application/json'
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(Post.objects.using('default').get().title, 'New title')
+
+    def test_users_on_primary(self):
+        """ Users aren't read from the replica, e.g. to check a username is free. """
+        self.assertEquals(router.db_for_read(User), 'default')
+
+    def test_reconcile_on_primary(self):
+        """ Author stats are recomputed from the primary they're written to. """
+        AuthorStats.objects.create(author=self.user, post_count=0)
+
+        self.assertEquals(AuthorStats.objects.reconcile(), 1)
+        self.assertEquals(AuthorStats.objects.using('default').get().post_count, 1)
+
+        AuthorStats.objects.all().delete()
+        response = self.client.get(reverse('author-stats', kwargs={'slug': self.user.slug}))
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['post_count'], 1)
+
+    async def test_middleware_runs_async(self):
+        """ Under ASGI the stickiness middleware doesn't need adapting. """
+        async def get_response(request):
+            router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        response = await middleware(RequestFactory().post('/'))
+        self.assertIn('db_primary_until', response.cookies)
+
+    def test_down_replica_skipped(self):
+        """ A replica that can't be connected to is skipped for a while. """
+        replica = connections['replica']
+        with mock.patch.object(
+            replica, 'ensure_connection', side_effect=OperationalError
+        ) as ensure_connection:
+            self.assertEquals(router.db_for_read(Post), 'default')
+            self.assertEquals(router.db_for_read(Post), 'default')
+
+        self.assertEquals(ensure_connection.call_count, 1)
+
+        with self.settings(DATABASE_REPLICA_RETRY_SECONDS=0):
+            routers.mark_down('replica')
+            self.assertEquals(router.db_for_read(Post), 'replica')
+
+    def test_health_checks(self):
+        """ Persistent connections that went bad are closed before reuse. """
+        connection = connections['default']
+        connection.ensure_connection()
+
+        with mock.patch.object(connection, 'is_usable', return_value=False), \
+                mock.patch.object(connection, 'close') as close:
+            routers.check_connections()
+
+        close.assert_called_once()
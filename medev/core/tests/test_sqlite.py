@@ -0,0 +1,76 @@
+import tempfile
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, override_settings
+
+from ..backends.sqlite3.base import DatabaseWrapper
+
+
+class TestSQLiteConnections(SimpleTestCase):
+    """ Test cases for the SQLite connection setup. """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'test.sqlite3'
+
+    def connect(self, **options):
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': self.path, 'OPTIONS': options},
+            alias='test'
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """ New connections are in WAL mode with the configured pragmas. """
+        wrapper = self.connect()
+
+        self.assertEquals(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEquals(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEquals(self.pragma(wrapper, 'busy_timeout'), 5000)
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_pragmas_disabled(self):
+        """ Without pragmas, SQLite keeps its rollback journal. """
+        self.assertEquals(self.pragma(self.connect(), 'journal_mode'), 'delete')
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'wal', 'busy_timeout': 0})
+    def test_readers_during_write(self):
+        """ Readers see the last commit while a write is in progress. """
+        writer, reader = self.connect(), self.connect()
+        writer.cursor().execute('CREATE TABLE post (title TEXT)')
+        writer.cursor().execute("INSERT INTO post VALUES ('committed')")
+
+        writer._start_transaction_under_autocommit()
+        writer.cursor().execute("INSERT INTO post VALUES ('pending')")
+
+        with reader.cursor() as cursor:
+            cursor.execute('SELECT title FROM post')
+            self.assertEquals(cursor.fetchall(), [('committed',)])
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'wal', 'busy_timeout': 0})
+    def test_immediate_transactions(self):
+        """ Transactions take the write lock as they begin. """
+        first = self.connect(transaction_mode='immediate')
+        second = self.connect(transaction_mode='immediate')
+        first.cursor().execute('CREATE TABLE post (title TEXT)')
+
+        first._start_transaction_under_autocommit()
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            second._start_transaction_under_autocommit()
+
+        first.cursor().execute('COMMIT')
+        second._start_transaction_under_autocommit()
+
+    def test_invalid_transaction_mode(self):
+        """ An unknown transaction mode is a configuration error. """
+        with self.assertRaises(ImproperlyConfigured):
+            self.connect(transaction_mode='eventually').ensure_connection()
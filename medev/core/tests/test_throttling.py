@@ -0,0 +1,151 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from ..throttling import ScopedTokenBucketThrottle, TokenBucketThrottle
+
+
+User = get_user_model()
+
+
+class ThrottledView(APIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = (ScopedTokenBucketThrottle,)
+    throttle_scope = 'test'
+
+    def get(self, request):
+        return Response()
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'test': '3/min'}})
+class TestTokenBucketThrottle(TestCase):
+    """ Test cases for the cache backed token bucket throttles. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.now = 1000.0
+        timer = mock.patch.object(TokenBucketThrottle, 'timer', lambda _: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+        self.factory = APIRequestFactory()
+        self.view = ThrottledView.as_view()
+
+    def get(self, user=None, address='127.0.0.1'):
+        request = self.factory.get('/', REMOTE_ADDR=address)
+        if user is not None:
+            force_authenticate(request, user)
+        return self.view(request)
+
+    def test_allows_a_burst(self):
+        """ Up to the rate at once, then throttled until a token refills. """
+        self.assertEquals([self.get().status_code for _ in range(3)], [200] * 3)
+
+        response = self.get()
+        self.assertEquals(response.status_code, 429)
+        self.assertEquals(response['Retry-After'], '40')
+
+    def test_refills(self):
+        """ Tokens refill evenly over the period. """
+        for _ in range(3):
+            self.get()
+
+        self.now += 20
+        self.assertEquals(self.get().status_code, 200)
+        self.assertEquals(self.get().status_code, 429)
+
+        # The throttled request took a token as well.
+        self.now += 80
+        self.assertEquals([self.get().status_code for _ in range(3)], [200] * 3)
+
+    def test_retry_after(self):
+        """ Retrying after Retry-After seconds is let through. """
+        for _ in range(3):
+            self.get()
+        wait = int(self.get()['Retry-After'])
+
+        self.now += wait - 1
+        self.assertEquals(self.get().status_code, 429)
+
+        self.now += int(self.get()['Retry-After'])
+        self.assertEquals(self.get().status_code, 200)
+
+    def test_one_round_trip(self):
+        """ A bucket in use costs a single incr(). """
+        self.get()
+
+        with mock.patch.object(cache, 'incr', wraps=cache.incr) as incr, \
+                mock.patch.object(cache, 'set', wraps=cache.set) as set_:
+            self.get()
+            self.get()
+
+        self.assertEquals(incr.call_count, 2)
+        self.assertEquals(set_.call_count, 0)
+
+    def test_per_user_and_address(self):
+        """ Every user, and every anonymous address, has a bucket. """
+        user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        for _ in range(3):
+            self.get()
+
+        self.assertEquals(self.get(address='10.0.0.1').status_code, 200)
+        self.assertEquals(self.get(user=user).status_code, 200)
+        self.assertEquals(self.get().status_code, 429)
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'test': '2000/s'}})
+    def test_high_rates(self):
+        """ Rates above one request per millisecond are still enforced. """
+        self.assertEquals([self.get().status_code for _ in range(2000)], [200] * 2000)
+        self.assertEquals(self.get().status_code, 429)
+
+        self.now += 0.001
+        self.assertEquals([self.get().status_code for _ in range(2)], [200, 429])
+
+    @override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'test': '2000000/s'}})
+    def test_rejects_unenforceable_rates(self):
+        """ Rates above one request per microsecond are refused. """
+        with self.assertRaises(ImproperlyConfigured):
+            self.get()
+
+
+class TestAuthThrottling(TestCase):
+    """ Test cases for throttling the auth endpoints. """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_throttled(self):
+        """ Login attempts are limited per address. """
+        data = {'email': 'test@mail.com', 'password': 'wrong'}
+        statuses = [
+            self.client.post(reverse('rest_login'), data).status_code
+            for _ in range(31)
+        ]
+
+        self.assertEquals(statuses[:30], [400] * 30)
+        self.assertEquals(statuses[30], 429)
+
+    def test_forwarded_for_is_ignored(self):
+        """ Clients can't get new buckets by sending X-Forwarded-For. """
+        data = {'email': 'test@mail.com', 'password': 'wrong'}
+        statuses = [
+            self.client.post(
+                reverse('rest_login'), data, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}'
+            ).status_code
+            for i in range(31)
+        ]
+
+        self.assertEquals(statuses[30], 429)
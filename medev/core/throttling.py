@@ -0,0 +1,102 @@
+"""
+Token bucket throttles kept in the cache (settings.THROTTLE_CACHE_ALIAS).
+
+Every bucket is a single cache counter, its "theoretical arrival time"
+(GCRA): the time, in microseconds, at which the bucket would be full again.
+Taking a token adds one emission interval (the period divided by the rate)
+to it, with the cache's atomic incr(), which is the only cache round-trip
+of a throttled request. Requests are let through as long as that time is
+at most one period ahead, i.e. up to `rate` at once, refilling evenly.
+
+A bucket that has refilled (or was never used) is set back to now, a
+second round-trip that only well-behaved clients ever take. Denied requests
+take tokens too, so clients that keep retrying stay throttled, but buckets
+expire two periods after they were last set back, which caps that.
+
+incr() is atomic on the locmem, memcached and redis caches, but not
+on the database or file based ones.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Like SimpleRateThrottle, get_cache_key() has to be overridden.
+    Rates are '<requests>/<period>' per scope, in DEFAULT_THROTTLE_RATES.
+    """
+
+    def get_rate(self):
+        # Read on every instantiation, not once at import time.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def parse_rate(self, rate):
+        num_requests, duration = super().parse_rate(rate)
+        if num_requests is not None and duration * 1000000 // num_requests == 0:
+            raise ImproperlyConfigured(
+                f'Throttle rate {rate!r} is above one request per microsecond.'
+            )
+        return num_requests, duration
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        period = self.duration * 1000000
+        interval = period // self.num_requests
+        now = int(self.timer() * 1000000)
+
+        try:
+            full_at = cache.incr(self.key, interval)
+        except ValueError:
+            full_at = None
+
+        if full_at is None or full_at < now + interval:
+            full_at = now + interval
+            cache.set(self.key, full_at, timeout=self.duration * 2)
+
+        self.overdue = full_at - now - period
+        self.interval = interval
+        return self.overdue <= 0
+
+    def wait(self):
+        # This denied request took a token too, the next one needs another.
+        return (max(self.overdue, 0) + self.interval) / 1000000
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Throttles every view with a throttle_scope, one bucket per user,
+    or per address for anonymous requests.
+    """
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # The scope and its rate are only known once the view is.
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from . import metrics
+
+
+@require_GET
+def metrics_view(request):
+    """
+    The metrics of every worker process, for Prometheus to scrape.
+    Only served to the addresses in settings.METRICS_ALLOWED_IPS (None
+    for any, e.g. when access is restricted in front of the server). The
+    address is REMOTE_ADDR, which behind a local reverse proxy is the proxy's.
+    """
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
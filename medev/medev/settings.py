@@ -1,4 +1,5 @@
 # flake8: noqa
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,7 +43,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,15 +55,149 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Responses of these types are compressed with brotli or gzip, whichever the
+# client prefers, unless they're shorter than COMPRESSION_MIN_SIZE bytes.
+# COMPRESSION_LEVELS keep within
+# the CPU budget checked by benchmarks/compression.py, see core/compression.py.
+# Not text/html: the admin and browsable API pages carry a CSRF token next to
+# reflected input, which compressed would leak through their length (BREACH).
+COMPRESSION_CONTENT_TYPES = (
+    'application/json', 'application/x-ndjson', 'text/plain', 'text/css',
+    'text/javascript'
+)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+
+# Prometheus metrics, served at /metrics, see core/metrics.py. Every worker
+# process writes its own file in METRICS_DIR, the directory has to be shared
+# by all of them, and only by them (the files of exited processes are merged
+# by pid).
+METRICS_DIR = Path(tempfile.gettempdir()) / 'medev-metrics'
+# Addresses allowed to read /metrics, None for any. Checked against
+# REMOTE_ADDR: behind a reverse proxy on the same host every client is
+# 127.0.0.1, so /metrics has to be blocked at the proxy (or this set to the
+# scraper's address with the proxy not forwarding /metrics).
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Runs the tests with a temporary METRICS_DIR.
+TEST_RUNNER = 'core.runner.TestRunner'
+
+# Add 'core.middleware.ProfilingMiddleware' first in MIDDLEWARE for a
+# Server-Timing header and a log line (the 'core.profiling' logger) with
+# each request's SQL and serializer times. Every PROFILING_SAMPLE_RATE-th
+# request (0 for none) is also profiled with PROFILING_SAMPLER ('cprofile'
+# or 'tracemalloc') and the result saved in PROFILING_SAMPLE_DIR.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_SAMPLER = 'cprofile'
+PROFILING_SAMPLE_DIR = BASE_DIR / 'profiles'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication'
-    ]
+        'users.authentication.BasicAuthentication',
+        'users.authentication.SessionAuthentication',
+        'users.authentication.CachedTokenAuthentication'
+    ],
+    # Client addresses (of anonymous throttle buckets) are REMOTE_ADDR. Behind
+    # proxies, set this to how many there are, the address is then taken from
+    # X-Forwarded-For, skipping the ones they added. Never leave it None, that
+    # trusts the header as the client sent it.
+    'NUM_PROXIES': 0,
+    # Token buckets per user (or address) for every view with a
+    # throttle_scope, see core/throttling.py.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.ScopedTokenBucketThrottle'
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        # Login, registration, password reset emails, token exchange...
+        'dj_rest_auth': '30/min',
+        # Password reset confirmations, per address and per account and address.
+        'password_reset_confirm': '60/hour',
+        'password_reset_confirm_uid': '10/hour',
+        'posts': '600/min',
+        # Bulk writes and exports.
+        'posts_bulk': '30/min'
+    }
+}
+
+# Cache alias the throttle buckets are kept in, its incr() has to be atomic
+# (locmem, memcached or redis) for the limits to hold under concurrency.
+THROTTLE_CACHE_ALIAS = 'default'
+
+# How long (in seconds) token -> user lookups are cached,
+# changes to the user or token invalidate them right away.
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# Every Basic authenticated request hashes the password. Clients should
+# exchange their credentials for a token once at auth/token/. Where that's not
+# possible, swap BasicAuthentication for
+# 'users.authentication.CachedBasicAuthentication', which remembers up to
+# BASIC_AUTH_CACHE_SIZE verified credentials for BASIC_AUTH_CACHE_TIMEOUT seconds.
+BASIC_AUTH_CACHE_SIZE = 1024
+BASIC_AUTH_CACHE_TIMEOUT = 60 * 5
+
+# Processes hashing the passwords of users created in batch
+# (MyUserManager.bulk_create_users), None for one per CPU.
+PASSWORD_HASHING_WORKERS = None
+
+# Page size of the cursor paginated post listings,
+# clients can ask for up to POSTS_MAX_PAGE_SIZE with ?page_size=.
+POSTS_PAGE_SIZE = 20
+POSTS_MAX_PAGE_SIZE = 100
+
+# Most posts a single request to the bulk endpoint may create, update or delete.
+POSTS_BULK_MAX_SIZE = 1000
+
+# Rows fetched per round-trip when streaming an author's posts export.
+POSTS_EXPORT_CHUNK_SIZE = 2000
+# Under ASGI exports are written out before they're sent, in memory up to
+# this many bytes and to a temporary file past that.
+POSTS_EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Use redis or memcached in production, e.g.
+# 'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
 }
 
+# Cache alias and timeout (in seconds) of the cached post responses.
+POSTS_CACHE_ALIAS = 'default'
+POSTS_CACHE_TIMEOUT = 60 * 15
+# Cached author feeds are compressed once per entry rather than per request,
+# so they can afford higher levels than COMPRESSION_LEVELS.
+POSTS_FEED_COMPRESSION_LEVELS = {'br': 7, 'gzip': 9}
+
+# Serve post list and detail with the async views, only worth it under ASGI.
+POSTS_ASYNC_VIEWS = False
+
+# Build read-only post responses without going through DRF's serializers
+# (same output, see core/serializers.py).
+POSTS_FAST_SERIALIZATION = True
+
 
 REST_AUTH_SERIALIZERS = {
     'USER_DETAILS_SERIALIZER': 'users.api.serializers.UserDetailSerializer'
@@ -95,13 +233,57 @@ AUTH_USER_MODEL = 'users.User'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# CONN_MAX_AGE keeps connections open between requests (in seconds),
+# CONN_HEALTH_CHECKS pings them before they're reused.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Writers wait their turn instead of failing with "database is locked".
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # A local stand-in for a read replica (e.g. in tests),
+    # only read from once it's listed in DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    },
 }
 
+# Applied to every new SQLite connection, see core/sqlite.py.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # In KiB when negative.
+    'cache_size': -64 * 1024,
+    # Milliseconds to wait for a lock before failing.
+    'busy_timeout': 5000,
+}
+
+# Reads of these models go to the replicas, see core/routers.py. Not users:
+# logins, registrations and authentication read them from the primary, post
+# queries still join their authors on the replica.
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_MODELS = [
+    'blogs.post',
+    'blogs.tag',
+    'blogs.posttag',
+    'blogs.authorstats',
+]
+# Seconds a client keeps reading from the primary after it wrote,
+# should cover the replication lag.
+DATABASE_STICKY_SECONDS = 5
+# Seconds a replica that couldn't be connected to is skipped.
+DATABASE_REPLICA_RETRY_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -114,7 +296,7 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'users.password_validation.CommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -146,6 +328,23 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Emails are sent in the background, see core/mail.py. Swap in
+# 'core.mail.DatabaseEmailBackend' to queue them in the database for
+# `manage.py run_mail_worker` instead of this process' threads.
+EMAIL_BACKEND = 'core.mail.ThreadPoolEmailBackend'
+
+# Where the background backends actually send emails to,
+# e.g. 'django.core.mail.backends.smtp.EmailBackend'.
+MAIL_DELIVERY_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+MAIL_THREADS = 2
+# Emails sent over a single connection.
+MAIL_BATCH_SIZE = 50
+# Failed emails are retried MAIL_RETRY_DELAY seconds later,
+# doubling every attempt, up to MAIL_MAX_ATTEMPTS attempts.
+MAIL_MAX_ATTEMPTS = 5
+MAIL_RETRY_DELAY = 30
+# Emails run_mail_worker took but neither sent nor failed in this many
+# seconds (the worker died) are sent again.
+MAIL_CLAIM_TIMEOUT = 60 * 5
 
 SITE_ID = 1
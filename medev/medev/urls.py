@@ -10,6 +10,8 @@ from dj_rest_auth.views import (
     UserDetailsView
 )
 
+from core.views import metrics_view
+
 
 auth_urls = [
     path('register/', RegisterView.as_view(), name='rest_register'),
@@ -33,5 +35,6 @@ auth_urls = [
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include(auth_urls)),
-    path('api/', include('blogs.urls'))
+    path('api/', include('blogs.urls')),
+    path('metrics', metrics_view, name='metrics')
 ]
@@ -1,15 +1,19 @@
 from django.contrib.auth.forms import SetPasswordForm
 from django.utils.http import urlsafe_base64_decode as uid_decoder
-from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_str
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from core.profiling import ProfiledSerializerMixin
+
 from ..models import User
+from ..tokens import default_token_generator
+
 
+class AuthorSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    profile_name = 'serialize-author'
 
-class AuthorSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -52,15 +56,27 @@ class MyPasswordResetConfirmSerializer(serializers.Serializer):
         pass
 
     def validate(self, attrs):
+        # Everything that can be checked without the user first,
+        # so that junk requests never reach the database.
+        if attrs['new_password1'] != attrs['new_password2']:
+            raise ValidationError({
+                'new_password2': [
+                    self.set_password_form_class.error_messages['password_mismatch']
+                ]
+            })
+
+        if not default_token_generator.is_token_fresh(attrs['token']):
+            raise ValidationError({'token': ['Invalid value']})
 
         # Decode the uidb64 to uid to get User object
         try:
-            uid = force_str(uid_decoder(attrs['uid']))
+            uid = int(force_str(uid_decoder(attrs['uid'])))
             self.user = User.objects.get(pk=uid)
             
         except (TypeError, ValueError, OverflowError, User.DoesNotExist):
             raise ValidationError({'uid': ['Invalid value']})
 
+        # The token's HMAC covers the user's password hash and last login.
         if not default_token_generator.check_token(self.user, attrs['token']):
             raise ValidationError({'token': ['Invalid value']})
 
@@ -0,0 +1,22 @@
+from core.throttling import TokenBucketThrottle
+
+
+class PasswordResetConfirmThrottle(TokenBucketThrottle):
+    """
+    Limits reset attempts per account (the posted uid) and address. Not
+    per account alone: uids are just encoded primary keys, anyone could
+    use up the budget of someone else's account and keep them from
+    resetting their password. Kept in the cache, so throttling a storm
+    doesn't write to the database.
+    """
+    scope = 'password_reset_confirm_uid'
+
+    def get_cache_key(self, request, view):
+        uid = request.data.get('uid') if hasattr(request.data, 'get') else None
+        if not isinstance(uid, str) or not uid:
+            return None
+
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': f'{self.get_ident(request)}:{uid[:64]}'
+        }
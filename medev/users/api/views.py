@@ -2,11 +2,18 @@ from django.views.decorators.debug import sensitive_post_parameters
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext_lazy as _
 
+from rest_framework.authtoken.models import Token
 from rest_framework.generics import GenericAPIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.throttling import ScopedTokenBucketThrottle
+
+from ..authentication import BasicAuthentication
 
 from .serializers import MyPasswordResetConfirmSerializer
+from .throttling import PasswordResetConfirmThrottle
 
 
 sensitive_post_parameters_m = method_decorator(
@@ -25,10 +32,15 @@ class PasswordResetConfirmView(GenericAPIView):
     Returns the success/fail message.
 
     // Basically just taken from the dj-rest-auth library.
+
+    Throttled per address and per account and address, before anything
+    touches the database (there's no authentication to look up either).
     """
     serializer_class = MyPasswordResetConfirmSerializer
+    authentication_classes = ()
     permission_classes = (AllowAny,)
-    throttle_scope = 'dj_rest_auth'
+    throttle_classes = (ScopedTokenBucketThrottle, PasswordResetConfirmThrottle)
+    throttle_scope = 'password_reset_confirm'
 
     @sensitive_post_parameters_m
     def dispatch(self, *args, **kwargs):
@@ -41,3 +53,18 @@ class PasswordResetConfirmView(GenericAPIView):
         return Response(
             {'detail': _('Password has been reset with the new password.')},
         )
+
+
+class BasicTokenExchangeView(APIView):
+    """
+    Exchanges Basic credentials for the user's token, so that clients
+    only pay for hashing their password once instead of on every request.
+    Returns the token key, like the login view.
+    """
+    authentication_classes = (BasicAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_scope = 'dj_rest_auth'
+
+    def post(self, request, *args, **kwargs):
+        token, _ = Token.objects.get_or_create(user=request.user)
+        return Response({'key': token.key})
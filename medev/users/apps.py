@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import get_default_password_validators
+
+        from . import signals  # noqa: F401
+
+        # Loads the common password list now, rather than in the first request.
+        get_default_password_validators()
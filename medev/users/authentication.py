@@ -0,0 +1,257 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+from core.metrics import CACHE_REQUESTS, TimedAuthenticationMixin
+
+
+_token_hits = CACHE_REQUESTS.labels('auth_token', 'hit')
+_token_misses = CACHE_REQUESTS.labels('auth_token', 'miss')
+_credential_hits = CACHE_REQUESTS.labels('basic_credentials', 'hit')
+_credential_misses = CACHE_REQUESTS.labels('basic_credentials', 'miss')
+
+
+def _digest(key):
+    # Hashed, so raw tokens never end up in cache keys (or their logs).
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_cache_key(key):
+    return f'auth:token:{_digest(key)}'
+
+
+def token_version_key(key):
+    return f'auth:token:version:{_digest(key)}'
+
+
+def get_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def _bump(version_key):
+    cache = get_cache()
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # Missing, start from a value no cached entry can remember.
+        cache.set(version_key, time.time_ns(), timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+
+def invalidate_token(key):
+    """
+    Invalidates the cached lookup of key. The version is bumped again once
+    the transaction commits, a lookup that read the old rows before then
+    would otherwise cache them under the current version.
+    """
+    version_key = token_version_key(key)
+    _bump(version_key)
+    transaction.on_commit(lambda: _bump(version_key))
+
+
+def invalidate_user(user_pk):
+    """
+    Invalidates the cached lookups of every token of a user, one query.
+    """
+    for key in Token.objects.filter(user_id=user_pk).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+@lru_cache(maxsize=None)
+def cached_user_fields():
+    """
+    The user fields kept in the cache, all but the password hash.
+    """
+    return tuple(
+        field.attname
+        for field in get_user_model()._meta.concrete_fields
+        if field.name != 'password'
+    )
+
+
+def load_token(key):
+    """
+    Returns the user fields (see cached_user_fields) of the user of the token
+    key, or None. The password stays in the database.
+    """
+    lookups = [f'user__{attname}' for attname in cached_user_fields()]
+    row = Token.objects.filter(key=key).values_list(*lookups).first()
+    return None if row is None else dict(zip(cached_user_fields(), row))
+
+
+def build_token(key, user_fields):
+    """
+    Returns the Token key and its user made from user_fields. The fields
+    that weren't cached, the password among them, are deferred and load
+    from the database when they're accessed.
+    """
+    User = get_user_model()
+    user = User.from_db(None, list(user_fields), list(user_fields.values()))
+    token = Token.from_db(None, ['key', 'user_id'], [key, user.pk])
+    token.user = user
+    return token
+
+
+class BasicAuthentication(TimedAuthenticationMixin, authentication.BasicAuthentication):
+    pass
+
+
+class SessionAuthentication(TimedAuthenticationMixin, authentication.SessionAuthentication):
+    pass
+
+
+class CachedTokenAuthentication(TimedAuthenticationMixin, authentication.TokenAuthentication):
+    """
+    TokenAuthentication that keeps token -> user lookups in the cache
+    for AUTH_TOKEN_CACHE_TIMEOUT seconds. Entries hold the user's fields,
+    never the password hash (see cached_user_fields).
+
+    Like the post cache, every token has a version that cached entries
+    remember, read before the database is. It's bumped when the token is
+    saved or deleted (logout) and when its user is (password change,
+    is_active flips, ...), see signals.py.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_cache()
+        cache_key = token_cache_key(key)
+        version_key = token_version_key(key)
+        values = cache.get_many([cache_key, version_key])
+
+        entry = values.get(cache_key)
+        version = values.get(version_key)
+        if entry is not None and version is not None and entry['version'] == version:
+            _token_hits.inc()
+            user_fields = entry['user']
+        else:
+            _token_misses.inc()
+            if version is None:
+                cache.add(version_key, time.time_ns(), timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT)
+                version = cache.get(version_key)
+
+            user_fields = load_token(key)
+            if user_fields is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            cache.set(
+                cache_key,
+                {'version': version, 'user': user_fields},
+                timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+
+        if not user_fields['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = build_token(key, user_fields)
+        return (token.user, token)
+
+
+class CredentialCache:
+    """
+    A bounded, in-process LRU of verified Basic credentials.
+
+    Entries are keyed on an HMAC of the credentials with a random per-process
+    salt, so the cache never holds a password or anything that could be used
+    to check one outside of this process. Each entry holds the user's password
+    hash at the time, so changing the password invalidates it.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._salt = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, username, password):
+        message = f'{username}\0{password}'.encode()
+        return hmac.new(self._salt, message, hashlib.sha256).digest()
+
+    def get(self, digest):
+        """
+        Returns the (user pk, password hash) of digest, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+
+            user_pk, password_hash, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[digest]
+                return None
+
+            self._entries.move_to_end(digest)
+            return user_pk, password_hash
+
+    def set(self, digest, user_pk, password_hash):
+        expires_at = time.monotonic() + self.timeout
+
+        with self._lock:
+            self._entries[digest] = (user_pk, password_hash, expires_at)
+            self._entries.move_to_end(digest)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+credential_cache = CredentialCache(
+    max_size=settings.BASIC_AUTH_CACHE_SIZE,
+    timeout=settings.BASIC_AUTH_CACHE_TIMEOUT
+)
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Opt-in BasicAuthentication that only hashes a password the first time
+    it sees a set of credentials (per process, see CredentialCache).
+    Later requests cost a primary key lookup instead of a full hash.
+
+    Clients that can should rather exchange their credentials for a token
+    once, at auth/token/.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        digest = credential_cache.digest(userid, password)
+
+        entry = credential_cache.get(digest)
+        if entry is not None:
+            user_pk, password_hash = entry
+            user = get_user_model()._default_manager.filter(pk=user_pk).first()
+
+            if (
+                user is not None and
+                user.is_active and
+                user.get_username() == userid and
+                hmac.compare_digest(user.password, password_hash)
+            ):
+                _credential_hits.inc()
+                return (user, None)
+
+            credential_cache.delete(digest)
+
+        _credential_misses.inc()
+        user, auth = super().authenticate_credentials(userid, password, request)
+        credential_cache.set(digest, user.pk, user.password)
+        return (user, auth)
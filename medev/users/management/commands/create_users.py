@@ -0,0 +1,116 @@
+import csv
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+
+User = get_user_model()
+
+REQUIRED_FIELDS = ('email', 'username', 'password')
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates users in batch from a CSV file with email, username and '
+        'password columns (first_name and last_name are optional). '
+        'Passwords are hashed in parallel, users that exist are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The CSV file to create users from.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Users per transaction.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Password hashing processes, defaults to PASSWORD_HASHING_WORKERS.'
+        )
+
+    def handle(self, *args, **options):
+        self.created = self.skipped = 0
+        started = time.monotonic()
+
+        try:
+            file = open(options['path'], newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Can't read {options['path']}: {e}")
+
+        with file:
+            reader = csv.DictReader(file)
+            missing = set(REQUIRED_FIELDS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f'Missing columns: {", ".join(sorted(missing))}.')
+
+            rows = ((reader.line_num, row) for row in reader)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+
+                self.create_batch(batch, options['workers'])
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{self.created} users created, {self.skipped} skipped '
+                    f'({self.created / max(elapsed, 1e-9):.0f} users/s)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {self.created} users in {time.monotonic() - started:.1f}s, '
+            f'{self.skipped} rows were skipped.'
+        ))
+
+    def skip(self, line_number, error):
+        self.skipped += 1
+        self.stderr.write(f'Skipped line {line_number}: {error}')
+
+    def create_batch(self, batch, workers):
+        users, passwords = {}, {}
+        emails = set()
+
+        for line_number, row in batch:
+            if not all(row.get(field) for field in REQUIRED_FIELDS):
+                self.skip(line_number, 'missing email, username or password.')
+                continue
+
+            email = User.objects.normalize_email(row['email'])
+            if row['username'] in users or email in emails:
+                self.skip(line_number, 'duplicate username or email.')
+                continue
+
+            users[row['username']] = (line_number, User(
+                email=email,
+                username=row['username'],
+                first_name=row.get('first_name') or '',
+                last_name=row.get('last_name') or ''
+            ))
+            passwords[row['username']] = row['password']
+            emails.add(email)
+
+        taken_usernames = set(User.objects.filter(
+            username__in=users
+        ).values_list('username', flat=True))
+        taken_emails = set(User.objects.filter(
+            email__in=emails
+        ).values_list('email', flat=True))
+
+        new_users = []
+        for username, (line_number, user) in users.items():
+            if username in taken_usernames or user.email in taken_emails:
+                self.skip(line_number, 'the username or email is taken.')
+            else:
+                new_users.append(user)
+
+        User.objects.bulk_create_users(
+            new_users,
+            passwords=[passwords[user.username] for user in new_users],
+            workers=workers
+        )
+        self.created += len(new_users)
@@ -1,4 +1,9 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import transaction
+
+from core.models import SlugCounter
+
+from .passwords import make_passwords
 
 
 class MyUserManager(BaseUserManager):
@@ -24,3 +29,42 @@ class MyUserManager(BaseUserManager):
         user.is_superuser = True
         user.save(using=self._db)
         return user
+
+    def bulk_create_users(self, users, passwords=None, batch_size=None, workers=None):
+        """
+        Inserts the given unsaved users (self.model(email=..., username=...))
+        with bulk_create, instead of one create_user() call and INSERT each.
+        Emails are normalized and slugs allocated in batch.
+
+        passwords are the users' raw passwords, hashed in parallel by up to
+        workers processes (see passwords.make_passwords). Users without
+        a password get an unusable one. Returns the users, with primary keys.
+        """
+        if passwords is not None:
+            for user, encoded in zip(users, make_passwords(passwords, workers)):
+                user.password = encoded
+
+        with transaction.atomic(using=self._db):
+            slugs = SlugCounter.objects.allocate_many(
+                self.model, [user.username for user in users]
+            )
+            for user, slug in zip(users, slugs):
+                user.email = self.normalize_email(user.email)
+                user.slug = slug
+                if not user.password:
+                    user.set_unusable_password()
+
+            self.bulk_create(users, batch_size=batch_size)
+
+        # Not every database hands back the primary keys of inserted rows.
+        missing_pks = [user for user in users if user.pk is None]
+        if missing_pks:
+            pks = self.only('pk', 'username').in_bulk(
+                [user.username for user in missing_pks], field_name='username'
+            )
+            for user in missing_pks:
+                user.pk = pks[user.username].pk
+
+        for user in users:
+            user._remember_slug()
+        return users
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.4 on 2026-10-18 08:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_date_joined'),
+    ]
+
+    operations = [
+        # The column stays the same (a unique, nullable varchar(50)), only the
+        # field class changes. Altering it would remake the table on SQLite.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='user',
+                    name='slug',
+                    field=models.SlugField(default=None, editable=False, null=True, unique=True),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserSlugRedirect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slug_redirects', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
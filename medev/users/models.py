@@ -1,12 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser
 
-from autoslug import AutoSlugField
+from core.models import SluggedModel
 
 from .managers import MyUserManager
 
 
-class User(AbstractBaseUser):
+class User(SluggedModel, AbstractBaseUser):
     email = models.EmailField(verbose_name='email', max_length=60, unique=True)
     username = models.CharField(max_length=16, unique=True)
     first_name = models.CharField(max_length=50)
@@ -14,14 +14,16 @@ class User(AbstractBaseUser):
 
     description = models.CharField(max_length=150, blank=True, null=True)
 
-    slug = AutoSlugField(
+    slug = models.SlugField(
         null=True,
         default=None,
         unique=True,
-        populate_from='username',
-        always_update=True
+        editable=False
     )
 
+    slug_source = 'username'
+    slug_redirect_model = 'users.UserSlugRedirect'
+
     """
     profile_picture = models.ImageField(
         upload_to='uploads/avatars',
@@ -51,3 +53,18 @@ class User(AbstractBaseUser):
 
     def has_module_perms(self, app_label):
         return self.is_superuser
+
+
+class UserSlugRedirect(models.Model):
+    """
+    A slug the user had before their username changed.
+    """
+    slug = models.SlugField(unique=True)
+    user = models.ForeignKey(
+        User,
+        related_name='slug_redirects',
+        on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f'{self.slug} -> {self.user_id}'
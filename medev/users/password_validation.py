@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+from django.contrib.auth import password_validation
+
+
+@lru_cache(maxsize=None)
+def load_passwords(password_list_path):
+    """
+    Returns the passwords listed in the (optionally gzipped) file as a
+    frozenset, read once per process and shared by every validator.
+    """
+    validator = password_validation.CommonPasswordValidator(password_list_path)
+    return frozenset(validator.passwords)
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """
+    Django's CommonPasswordValidator, sharing one preloaded copy of the
+    list instead of decompressing it into every new instance.
+    The list is loaded when the app is ready, so that the first request
+    doesn't pay for it, and forked workers share the same pages.
+    """
+    DEFAULT_PASSWORD_LIST_PATH = (
+        password_validation.CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH
+    )
+
+    def __init__(self, password_list_path=DEFAULT_PASSWORD_LIST_PATH):
+        self.passwords = load_passwords(str(password_list_path))
@@ -0,0 +1,59 @@
+"""
+Password hashing for batches of users, spread over worker processes.
+
+Each hash is one full run of the (deliberately slow) password hasher.
+Processes parallelize any configured hasher, whether or not it releases
+the GIL while hashing. The pool is started with 'spawn', forking a
+threaded server (e.g. from the admin) could deadlock the children.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+
+
+def _hash_passwords(hasher, passwords):
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def make_passwords(passwords, workers=None):
+    """
+    Returns make_password() of each of passwords (None for an unusable one),
+    hashed by up to workers processes (default:
+    settings.PASSWORD_HASHING_WORKERS, or one per CPU).
+    """
+    if workers is None:
+        workers = settings.PASSWORD_HASHING_WORKERS or os.cpu_count() or 1
+
+    # Resolved here, so that the workers don't need the settings.
+    hasher = get_hasher()
+
+    usable = [password for password in passwords if password is not None]
+    workers = min(workers, len(usable))
+
+    if workers <= 1:
+        hashes = _hash_passwords(hasher, usable)
+    else:
+        chunk_size = math.ceil(len(usable) / (workers * 4))
+        chunks = [
+            usable[start:start + chunk_size]
+            for start in range(0, len(usable), chunk_size)
+        ]
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            hashes = [
+                encoded
+                for chunk in executor.map(
+                    _hash_passwords, [hasher] * len(chunks), chunks
+                )
+                for encoded in chunk
+            ]
+
+    hashes = iter(hashes)
+    return [
+        make_password(None) if password is None else next(hashes)
+        for password in passwords
+    ]
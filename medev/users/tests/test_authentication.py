@@ -0,0 +1,213 @@
+import base64
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .. import authentication
+from ..authentication import (
+    CachedBasicAuthentication,
+    CredentialCache,
+    credential_cache,
+    token_cache_key
+)
+
+
+User = get_user_model()
+
+
+class TestCachedTokenAuthentication(TestCase):
+    """ Test cases for the cached token authentication. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+    def get_details(self):
+        return self.client.get(reverse('rest_user_details'), **self.auth)
+
+    def test_lookups_are_cached(self):
+        """ Only the first request looks the token up. """
+        with self.assertNumQueries(1):
+            response = self.get_details()
+        self.assertEquals(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.get_details()
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['username'], 'User')
+
+    def test_logout_invalidates(self):
+        """ The token can't be used after logging out. """
+        self.get_details()
+
+        response = self.client.post(reverse('rest_logout'), **self.auth)
+        self.assertEquals(response.status_code, 200)
+
+        self.assertEquals(self.get_details().status_code, 401)
+
+    def test_password_change_invalidates(self):
+        """ The cached user is dropped when the password changes. """
+        self.get_details()
+
+        response = self.client.post(
+            reverse('rest_password_change'),
+            {'new_password1': 'buxuint123', 'new_password2': 'buxuint123'},
+            **self.auth
+        )
+        self.assertEquals(response.status_code, 200)
+
+        # Drop the session the password change left behind.
+        self.client.cookies.clear()
+
+        with self.assertNumQueries(1):
+            self.get_details()
+
+    def test_deactivating_invalidates(self):
+        """ Deactivated users are rejected right away. """
+        self.get_details()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEquals(self.get_details().status_code, 401)
+
+    def test_password_hash_is_not_cached(self):
+        """ Cached entries hold the user's fields, not the password hash. """
+        self.get_details()
+
+        entry = cache.get(token_cache_key(self.token.key))
+        self.assertEquals(entry['user']['id'], self.user.pk)
+        self.assertNotIn('password', entry['user'])
+        self.assertNotIn(self.user.password, repr(entry))
+
+    def test_invalidation_during_lookup(self):
+        """ A lookup racing a deactivation doesn't cache the old user. """
+        load_token = authentication.load_token
+
+        def load_then_deactivate(key):
+            user_fields = load_token(key)
+            self.user.is_active = False
+            self.user.save()
+            return user_fields
+
+        with mock.patch.object(authentication, 'load_token', side_effect=load_then_deactivate):
+            self.assertEquals(self.get_details().status_code, 200)
+
+        self.assertEquals(self.get_details().status_code, 401)
+
+    def test_invalid_token(self):
+        """ Unknown tokens are rejected and not cached. """
+        response = self.client.get(
+            reverse('rest_user_details'),
+            HTTP_AUTHORIZATION='Token invalid'
+        )
+
+        self.assertEquals(response.status_code, 401)
+
+
+class TestBasicTokenExchange(TestCase):
+    """ Test cases for exchanging Basic credentials for a token. """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+
+    def test_can_exchange_credentials(self):
+        """ Valid credentials get the user's token. """
+        credentials = base64.b64encode(b'User:oxbuint1').decode()
+        response = self.client.post(
+            reverse('basic_token_exchange'),
+            HTTP_AUTHORIZATION=f'Basic {credentials}'
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.data['key'], Token.objects.get(user=self.user).key)
+
+    def test_cant_exchange_invalid_credentials(self):
+        """ Invalid credentials are rejected. """
+        credentials = base64.b64encode(b'User:wrong').decode()
+        response = self.client.post(
+            reverse('basic_token_exchange'),
+            HTTP_AUTHORIZATION=f'Basic {credentials}'
+        )
+
+        self.assertEquals(response.status_code, 401)
+        self.assertFalse(Token.objects.exists())
+
+
+class TestCachedBasicAuthentication(TestCase):
+    """ Test cases for the cached Basic authentication. """
+
+    def setUp(self):
+        credential_cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.authentication = CachedBasicAuthentication()
+
+    def authenticate(self, username='User', password='oxbuint1'):
+        return self.authentication.authenticate_credentials(username, password)
+
+    def test_password_is_hashed_once(self):
+        """ Repeated credentials are checked without hashing. """
+        with mock.patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check:
+            self.assertEquals(self.authenticate()[0], self.user)
+            self.assertEquals(self.authenticate()[0], self.user)
+
+        self.assertEquals(check.call_count, 1)
+
+    def test_wrong_password_is_rejected(self):
+        """ Cached credentials don't let other passwords through. """
+        self.authenticate()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(password='wrong')
+
+    def test_password_change_invalidates(self):
+        """ The old password stops working once it's changed. """
+        self.authenticate()
+
+        self.user.set_password('buxuint123')
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivating_invalidates(self):
+        """ Deactivated users are rejected. """
+        self.authenticate()
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_cache_is_bounded(self):
+        """ The least recently used credentials are evicted. """
+        cache = CredentialCache(max_size=2, timeout=60)
+
+        for i in range(3):
+            cache.set(cache.digest('User', str(i)), self.user.pk, 'hash')
+
+        self.assertIsNone(cache.get(cache.digest('User', '0')))
+        self.assertIsNotNone(cache.get(cache.digest('User', '2')))
@@ -0,0 +1,83 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..passwords import make_passwords
+
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TestBulkCreateUsers(TestCase):
+    """ Test cases for creating users in batch. """
+
+    def new_users(self, amount):
+        return [
+            User(email=f'User{i}@MAIL.com', username=f'User{i}')
+            for i in range(amount)
+        ]
+
+    def test_make_passwords(self):
+        """ Hashes every password in worker processes, keeping their order. """
+        passwords = ['first', None, 'second', 'third']
+
+        hashes = make_passwords(passwords, workers=2)
+
+        user = User()
+        for password, encoded in zip(passwords, hashes):
+            user.password = encoded
+            if password is None:
+                self.assertFalse(user.has_usable_password())
+            else:
+                self.assertTrue(user.check_password(password))
+
+    def test_bulk_create_users(self):
+        """ Creates users with their passwords, normalized emails and slugs. """
+        users = User.objects.bulk_create_users(
+            self.new_users(3),
+            passwords=['first', 'second', None],
+            workers=2
+        )
+
+        self.assertEquals(User.objects.count(), 3)
+        self.assertIsNotNone(users[0].pk)
+
+        user = User.objects.get(username='User0')
+        self.assertTrue(user.check_password('first'))
+        self.assertEquals(user.email, 'User0@mail.com')
+        self.assertEquals(user.slug, 'user0')
+        self.assertFalse(User.objects.get(username='User2').has_usable_password())
+
+    def test_bulk_create_users_without_passwords(self):
+        """ Users without passwords can't log in. """
+        User.objects.bulk_create_users(self.new_users(2))
+
+        self.assertFalse(any(user.has_usable_password() for user in User.objects.all()))
+
+    def test_create_users_command(self):
+        """ Creates the users of a CSV file, skipping taken ones. """
+        User.objects.create_user(email='taken@mail.com', username='taken')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            with open(path, 'w', newline='') as file:
+                file.write(
+                    'email,username,password,first_name\r\n'
+                    'new@mail.com,new,oxbuint1,New\r\n'
+                    'taken@mail.com,other,oxbuint1,\r\n'
+                    'missing@mail.com,missing,,\r\n'
+                )
+
+            out, err = StringIO(), StringIO()
+            call_command('create_users', path, workers=1, stdout=out, stderr=err)
+
+        self.assertIn('Created 1 users', out.getvalue())
+        self.assertIn('2 rows were skipped', out.getvalue())
+        user = User.objects.get(username='new')
+        self.assertEquals(user.first_name, 'New')
+        self.assertTrue(user.check_password('oxbuint1'))
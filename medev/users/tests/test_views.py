@@ -1,10 +1,17 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.core import mail
 from django.contrib.auth import get_user_model
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
 
 from rest_framework.authtoken.models import Token
 
+from ..password_validation import CommonPasswordValidator
+from ..tokens import default_token_generator
+
 
 User = get_user_model()
 
@@ -234,3 +241,96 @@ class TestResetPassword(TestCase):
             response.data['detail'],
             'Password has been reset with the new password.'
         )
+
+
+class TestResetPasswordConfirm(TestCase):
+    """ Test cases for confirming password resets. """
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='User',
+            email='test@mail.com',
+            password='oxbuint1'
+        )
+        self.uid = urlsafe_base64_encode(force_bytes(self.user.pk))
+        self.token = default_token_generator.make_token(self.user)
+
+    def confirm(
+        self, token=None, password1='newpassword123', password2=None, address='127.0.0.1'
+    ):
+        data = {
+            'new_password1': password1,
+            'new_password2': password2 or password1,
+            'uid': self.uid,
+            'token': token or self.token
+        }
+        url = reverse(
+            'password_reset_confirm',
+            kwargs={'uidb64': data['uid'], 'token': data['token']}
+        )
+        return self.client.post(url, data, REMOTE_ADDR=address)
+
+    def test_can_confirm(self):
+        """ A valid token resets the password. """
+        response = self.confirm()
+
+        self.assertEquals(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpassword123'))
+
+    def test_rejected_without_queries(self):
+        """ Malformed and expired tokens and mismatched passwords never query. """
+        expired = default_token_generator._make_token_with_timestamp(
+            self.user,
+            default_token_generator._num_seconds(default_token_generator._now())
+            - settings.PASSWORD_RESET_TIMEOUT - 1
+        )
+
+        for kwargs in (
+            {'token': 'junk'},
+            {'token': 'zzz-not-hex'},
+            {'token': expired},
+            {'password2': 'otherpassword123'},
+        ):
+            with self.assertNumQueries(0):
+                response = self.confirm(**kwargs)
+            self.assertEquals(response.status_code, 400)
+
+    def test_wrong_token(self):
+        """ A well formed token with the wrong HMAC is rejected. """
+        timestamp, token_hash = self.token.split('-')
+
+        response = self.confirm(token=f'{timestamp}-{"0" * len(token_hash)}')
+
+        self.assertEquals(response.status_code, 400)
+        self.assertIn('token', response.data)
+
+    def test_common_password(self):
+        """ Common passwords are rejected, from the shared preloaded list. """
+        first, second = CommonPasswordValidator(), CommonPasswordValidator()
+        self.assertIs(first.passwords, second.passwords)
+        self.assertIsInstance(first.passwords, frozenset)
+
+        response = self.confirm(password1='password123')
+
+        self.assertEquals(response.status_code, 400)
+        self.assertIn('new_password2', response.data)
+
+    def test_throttled_per_account(self):
+        """ An account only gets so many attempts from one address. """
+        for i in range(10):
+            self.confirm(token='junk')
+
+        response = self.confirm()
+
+        self.assertEquals(response.status_code, 429)
+
+    def test_others_cant_use_up_attempts(self):
+        """ Attempts from other addresses don't count against the account's owner. """
+        for i in range(10):
+            self.confirm(token='junk', address='10.0.0.1')
+
+        self.assertEquals(self.confirm(token='junk', address='10.0.0.1').status_code, 429)
+        self.assertEquals(self.confirm().status_code, 200)
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.utils.http import base36_to_int
+
+
+HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+class ResetTokenGenerator(PasswordResetTokenGenerator):
+    def is_token_fresh(self, token):
+        """
+        Returns whether the token is well formed and unexpired. Unlike
+        check_token() this doesn't need the user, so it rejects junk and
+        stale tokens without a query. It doesn't verify the token's HMAC,
+        which covers the user's password hash, check_token() still has to.
+        """
+        if not isinstance(token, str):
+            return False
+
+        try:
+            timestamp_b36, token_hash = token.split('-')
+            timestamp = base36_to_int(timestamp_b36)
+        except ValueError:
+            return False
+
+        if not token_hash or not HEX_DIGITS.issuperset(token_hash):
+            return False
+
+        age = self._num_seconds(self._now()) - timestamp
+        return age <= settings.PASSWORD_RESET_TIMEOUT
+
+
+default_token_generator = ResetTokenGenerator()
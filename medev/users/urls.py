@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .api.views import PasswordResetConfirmView
+from .api.views import BasicTokenExchangeView, PasswordResetConfirmView
 
 
 urlpatterns = [
@@ -8,5 +8,6 @@ urlpatterns = [
         'password/reset-confirm/<uidb64>/<token>/',
         PasswordResetConfirmView.as_view(),
         name='password_reset_confirm'
-    )
+    ),
+    path('token/', BasicTokenExchangeView.as_view(), name='basic_token_exchange')
 ]